@@ -66,9 +66,10 @@ def before_req():
 def after_req(response):
     """Method called before any response is returned"""
 
-    json = response.get_json()
-    if not json:
-        json = response.data.decode()
+    if response.is_json or response.mimetype.startswith("text/"):
+        json = response.get_json() or response.data.decode()
+    else:
+        json = f"<{response.content_length} bytes of {response.mimetype}>"
 
     json = re.sub(r"\s+", " ", str(json)) if json else ""
 
@@ -89,10 +90,12 @@ def after_req(response):
 
 # Aircraft control
 FLASK_API.add_resource(res.Alt, "/alt")
+FLASK_API.add_resource(res.Batch, "/batch")
 FLASK_API.add_resource(res.Cre, "/cre")
 FLASK_API.add_resource(res.Direct, "/direct")
 FLASK_API.add_resource(res.Gspd, "/gspd")
 FLASK_API.add_resource(res.Hdg, "/hdg")
+FLASK_API.add_resource(res.History, "/history")
 FLASK_API.add_resource(res.ListRoute, "/listroute")
 FLASK_API.add_resource(res.Pos, "/pos")
 
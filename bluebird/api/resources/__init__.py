@@ -2,6 +2,7 @@
 Package provides logic for the simulation API endpoints
 """
 from .alt import Alt
+from .batch import Batch
 from .cre import Cre
 from .direct import Direct
 from .dtmult import DtMult
@@ -9,6 +10,7 @@ from .epinfo import EpInfo
 from .eplog import EpLog
 from .gspd import Gspd
 from .hdg import Hdg
+from .history import History
 from .hold import Hold
 from .listroute import ListRoute
 from .loadlog import LoadLog
@@ -28,10 +30,12 @@ from .step import Step
 __all__ = [
     "AddWpt",
     "Alt",
+    "Batch",
     "Cre",
     "Direct",
     "Gspd",
     "Hdg",
+    "History",
     "ListRoute",
     "Pos",
     "DtMult",
@@ -13,7 +13,7 @@ from bluebird.utils.types import VerticalSpeed
 # Parser for post requests
 _PARSER_POST = reqparse.RequestParser()
 _PARSER_POST.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="json", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="json", required=True
 )
 _PARSER_POST.add_argument("alt", type=Altitude, location="json", required=True)
 _PARSER_POST.add_argument("vspd", type=VerticalSpeed, location="json", required=False)
@@ -21,7 +21,7 @@ _PARSER_POST.add_argument("vspd", type=VerticalSpeed, location="json", required=
 # Parser for get requests
 _PARSER_GET = reqparse.RequestParser()
 _PARSER_GET.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="args", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="args", required=True
 )
 
 
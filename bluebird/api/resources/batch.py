@@ -0,0 +1,148 @@
+"""
+Provides logic for the BATCH API endpoint
+"""
+from collections import abc
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Union
+
+from flask_restful import reqparse
+from flask_restful import Resource
+
+import bluebird.api.resources.utils.responses as responses
+import bluebird.api.resources.utils.utils as utils
+from bluebird.api.resources.alt import _PARSER_POST as _ALT_PARSER
+from bluebird.api.resources.cre import _PARSER as _CRE_PARSER
+from bluebird.api.resources.direct import _PARSER as _DIRECT_PARSER
+from bluebird.api.resources.gspd import _PARSER as _GSPD_PARSER
+from bluebird.api.resources.hdg import _PARSER as _HDG_PARSER
+from bluebird.utils.properties import AircraftCommand
+from bluebird.utils.types import Callsign
+from bluebird.utils.types import LatLon
+
+
+_PARSER = reqparse.RequestParser()
+_PARSER.add_argument(
+    "commands", type=dict, action="append", location="json", required=True
+)
+
+# NOTE(rkm 2020-06-20) The commands are parsed with the same rules as their individual
+# endpoints
+_CMD_PARSERS = {
+    "ALT": _ALT_PARSER,
+    "CRE": _CRE_PARSER,
+    "DIRECT": _DIRECT_PARSER,
+    "GSPD": _GSPD_PARSER,
+    "HDG": _HDG_PARSER,
+}
+
+
+def _parse_command(cmd: Dict[str, Any]) -> Union[AircraftCommand, str]:
+    """Parses a single command from the request, or returns an error string"""
+
+    cmd = dict(cmd)
+    cmd_name = str(cmd.pop("cmd", "")).upper()
+    parser = _CMD_PARSERS.get(cmd_name)
+    if not parser:
+        return f'Unknown command "{cmd_name}". Must be one of {list(_CMD_PARSERS)}'
+
+    req_args = utils.parse_json_args(parser, cmd)
+    if isinstance(req_args, str):
+        return req_args
+    callsign = req_args[utils.CALLSIGN_LABEL]
+
+    if cmd_name == "ALT":
+        return AircraftCommand(
+            "set_cleared_fl", (callsign, req_args["alt"]), {"vspd": req_args["vspd"]}
+        )
+    if cmd_name == "HDG":
+        return AircraftCommand("set_heading", (callsign, req_args["hdg"]))
+    if cmd_name == "GSPD":
+        return AircraftCommand("set_ground_speed", (callsign, req_args["gspd"]))
+    if cmd_name == "DIRECT":
+        if not req_args["waypoint"]:
+            return "Waypoint name must be specified"
+        return AircraftCommand("direct_to_waypoint", (callsign, req_args["waypoint"]))
+
+    if not req_args["type"]:
+        return "Aircraft type must be specified"
+    try:
+        position = LatLon(req_args["lat"], req_args["lon"])
+    except AssertionError as exc:
+        return f"Invalid LatLon: {exc}"
+    return AircraftCommand(
+        "create",
+        (
+            callsign,
+            req_args["type"],
+            position,
+            req_args["hdg"],
+            req_args["alt"],
+            req_args["gspd"],
+        ),
+    )
+
+
+class Batch(Resource):
+    """Contains logic for the BATCH endpoint"""
+
+    @staticmethod
+    def post():
+        """
+        Logic for POST events. All the commands are validated before any are sent, and
+        the aircraft are checked against a single snapshot. The commands are then sent
+        together, and the result of each is returned
+        """
+
+        req_args = utils.parse_args(_PARSER)
+
+        commands = []
+        for idx, cmd in enumerate(req_args["commands"]):
+            command = _parse_command(cmd)
+            if isinstance(command, str):
+                return responses.bad_request_resp(f"Invalid command {idx}: {command}")
+            commands.append(command)
+
+        aircraft_controls = utils.sim_proxy().aircraft
+        all_props = aircraft_controls.all_properties
+        if not isinstance(all_props, abc.Mapping):
+            return responses.internal_err_resp(
+                f"Could not check if the aircraft exist: {all_props}"
+            )
+
+        # Aircraft created earlier in the batch can be used by the later commands
+        created: Set[Callsign] = set()
+        results: Dict[int, Optional[str]] = {}
+        to_send = []
+        for idx, command in enumerate(commands):
+            callsign = command.args[0]
+            exists = callsign in all_props or callsign in created
+            if command.name == "create":
+                if exists:
+                    results[idx] = f'Aircraft "{callsign}" already exists'
+                    continue
+                created.add(callsign)
+            elif not exists:
+                results[idx] = f'Aircraft "{callsign}" does not exist'
+                continue
+            to_send.append(idx)
+
+        if to_send:
+            sent = aircraft_controls.batch([commands[x] for x in to_send])
+            results.update(zip(to_send, sent))
+
+        data = {
+            "results": [
+                {
+                    "cmd": str(cmd["cmd"]).upper(),
+                    utils.CALLSIGN_LABEL: str(command.args[0]),
+                    "error": results[idx],
+                }
+                for idx, (cmd, command) in enumerate(
+                    zip(req_args["commands"], commands)
+                )
+            ]
+        }
+        return responses.ok_resp(data)
@@ -17,7 +17,7 @@ from bluebird.utils.types import LatLon
 
 _PARSER = reqparse.RequestParser()
 _PARSER.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="json", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="json", required=True
 )
 _PARSER.add_argument("type", type=str, location="json", required=True)
 _PARSER.add_argument("lat", type=float, location="json", required=True)
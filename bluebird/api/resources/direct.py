@@ -12,7 +12,7 @@ from bluebird.utils.types import Callsign
 
 _PARSER = reqparse.RequestParser()
 _PARSER.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="json", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="json", required=True
 )
 _PARSER.add_argument("waypoint", type=str, location="json", required=True)
 
@@ -12,7 +12,7 @@ from bluebird.utils.types import GroundSpeed
 
 _PARSER = reqparse.RequestParser()
 _PARSER.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="json", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="json", required=True
 )
 _PARSER.add_argument("gspd", type=GroundSpeed, location="json", required=True)
 
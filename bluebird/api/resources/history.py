@@ -0,0 +1,98 @@
+"""
+Provides logic for the HISTORY API endpoint
+"""
+import math
+
+import numpy as np
+from flask_restful import inputs
+from flask_restful import reqparse
+from flask_restful import Resource
+
+import bluebird.api.resources.utils.encodings as encodings
+import bluebird.api.resources.utils.responses as responses
+import bluebird.api.resources.utils.utils as utils
+from bluebird.utils.types import Callsign
+
+
+_PARSER = reqparse.RequestParser()
+_PARSER.add_argument(
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="args", required=False
+)
+_PARSER.add_argument("steps", type=inputs.positive, location="args", required=False)
+
+
+class History(Resource):
+    """HISTORY command"""
+
+    @staticmethod
+    def get():
+        """
+        Logic for GET events. Returns the properties of the specified aircraft (or all
+        aircraft) at the start of each of the last n steps, oldest first. The
+        properties can also be returned as msgpack or NPY, depending on the Accept
+        header
+        """
+
+        req_args = utils.parse_args(_PARSER)
+        callsign = req_args[utils.CALLSIGN_LABEL]
+
+        frames = utils.sim_proxy().aircraft.history(req_args["steps"])
+
+        encoding = encodings.negotiate(encodings.MSGPACK, encodings.NPY)
+        if encoding != encodings.JSON:
+            return History._get_encoded(frames, callsign, encoding)
+
+        history = []
+        for frame in frames:
+            if callsign:
+                props = frame.aircraft.get(callsign)
+                all_props = [props] if props else []
+            else:
+                all_props = [x for x in frame.aircraft.values() if x]
+            aircraft = {}
+            for props in all_props:
+                aircraft.update(utils.convert_aircraft_props(props))
+            history.append({"scenario_time": frame.scenario_time, "aircraft": aircraft})
+
+        if callsign and not any(x["aircraft"] for x in history):
+            return responses.bad_request_resp(f'No history for aircraft "{callsign}"')
+
+        return responses.ok_resp({"history": history})
+
+    @staticmethod
+    def _get_encoded(frames, callsign, encoding: str):
+        """
+        Returns the history in a binary encoding. For NPY, the frames are joined into
+        one array, with "scenario_time" as the first column
+        """
+
+        callsigns = [callsign] if callsign else None
+        all_columns = [
+            encodings.aircraft_columns(x.aircraft, callsigns) for x in frames
+        ]
+
+        if callsign and not any(x["callsign"] for x in all_columns):
+            return responses.bad_request_resp(f'No history for aircraft "{callsign}"')
+
+        if encoding == encodings.MSGPACK:
+            history = [
+                {"scenario_time": x.scenario_time, "aircraft": y}
+                for x, y in zip(frames, all_columns)
+            ]
+            data = encodings.to_msgpack({"history": history})
+            return responses.encoded_resp(data, encoding)
+
+        all_columns = [
+            {
+                "scenario_time": np.full(
+                    len(y["callsign"]),
+                    math.nan if x.scenario_time is None else x.scenario_time,
+                ),
+                **y,
+            }
+            for x, y in zip(frames, all_columns)
+        ]
+        columns = encodings.concat_columns(all_columns)
+        if not columns:
+            columns = {"scenario_time": np.empty(0), "callsign": []}
+        return responses.encoded_resp(encodings.to_npy(columns), encoding)
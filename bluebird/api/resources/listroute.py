@@ -13,7 +13,7 @@ from bluebird.utils.types import Callsign
 
 _PARSER = reqparse.RequestParser()
 _PARSER.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="args", required=True
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="args", required=False
 )
 
 
@@ -24,12 +24,16 @@ class ListRoute(Resource):
     def get():
         """
         Logic for GET events. If the request contains an identifier to an existing
-        aircraft, then information about its route (FMS flightplan) is returned
+        aircraft, then information about its route (FMS flightplan) is returned.
+        Otherwise the routes of all aircraft are returned, keyed by their callsigns
         """
 
         req_args = utils.parse_args(_PARSER)
         callsign = req_args[utils.CALLSIGN_LABEL]
 
+        if not callsign:
+            return ListRoute._get_all()
+
         resp = utils.check_exists(utils.sim_proxy(), callsign)
         if resp:
             return resp
@@ -48,3 +52,24 @@ class ListRoute(Resource):
             "route_waypoints": route_info[2],
         }
         return responses.ok_resp(data)
+
+    @staticmethod
+    def _get_all():
+        """Returns the routes of all aircraft which have one"""
+
+        all_routes = utils.sim_proxy().aircraft.all_routes()
+        if isinstance(all_routes, str):
+            return responses.internal_err_resp(all_routes)
+
+        if not all_routes:
+            return responses.bad_request_resp("No aircraft have a route")
+
+        data = {
+            str(callsign): {
+                "route_name": route_info[0],
+                "next_waypoint": route_info[1],
+                "route_waypoints": route_info[2],
+            }
+            for callsign, route_info in all_routes.items()
+        }
+        return responses.ok_resp(data)
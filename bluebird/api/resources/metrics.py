@@ -5,6 +5,12 @@ Logic for metric endpoints
 # stepped) since the previous call to the metric endpoint
 import logging
 import traceback
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
 
 from flask_restful import reqparse
 from flask_restful import Resource
@@ -21,6 +27,55 @@ _PARSER.add_argument("provider", type=str, location="args", required=False)
 _LOGGER = logging.getLogger(__name__)
 
 
+class MetricError(NamedTuple):
+    """An error from calling a metric, and the function to create its response"""
+
+    resp: Callable
+    msg: str
+
+
+def call_metric(
+    metric_name: Optional[str], provider_name: Optional[str], args: List[str]
+) -> Union[Any, MetricError]:
+    """
+    Calls the metric function from the given provider (the BlueBird metrics by
+    default), and returns its result or a MetricError
+    """
+
+    if not utils.sim_proxy().metrics_providers:
+        return MetricError(responses.internal_err_resp, "No metrics available")
+
+    if not metric_name:
+        return MetricError(responses.bad_request_resp, "Metric name must be specified")
+
+    # Use the default metrics if not otherwise specified
+    provider_name = provider_name if provider_name else "BlueBird"
+    provider = utils.sim_proxy().metrics_providers.get(provider_name)
+    if not provider:
+        return MetricError(
+            responses.bad_request_resp, f'Provider "{provider_name}" not found'
+        )
+
+    try:
+        result = utils.sim_proxy().call_metric_function(provider, metric_name, args)
+    except AttributeError:  # Catch cases where a wrong metric name is given
+        return MetricError(
+            responses.not_found_resp,
+            f"Provider {str(provider)} (version {provider.version()}) has no "
+            f"metric named '{metric_name}'",
+        )
+    except Exception as exc:  # Catch all other cases
+        return MetricError(
+            responses.bad_request_resp,
+            f"Metric function returned an error: {exc}\n{traceback.format_exc()}",
+        )
+
+    if isinstance(result, str):
+        return MetricError(responses.internal_err_resp, result)
+
+    return result
+
+
 class Metric(Resource):
     """BlueBird Metrics endpoint"""
 
@@ -33,32 +88,11 @@ class Metric(Resource):
 
         req_args = utils.parse_args(_PARSER)
         metric_name = req_args["name"]
-
-        if not metric_name:
-            return responses.bad_request_resp("Metric name must be specified")
-
-        # Use the default metrics if not otherwise specified
-        provider_name = req_args["provider"] if req_args["provider"] else "BlueBird"
-        provider = utils.sim_proxy().metrics_providers.get(provider_name)
-        if not provider:
-            return responses.bad_request_resp(f'Provider "{provider_name}" not found')
-
         args = req_args["args"].split(",") if req_args["args"] else []
 
-        try:
-            result = utils.sim_proxy().call_metric_function(provider, metric_name, args)
-        except AttributeError:  # Catch cases where a wrong metric name is given
-            return responses.not_found_resp(
-                f"Provider {str(provider)} (version {provider.version()}) has no "
-                f"metric named '{metric_name}'"
-            )
-        except Exception as exc:  # Catch all other cases
-            return responses.bad_request_resp(
-                f"Metric function returned an error: {exc}\n{traceback.format_exc()}"
-            )
-
-        if isinstance(result, str):
-            return responses.internal_err_resp(result)
+        result = call_metric(metric_name, req_args["provider"], args)
+        if isinstance(result, MetricError):
+            return result.resp(result.msg)
 
         return responses.ok_resp({metric_name: result})
 
@@ -1,21 +1,37 @@
 """
 Provides logic for the POS (position) API endpoint
 """
+import itertools
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from flask_restful import inputs
 from flask_restful import reqparse
 from flask_restful import Resource
 
+import bluebird.api.resources.utils.encodings as encodings
 import bluebird.api.resources.utils.responses as responses
 import bluebird.api.resources.utils.utils as utils
 from bluebird.api.resources.utils.responses import internal_err_resp
-from bluebird.utils.properties import AircraftProperties
+from bluebird.sim_proxy.aircraft_store import AircraftStore
 from bluebird.utils.properties import SimProperties
 from bluebird.utils.types import Callsign
 
 
 _PARSER = reqparse.RequestParser()
 _PARSER.add_argument(
-    utils.CALLSIGN_LABEL, type=Callsign, location="args", required=False
+    utils.CALLSIGN_LABEL, type=Callsign.canonical, location="args", required=False
+)
+_PARSER.add_argument("since", type=inputs.natural, location="args", required=False)
+_PARSER.add_argument(
+    "fields", type=utils.comma_separated, location="args", required=False
 )
+_PARSER.add_argument(
+    "callsigns", type=utils.callsign_list, location="args", required=False
+)
+_PARSER.add_argument("limit", type=inputs.positive, location="args", required=False)
+_PARSER.add_argument("cursor", type=str, location="args", required=False)
 
 
 class Pos(Resource):
@@ -23,42 +39,137 @@ class Pos(Resource):
 
     @staticmethod
     def get():
-        """Logic for GET events. Returns properties for the specified aircraft"""
+        """
+        Logic for GET events. Returns properties for the specified aircraft, or for all
+        aircraft if no callsign is given. The response includes the version of the
+        snapshot which the properties were read from. If a previous version is given
+        with "since", then only the aircraft which have changed are returned. The
+        returned fields and aircraft can be selected with "fields" and "callsigns",
+        and the aircraft paged through with "limit" and "cursor". The properties can
+        also be returned as msgpack or NPY, depending on the Accept header
+        """
 
         req_args = utils.parse_args(_PARSER)
         callsign = req_args[utils.CALLSIGN_LABEL]
+        since = req_args["since"]
+        fields = req_args["fields"]
+        encoding = encodings.negotiate(encodings.MSGPACK, encodings.NPY)
+
+        if callsign and since is not None:
+            return responses.bad_request_resp(
+                "Can't specify both a callsign and a snapshot version"
+            )
+
+        selecting = any(req_args[x] for x in ("callsigns", "limit", "cursor"))
+        if selecting and (callsign or since is not None):
+            return responses.bad_request_resp(
+                "Can't specify callsigns, limit, or cursor with a callsign or a "
+                "snapshot version"
+            )
+
+        if fields is not None:
+            unknown = [x for x in fields if x not in encodings.AIRCRAFT_FIELDS]
+            if unknown or not fields:
+                return responses.bad_request_resp(
+                    f"Invalid fields {unknown}. Must be from "
+                    f"{list(encodings.AIRCRAFT_FIELDS)}"
+                )
 
         sim_props = utils.sim_proxy().simulation.properties
         if not isinstance(sim_props, SimProperties):
             return responses.internal_err_resp(sim_props)
 
+        if since is not None:
+            return Pos._get_changes(since, sim_props, fields, encoding)
+
+        all_props = utils.sim_proxy().aircraft.all_properties
+        if isinstance(all_props, str):
+            return responses.internal_err_resp(
+                f"Couldn't get the aircraft properties: {all_props}"
+            )
+
         if callsign:
             resp = utils.check_exists(utils.sim_proxy(), callsign)
             if resp:
                 return resp
 
-            props = utils.sim_proxy().aircraft.properties(callsign)
-            if not isinstance(props, AircraftProperties):
-                return internal_err_resp(props)
-
-            data = utils.convert_aircraft_props(props)
-            data.update({"scenario_time": sim_props.scenario_time})
+            if not all_props.select([callsign])[0]:
+                return internal_err_resp(f"No properties for aircraft {callsign}")
 
-            return responses.ok_resp(data)
+            return Pos._resp(
+                all_props,
+                [callsign],
+                fields,
+                encoding,
+                scenario_time=sim_props.scenario_time,
+                snapshot_version=all_props.version,
+            )
 
         # else: get_all_properties
 
-        props = utils.sim_proxy().aircraft.all_properties
-        if isinstance(props, str):
-            return responses.internal_err_resp(
-                f"Couldn't get the aircraft properties: {props}"
-            )
-        if not props:
+        if not all_props:
             return responses.bad_request_resp("No aircraft in the simulation")
 
-        data = {}
-        for prop in props.values():
-            data.update(utils.convert_aircraft_props(prop))
-        data["scenario_time"] = sim_props.scenario_time
+        if not selecting:
+            return Pos._resp(
+                all_props,
+                None,
+                fields,
+                encoding,
+                scenario_time=sim_props.scenario_time,
+                snapshot_version=all_props.version,
+            )
+
+        callsigns, next_cursor = all_props.select(
+            req_args["callsigns"], req_args["limit"], req_args["cursor"]
+        )
+        return Pos._resp(
+            all_props,
+            callsigns,
+            fields,
+            encoding,
+            next_cursor=next_cursor,
+            scenario_time=sim_props.scenario_time,
+            snapshot_version=all_props.version,
+        )
 
-        return responses.ok_resp(data)
+    @staticmethod
+    def _get_changes(
+        since: int, sim_props: SimProperties, fields: Optional[List[str]], encoding: str
+    ):
+        """
+        Returns the properties of the aircraft which were added or changed since the
+        given snapshot version, and the callsigns of any which were removed
+        """
+
+        result = utils.sim_proxy().aircraft.changes_since(since)
+        if isinstance(result, str):
+            return responses.bad_request_resp(result)
+        snapshot, changes = result
+
+        return Pos._resp(
+            snapshot,
+            itertools.chain(changes.added, changes.changed),
+            fields,
+            encoding,
+            removed=[str(x) for x in changes.removed],
+            scenario_time=sim_props.scenario_time,
+            snapshot_version=snapshot.version,
+        )
+
+    @staticmethod
+    def _resp(
+        snapshot: AircraftStore,
+        callsigns: Optional[Iterable[Callsign]],
+        fields: Optional[List[str]],
+        encoding: str,
+        **data,
+    ):
+        """
+        Returns the requested fields of the given aircraft (or all aircraft), read
+        directly from the columns of the snapshot, and any other data
+        """
+        columns = encodings.aircraft_columns(snapshot, callsigns, fields)
+        if encoding != encodings.JSON:
+            return encodings.aircraft_resp(encoding, columns, **data)
+        return responses.ok_resp({**encodings.to_json(columns), **data})
@@ -3,15 +3,14 @@ Provides logic for the sector API endpoint
 """
 from http import HTTPStatus
 
-import geojson
-from aviary.sector.sector_element import SectorElement
 from flask_restful import reqparse
 from flask_restful import Resource
 
 import bluebird.api.resources.utils.responses as responses
 import bluebird.api.resources.utils.utils as utils
 from bluebird.utils.properties import Sector as SectorWrapper
-from bluebird.utils.sector_validation import validate_geojson_sector
+from bluebird.utils.sector_cache import CachedSector
+from bluebird.utils.sector_cache import SECTOR_CACHE
 
 
 _PARSER = reqparse.RequestParser()
@@ -33,7 +32,7 @@ class Sector(Resource):
 
         # TODO (RKM 2019-12-20) Check what exceptions this can throw
         try:
-            geojson_str = geojson.dumps(sector.element)
+            geojson_str = SECTOR_CACHE.geojson(sector.element)
         except Exception as exc:
             return responses.internal_err_resp(f"Couldn't get sector geojson: {exc}")
 
@@ -53,11 +52,10 @@ class Sector(Resource):
         sector_json = req_args["content"]
 
         if sector_json:
-            sector_element = validate_geojson_sector(sector_json)
-            if not isinstance(sector_element, SectorElement):
-                return responses.bad_request_resp(
-                    f"Invalid sector content: {sector_element}"
-                )
+            cached = SECTOR_CACHE.from_geojson(sector_json)
+            if not isinstance(cached, CachedSector):
+                return responses.bad_request_resp(f"Invalid sector content: {cached}")
+            sector_element = cached.element
         else:
             sector_element = None
 
@@ -1,17 +1,30 @@
 """
 SimInfo endpoint
 """
+from flask_restful import reqparse
 from flask_restful import Resource
 
 import bluebird.api.resources.utils.responses as responses
 import bluebird.api.resources.utils.utils as utils
-from bluebird.settings import Settings
 from bluebird.utils.properties import SimProperties
 
 
+_PARSER = reqparse.RequestParser()
+_PARSER.add_argument(
+    "fields", type=utils.comma_separated, location="args", required=False
+)
+
+
 class SimInfo(Resource):
     @staticmethod
     def get():
+        """
+        Logic for GET events. Returns the sim info, optionally only the requested
+        fields. The callsigns are only fetched if they are requested
+        """
+
+        req_args = utils.parse_args(_PARSER)
+        fields = req_args["fields"]
 
         sim_props = utils.sim_proxy().simulation.properties
         if not isinstance(sim_props, SimProperties):
@@ -19,24 +32,21 @@ class SimInfo(Resource):
                 f"Couldn't get the sim properties: {sim_props}"
             )
 
-        callsigns = utils.sim_proxy().aircraft.callsigns
-        if not isinstance(callsigns, list):
-            return responses.internal_err_resp(
-                f"Couldn't get the callsigns: {callsigns}"
-            )
+        callsigns = []
+        if fields is None or "callsigns" in fields:
+            callsigns = utils.sim_proxy().aircraft.callsigns
+            if not isinstance(callsigns, list):
+                return responses.internal_err_resp(
+                    f"Couldn't get the callsigns: {callsigns}"
+                )
+
+        data = utils.convert_sim_props(sim_props, callsigns)
+        if fields is None:
+            return responses.ok_resp(data)
 
-        data = {
-            "callsigns": [str(x) for x in callsigns],
-            "dt": sim_props.dt,
-            "mode": Settings.SIM_MODE.name,
-            "scenario_name": sim_props.scenario_name,
-            "scenario_time": sim_props.scenario_time,
-            "sector_name": sim_props.sector_name,
-            "seed": sim_props.seed,
-            "sim_type": Settings.SIM_TYPE.name,
-            "speed": sim_props.speed,
-            "state": sim_props.state.name,
-            "utc_datetime": str(sim_props.utc_datetime),
-        }
-
-        return responses.ok_resp(data)
+        unknown = [x for x in fields if x not in data]
+        if unknown or not fields:
+            return responses.bad_request_resp(
+                f"Invalid fields {unknown}. Must be from {list(data)}"
+            )
+        return responses.ok_resp({x: data[x] for x in fields})
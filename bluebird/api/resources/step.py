@@ -1,12 +1,27 @@
 """
 Provides logic for the STEP API endpoint
 """
+from flask_restful import inputs
+from flask_restful import reqparse
 from flask_restful import Resource
 
+import bluebird.api.resources.utils.encodings as encodings
 import bluebird.api.resources.utils.responses as responses
 import bluebird.api.resources.utils.utils as utils
+from bluebird.api.resources.metrics import call_metric
+from bluebird.api.resources.metrics import MetricError
 from bluebird.settings import Settings
 from bluebird.utils.properties import SimMode
+from bluebird.utils.properties import SimProperties
+
+
+_PARSER = reqparse.RequestParser()
+_PARSER.add_argument(
+    "observe", type=inputs.boolean, location="json", required=False, default=False
+)
+_PARSER.add_argument(
+    "metrics", type=dict, action="append", location="json", required=False
+)
 
 
 # TODO SimClient's should assert (internally) that the simulator time is advanced
@@ -15,11 +30,65 @@ class Step(Resource):
 
     @staticmethod
     def post():
-        """Logic for POST events"""
+        """
+        Logic for POST events. If "observe" is set (or any metrics are requested), then
+        the response contains the aircraft properties, sim info, and metric results
+        from after the step
+        """
 
         if Settings.SIM_MODE != SimMode.Agent:
             return responses.bad_request_resp("Must be in agent mode to use step")
 
+        req_args = utils.parse_args(_PARSER)
+        metrics = req_args["metrics"] or []
+        for metric in metrics:
+            if not isinstance(metric.get("name"), str):
+                return responses.bad_request_resp("Each metric must have a name")
+
         err = utils.sim_proxy().simulation.step()
+        if err or not (req_args["observe"] or metrics):
+            return responses.checked_resp(err)
+
+        return Step._observe(metrics)
+
+    @staticmethod
+    def _observe(metrics: list):
+        """
+        Returns the state after the step. The aircraft data and the metrics are read
+        from the same snapshot. The aircraft data is converted in the same way as GET
+        /pos
+        """
+
+        sim_props = utils.sim_proxy().simulation.properties
+        if not isinstance(sim_props, SimProperties):
+            return responses.internal_err_resp(
+                f"Couldn't get the sim properties: {sim_props}"
+            )
+
+        all_props = utils.sim_proxy().aircraft.all_properties
+        if isinstance(all_props, str):
+            return responses.internal_err_resp(
+                f"Couldn't get the aircraft properties: {all_props}"
+            )
+
+        metric_results = []
+        for metric in metrics:
+            args = metric.get("args") or []
+            if isinstance(args, str):
+                args = args.split(",")
+            result = call_metric(metric["name"], metric.get("provider"), args)
+            metric_result = {"name": metric["name"], "args": args}
+            if isinstance(result, MetricError):
+                metric_result["error"] = result.msg
+            else:
+                metric_result["result"] = result
+            metric_results.append(metric_result)
 
-        return responses.checked_resp(err)
+        data = {
+            "aircraft": encodings.to_json(encodings.aircraft_columns(all_props)),
+            "metrics": metric_results,
+            "scenario_time": sim_props.scenario_time,
+            "sim_info": utils.convert_sim_props(sim_props, all_props),
+            "snapshot_version": all_props.version,
+        }
+        return responses.ok_resp(data)
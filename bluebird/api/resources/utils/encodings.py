@@ -0,0 +1,186 @@
+"""
+Contains the binary encodings of the aircraft properties. These are built directly from
+the columns of an AircraftStore, and are selected through the request's Accept header
+"""
+import io
+import math
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import msgpack
+import numpy as np
+from flask import request
+
+import bluebird.api.resources.utils.responses as responses
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+NPY = "application/x-npy"
+
+# The fields of the aircraft properties returned by the API, and the AircraftStore
+# columns they are read from. This is also the field order of the NPY format
+AIRCRAFT_FIELDS = {
+    "actype": "aircraft_type",
+    "current_fl": "alt_ft",
+    "gs": "ground_speed",
+    "hdg": "heading",
+    "lat": "lat",
+    "lon": "lon",
+    "vs": "vertical_speed",
+    "cleared_fl": "cleared_fl_ft",
+    "requested_fl": "requested_fl_ft",
+    "cleared_hdg": "cleared_heading",
+    "cleared_gs": "cleared_ground_speed",
+    "cleared_vs": "cleared_vertical_speed",
+}
+
+AircraftColumns = Dict[str, Union[np.ndarray, List[Any]]]
+
+# Fields which are returned as integers in JSON. Altitudes are only integers if they are
+# whole numbers of feet
+_INT_FIELDS = frozenset(("hdg", "vs", "cleared_hdg", "cleared_vs"))
+_ALTITUDE_FIELDS = frozenset(("current_fl", "cleared_fl", "requested_fl"))
+
+
+def negotiate(*encodings: str) -> str:
+    """
+    Returns the best of the given encodings (or JSON) which is accepted by the client.
+    Defaults to JSON
+    """
+    return request.accept_mimetypes.best_match((JSON, *encodings), default=JSON)
+
+
+def aircraft_columns(
+    store: AircraftStore,
+    callsigns: Optional[Iterable] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> AircraftColumns:
+    """
+    Returns the columns of the aircraft properties in the store, keyed by their API
+    field names. The first column is the callsigns, followed by the requested fields
+    (or all fields) in their standard order. Only the requested columns are read
+    """
+    fields = [x for x in AIRCRAFT_FIELDS if fields is None or x in fields]
+    store_callsigns, columns = store.columns(
+        [AIRCRAFT_FIELDS[x] for x in fields], callsigns
+    )
+    data: AircraftColumns = {"callsign": [str(x) for x in store_callsigns]}
+    for field in fields:
+        data[field] = columns[AIRCRAFT_FIELDS[field]]
+    return data
+
+
+def to_json(columns: AircraftColumns) -> Dict[str, Dict[str, Any]]:
+    """
+    Converts the columns into the JSON format of the aircraft properties, i.e. a dict
+    for each aircraft keyed by its callsign. Missing values are None
+    """
+
+    values = {}
+    for field, column in columns.items():
+        if field == "callsign":
+            continue
+        if not isinstance(column, np.ndarray):
+            values[field] = column
+            continue
+        column = column.tolist()
+        if field in _INT_FIELDS:
+            values[field] = [None if math.isnan(x) else int(x) for x in column]
+        elif field in _ALTITUDE_FIELDS:
+            values[field] = [
+                None if math.isnan(x) else int(x) if x.is_integer() else x
+                for x in column
+            ]
+        else:
+            values[field] = [None if math.isnan(x) else x for x in column]
+
+    return {
+        callsign: {x: y[i] for x, y in values.items()}
+        for i, callsign in enumerate(columns["callsign"])
+    }
+
+
+def aircraft_resp(encoding: str, columns: AircraftColumns, **data):
+    """
+    Returns the columns of aircraft properties, and any other data, in the given binary
+    encoding. For NPY, the other data is returned in the response headers
+    """
+    if encoding == NPY:
+        return responses.encoded_resp(to_npy(columns), NPY, npy_headers(data))
+    return responses.encoded_resp(to_msgpack({"aircraft": columns, **data}), MSGPACK)
+
+
+def concat_columns(all_columns: Sequence[AircraftColumns]) -> AircraftColumns:
+    """Joins the rows of multiple sets of columns, which have the same fields"""
+    if not all_columns:
+        return {}
+    data: AircraftColumns = {}
+    for field in all_columns[0]:
+        values = [x[field] for x in all_columns]
+        if isinstance(values[0], np.ndarray):
+            data[field] = np.concatenate(values)
+        else:
+            data[field] = [y for x in values for y in x]
+    return data
+
+
+def to_msgpack(data: Dict[str, Any]) -> bytes:
+    """
+    Packs the data, which may contain columns of aircraft properties. Any missing
+    values in the numeric columns are NaN
+    """
+    return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+def to_npy(columns: AircraftColumns) -> bytes:
+    """
+    Packs the columns into a numpy structured array, and returns it in the NPY format.
+    The string columns have the width of their longest value, and the numeric columns
+    are float64 with NaN for any missing values
+    """
+
+    dtype = []
+    for field, column in columns.items():
+        if isinstance(column, np.ndarray):
+            dtype.append((field, "f8"))
+        else:
+            width = max((len(x) for x in column if x), default=1)
+            dtype.append((field, f"U{width}"))
+
+    array = np.empty(len(next(iter(columns.values()), [])), dtype=dtype)
+    for field, column in columns.items():
+        if isinstance(column, np.ndarray):
+            array[field] = column
+        else:
+            array[field] = [x or "" for x in column]
+
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def npy_headers(data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Converts the data which is returned alongside an NPY array into response headers.
+    For example "snapshot_version" is returned as "X-Snapshot-Version"
+    """
+    headers = {}
+    for key, value in data.items():
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(x) for x in value)
+        name = "-".join(x.capitalize() for x in key.split("_"))
+        headers[f"X-{name}"] = "" if value is None else str(value)
+    return headers
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Can't pack {type(obj)}")
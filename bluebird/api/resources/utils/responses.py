@@ -44,6 +44,14 @@ def created_resp(data: Optional[Union[str, Dict]] = None):
     return _make_response_from_data(data, HTTPStatus.CREATED)
 
 
+def encoded_resp(data: bytes, mimetype: str, headers: Optional[Dict[str, str]] = None):
+    """Generates an OK response containing binary data of the given type"""
+    resp = make_response(data, HTTPStatus.OK)
+    resp.mimetype = mimetype
+    resp.headers.extend(headers or {})
+    return resp
+
+
 def bad_request_resp(msg: str):
     """
     Generates a standard BAD_REQUEST response with the given message
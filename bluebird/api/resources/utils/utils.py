@@ -2,20 +2,27 @@
 Contains utility functions for the API resources
 """
 import re
+from types import SimpleNamespace
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Union
 
 from flask import current_app
 from flask import Response
 from flask_restful import reqparse
+from werkzeug.exceptions import HTTPException
 
 import bluebird.api.resources.utils.responses as responses
 import bluebird.utils.types as types
 from bluebird.api.resources.utils.responses import bad_request_resp
+from bluebird.settings import Settings
 from bluebird.sim_proxy.sim_proxy import SimProxy
 from bluebird.utils.properties import AircraftProperties
+from bluebird.utils.properties import SimProperties
 
 
 # Name of the Flask config which contains the BlueBird instance
@@ -35,6 +42,33 @@ def parse_args(parser: reqparse.RequestParser) -> Dict[str, Any]:
     return dict(parser.parse_args(strict=True))
 
 
+def parse_json_args(
+    parser: reqparse.RequestParser, data: Mapping[str, Any]
+) -> Union[Dict[str, Any], str]:
+    """
+    Parse the arguments from a JSON object, rather than from the request. Returns an
+    error string if they are invalid
+    """
+
+    try:
+        return dict(parser.parse_args(req=SimpleNamespace(json=data), strict=True))
+    except HTTPException as exc:
+        message = getattr(exc, "data", {}).get("message")
+        if isinstance(message, dict):
+            return ", ".join(f"{x}: {y}" for x, y in message.items())
+        return exc.description
+
+
+def comma_separated(value: str) -> List[str]:
+    """Parses a comma-separated list argument. Can be used as a reqparse type"""
+    return [x.strip() for x in str(value).split(",") if x.strip()]
+
+
+def callsign_list(value: str) -> List[types.Callsign]:
+    """Parses a comma-separated list of callsigns. Can be used as a reqparse type"""
+    return [types.Callsign.canonical(x) for x in comma_separated(value)]
+
+
 def try_parse_lat_lon(args: dict) -> Union[types.LatLon, Response]:
     """Attempts to parse a LatLon from an argument dict"""
 
@@ -95,5 +129,41 @@ def convert_aircraft_props(props: AircraftProperties) -> Dict[str, Any]:
     data["requested_fl"] = (
         props.requested_flight_level.feet if props.requested_flight_level else None
     )
+    data["cleared_hdg"] = (
+        props.cleared_heading.degrees if props.cleared_heading else None
+    )
+    data["cleared_gs"] = (
+        props.cleared_ground_speed.meters_per_sec
+        if props.cleared_ground_speed
+        else None
+    )
+    data["cleared_vs"] = (
+        props.cleared_vertical_speed.feet_per_min
+        if props.cleared_vertical_speed
+        else None
+    )
 
     return {str(props.callsign): data}
+
+
+def convert_sim_props(
+    sim_props: SimProperties, callsigns: Iterable[types.Callsign]
+) -> Dict[str, Any]:
+    """
+    Parses a SimProperties object (and the current callsigns) into a dict suitable for
+    returning via Flask
+    """
+
+    return {
+        "callsigns": [str(x) for x in callsigns],
+        "dt": sim_props.dt,
+        "mode": Settings.SIM_MODE.name,
+        "scenario_name": sim_props.scenario_name,
+        "scenario_time": sim_props.scenario_time,
+        "sector_name": sim_props.sector_name,
+        "seed": sim_props.seed,
+        "sim_type": Settings.SIM_TYPE.name,
+        "speed": sim_props.speed,
+        "state": sim_props.state.name,
+        "utc_datetime": str(sim_props.utc_datetime),
+    }
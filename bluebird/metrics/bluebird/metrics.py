@@ -26,12 +26,12 @@ def pairwise_separation_metric(*args, **kwargs):
 
     aircraft_controls: ProxyAircraftControls = kwargs["aircraft_controls"]
 
-    props1 = aircraft_controls.properties(types.Callsign(args[0]))
+    props1 = aircraft_controls.properties(types.Callsign.canonical(args[0]))
     if not isinstance(props1, props.AircraftProperties):
         err_resp = f": {props1}" if props1 else ""
         raise ValueError(f"Could not get properties for {args[0]}{err_resp}")
 
-    props2 = aircraft_controls.properties(types.Callsign(args[1]))
+    props2 = aircraft_controls.properties(types.Callsign.canonical(args[1]))
     if not isinstance(props2, props.AircraftProperties):
         err_resp = f": {props2}" if props2 else ""
         raise ValueError(f"Could not get properties for {args[1]}{err_resp}")
@@ -54,7 +54,7 @@ def sector_exit_metric(*args, **kwargs):
     """
 
     assert len(args) == 1 and isinstance(args[0], str), "Expected 1 string argument"
-    callsign = types.Callsign(args[0])
+    callsign = types.Callsign.canonical(args[0])
 
     aircraft_controls: ProxyAircraftControls = kwargs["aircraft_controls"]
     simulator_controls: ProxySimulatorControls = kwargs["simulator_controls"]
@@ -95,7 +95,7 @@ def fuel_efficiency_metric(*args, **kwargs):
     """
 
     assert len(args) == 1 and isinstance(args[0], str), "Expected 1 string argument"
-    callsign = types.Callsign(args[0])
+    callsign = types.Callsign.canonical(args[0])
 
     aircraft_controls: ProxyAircraftControls = kwargs["aircraft_controls"]
 
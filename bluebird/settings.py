@@ -5,6 +5,8 @@ Default settings for the BlueBird app
 import logging
 import os
 from pathlib import Path
+from typing import Dict
+from typing import List
 
 from semver import VersionInfo
 
@@ -33,6 +35,18 @@ class Settings:
         PORT:               BlueBird (Flask) server port
         SIM_LOG_RATE:       Rate (in sim-seconds) at which aircraft data is logged to
                             the episode file
+        STEP_HISTORY_LEN:   Number of steps for which the aircraft properties are kept
+        SECTOR_CACHE_SIZE:  Max. size (in characters of GeoJSON) of the parsed sectors
+                            which are kept in memory
+        DELTA_HISTORY_LEN:  Number of snapshot versions for which the changed aircraft
+                            are kept (see GET /pos?since=<version>)
+        DELTA_DEADBANDS:    Min. changes in the aircraft properties which are reported
+                            as changes. Position is in degrees, altitude in feet,
+                            ground speed in m/s, heading in degrees, and vertical speed
+                            in feet/min
+        DEFER_COMMANDS:     In agent mode, queue the ALT, HDG, GSPD and DIRECT commands
+                            (and any vertical speed changes) and send them
+                            (coalesced) before the next step
         LOGS_ROOT:          Root directory for log files. Defaults to ./logs
         CONSOLE_LOG_LEVEL:  The min. log level for console messages
         SIM_HOST:           Hostname of the simulation server
@@ -40,6 +54,23 @@ class Settings:
         SIM_TYPE:           The simulator type
         BS_EVENT_PORT:      BlueSky event port
         BS_STREAM_PORT:     BlueSky stream port
+        BS_ASYNC_CLIENT:    Use the asyncio BlueSky client
+        BS_STREAM_TOPICS:   The BlueSky streams to subscribe to. 'ROUTEDATA' is also
+                            available
+        BS_STREAM_HWM:      Max. number of frames queued on the BlueSky stream socket.
+                            Newer frames are dropped while the queue is full
+        BS_STREAM_TIMEOUT:  Time (in seconds) without stream data after which the
+                            connection to BlueSky is considered lost
+        BS_CMD_TIMEOUT:     Max. time (in seconds) to wait for BlueSky to acknowledge a
+                            stack command
+        BS_STEP_TIMEOUT:    Max. time (in seconds) to wait for BlueSky to complete a
+                            step
+        BS_RESET_TIMEOUT:   Max. time (in seconds) to wait for BlueSky to confirm a
+                            reset or scenario load
+        BS_SCN_TIMEOUT:     Max. time (in seconds) to wait for BlueSky to confirm a
+                            scenario upload
+        BS_FRAME_TIMEOUT:   Max. time (in seconds) to wait for new aircraft data after
+                            creating an aircraft
         MC_PORT:            MachineCollege port
     """
 
@@ -51,6 +82,17 @@ class Settings:
     DATA_DIR = Path("data")
 
     SIM_LOG_RATE: float = 0.2
+    STEP_HISTORY_LEN: int = 100
+    SECTOR_CACHE_SIZE: int = 64 * 1024 * 1024
+    DELTA_HISTORY_LEN: int = 1000
+    DELTA_DEADBANDS: Dict[str, float] = {
+        "position": 0,
+        "altitude": 0,
+        "ground_speed": 0,
+        "heading": 0,
+        "vertical_speed": 0,
+    }
+    DEFER_COMMANDS: bool = False
     LOGS_ROOT: str = Path(os.getenv("BB_LOGS_ROOT", "logs"))
     CONSOLE_LOG_LEVEL: int = logging.DEBUG
 
@@ -61,7 +103,15 @@ class Settings:
     # BlueSky settings
     BS_EVENT_PORT: int = 9000
     BS_STREAM_PORT: int = 9001
+    BS_ASYNC_CLIENT: bool = False
+    BS_STREAM_TOPICS: List[str] = ["ACDATA", "SIMINFO"]
+    BS_STREAM_HWM: int = 10
     BS_STREAM_TIMEOUT: int = 5
+    BS_CMD_TIMEOUT: float = 0.5
+    BS_STEP_TIMEOUT: float = 5
+    BS_RESET_TIMEOUT: float = 2
+    BS_SCN_TIMEOUT: float = 2
+    BS_FRAME_TIMEOUT: float = 1
 
     # MachColl settings
     MC_PORT: int = 5321
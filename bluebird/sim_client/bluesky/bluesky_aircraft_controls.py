@@ -4,16 +4,20 @@ Contains the AbstractAircraftControls implementation for BlueSky
 import logging
 import re
 import traceback
+from collections import abc
+from typing import Any
 from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Union
 
 import bluebird.utils.properties as props
 import bluebird.utils.types as types
+from bluebird.settings import Settings
 from bluebird.utils.abstract_aircraft_controls import AbstractAircraftControls
+from bluebird.utils.aircraft_table import AircraftTable
 from bluebird.utils.units import KTS_PER_MS
-from bluebird.utils.units import METERS_PER_FOOT
 
 
 _ROUTE_RE = re.compile(r"^(\*?)(\w*):((?:-|.)*)/((?:-|\d)*)$")
@@ -25,14 +29,23 @@ class BlueSkyAircraftControls(AbstractAircraftControls):
     @property
     def all_properties(
         self,
-    ) -> Union[Dict[types.Callsign, props.AircraftProperties], str]:
-        data = self._bluesky_client.aircraft_stream_data
-        return self._convert_to_ac_props(data)
+    ) -> Union[Mapping[types.Callsign, props.AircraftProperties], str]:
+        frame = self._bluesky_client.aircraft_stream_frame
+        if frame.seq != self._ac_props_seq:
+            self._ac_props_cache = self._convert_to_ac_props(frame.data)
+            self._ac_props_seq = frame.seq
+            if isinstance(self._ac_props_cache, AircraftTable):
+                # Release the callsigns of any aircraft which have been removed
+                if self._last_table is not None:
+                    removed = self._last_table.ids - self._ac_props_cache.ids
+                    types.Callsign.release(removed)
+                self._last_table = self._ac_props_cache
+        return self._ac_props_cache
 
     @property
     def callsigns(self) -> Union[List[types.Callsign], str]:
         all_props = self.all_properties
-        return all_props if isinstance(all_props, str) else all_props.keys()
+        return all_props if isinstance(all_props, str) else list(all_props)
 
     def __init__(self, bluesky_client):
         self._bluesky_client = bluesky_client
@@ -40,43 +53,42 @@ class BlueSkyAircraftControls(AbstractAircraftControls):
         # TODO(RKM 2019-11-21) Make private and refactor tests
         # self.ac_props: Dict[types.Callsign, Optional[props.AircraftProperties]] = {}
         self.ac_routes: Dict[types.Callsign, props.AircraftRoute] = {}
+        # The properties converted from the last ACDATA frame, keyed by its seq number
+        self._ac_props_seq: Optional[int] = None
+        self._ac_props_cache: Union[AircraftTable, str] = {}
+        self._last_table: Optional[AircraftTable] = None
         # TODO(RKM 2019-11-21) For sandbox mode, need to set-up a timer which clears the
         # cache(s) every n sim-seconds
 
     def set_cleared_fl(
         self, callsign: types.Callsign, flight_level: types.Altitude, **kwargs
     ) -> Optional[str]:
-
-        vspd = kwargs.get("vspd")
-        if kwargs.get("vspd") is None:
-            vspd = ""
-        cmd_str = f"ALT {callsign} {flight_level} {vspd}".strip()
+        cmd_str = self._set_cleared_fl_cmd(callsign, flight_level, **kwargs)
         # TODO This can also return list (multiple errors?)
         return self._tmp_stack_cmd_handle_list(cmd_str)
 
     def set_heading(
         self, callsign: types.Callsign, heading: types.Heading
     ) -> Optional[str]:
-        cmd_str = f"HDG {callsign} {heading}"
+        cmd_str = self._set_heading_cmd(callsign, heading)
         return self._tmp_stack_cmd_handle_list(cmd_str)
 
     def set_ground_speed(
         self, callsign: types.Callsign, ground_speed: types.GroundSpeed
     ):
-        cmd_str = f"SPD {callsign} {ground_speed}"
+        cmd_str = self._set_ground_speed_cmd(callsign, ground_speed)
         return self._tmp_stack_cmd_handle_list(cmd_str)
 
     def set_vertical_speed(
         self, callsign: types.Callsign, vertical_speed: types.VerticalSpeed
     ):
-        # TODO Correct unit conversion for BlueSky
-        cmd_str = f"VS {callsign} {vertical_speed}"
+        cmd_str = self._set_vertical_speed_cmd(callsign, vertical_speed)
         return self._tmp_stack_cmd_handle_list(cmd_str)
 
     def direct_to_waypoint(
         self, callsign: types.Callsign, waypoint: str
     ) -> Optional[str]:
-        cmd_str = f"DIRECT {callsign} {waypoint}"
+        cmd_str = self._direct_to_waypoint_cmd(callsign, waypoint)
         return self._tmp_stack_cmd_handle_list(cmd_str)
 
     def create(
@@ -88,59 +100,117 @@ class BlueSkyAircraftControls(AbstractAircraftControls):
         altitude: types.Altitude,
         gspd: types.GroundSpeed,
     ) -> Optional[str]:
-        gspd_kts = gspd.meters_per_sec * KTS_PER_MS
-        cmd_str = f"CRE {callsign} {ac_type} {position} {heading} {altitude} {gspd_kts}"
+        cmd_str = self._create_cmd(callsign, ac_type, position, heading, altitude, gspd)
         err = self._bluesky_client.send_stack_cmd(cmd_str)
         if err:
             return err
+        self._await_new_frame()
         # TODO(RKM 2019-11-21) BlueSky currently accepts any string as the aircraft type
         # and doesn't return an error (although it logs it to its own console). We could
         # better handle this by pre-fetching a list of supported aircraft types, then
         # checking against it during any CRE request
         return None
 
+    def batch(self, commands: List[props.AircraftCommand]) -> List[Optional[str]]:
+        """
+        Sends multiple aircraft commands to BlueSky in a single event. Returns the
+        result of each command - either None or an error string
+        """
+        results: List[Optional[str]] = [None] * len(commands)
+        cmd_strs: List[str] = []
+        idxs: List[int] = []
+        for idx, command in enumerate(commands):
+            builder = getattr(self, f"_{command.name}_cmd", None)
+            if not builder:
+                results[idx] = f"Unsupported command {command.name}"
+                continue
+            try:
+                cmd_strs.append(builder(*command.args, **command.kwargs))
+            except Exception as exc:
+                results[idx] = f"Invalid arguments for {command.name}: {exc}"
+                continue
+            idxs.append(idx)
+        for idx, err in zip(idxs, self._bluesky_client.send_stack_cmds(cmd_strs)):
+            results[idx] = err
+        if any(x.name == "create" and not y for x, y in zip(commands, results)):
+            self._await_new_frame()
+        return results
+
     def properties(
         self, callsign: types.Callsign
     ) -> Optional[Union[props.AircraftProperties, str]]:
         all_props = self.all_properties
-        if not isinstance(all_props, dict):
+        if not isinstance(all_props, abc.Mapping):
             return all_props
-        return all_props[callsign]
+        return all_props.get(callsign)
 
     def exists(self, callsign: types.Callsign) -> Union[bool, str]:
-        all_callsings = self.callsigns
-        return (
-            bool(callsign in all_callsings)
-            if isinstance(all_callsings, list)
-            else all_callsings
-        )
-
-    def _convert_to_ac_props(
-        self, data: dict,
-    ) -> Union[Dict[types.Callsign, props.AircraftProperties], str]:
-        ac_props = {}
+        all_props = self.all_properties
+        if not isinstance(all_props, abc.Mapping):
+            return all_props
+        return callsign in all_props
+
+    def _await_new_frame(self) -> None:
+        """
+        Waits for the next ACDATA frame after creating aircraft. BlueSky has processed
+        the commands once they are acknowledged, but the current frame may have been
+        sent before then so may not contain the new aircraft
+        """
+        seq = self._bluesky_client.aircraft_stream_frame.seq
+        if not self._bluesky_client.wait_for_aircraft_frame(
+            seq, Settings.BS_FRAME_TIMEOUT
+        ):
+            self._logger.warning("No new aircraft data received after create")
+
+    @staticmethod
+    def _convert_to_ac_props(data: Mapping[str, Any]) -> Union[AircraftTable, str]:
         try:
-            for i in range(len(data["id"])):
-                callsign = types.Callsign(data["id"][i])
-                ac_props[callsign] = props.AircraftProperties(
-                    aircraft_type=data["actype"][i],
-                    altitude=types.Altitude(data["alt"][i] / METERS_PER_FOOT),
-                    callsign=callsign,
-                    cleared_flight_level=None,
-                    ground_speed=types.GroundSpeed(int(data["gs"][i])),
-                    heading=types.Heading(int(data["trk"][i])),
-                    initial_flight_level=None,
-                    position=types.LatLon(data["lat"][i], data["lon"][i]),
-                    requested_flight_level=None,
-                    route_name=None,
-                    vertical_speed=types.VerticalSpeed(
-                        int(data["vs"][i] * 60 / METERS_PER_FOOT)
-                    ),
-                )
-            return ac_props
+            return AircraftTable(data)
         except Exception:
             return f"Error parsing ac data from stream: {traceback.format_exc()}"
 
+    @staticmethod
+    def _set_cleared_fl_cmd(
+        callsign: types.Callsign, flight_level: types.Altitude, **kwargs
+    ) -> str:
+        vspd = kwargs.get("vspd")
+        if kwargs.get("vspd") is None:
+            vspd = ""
+        return f"ALT {callsign} {flight_level} {vspd}".strip()
+
+    @staticmethod
+    def _set_heading_cmd(callsign: types.Callsign, heading: types.Heading) -> str:
+        return f"HDG {callsign} {heading}"
+
+    @staticmethod
+    def _set_ground_speed_cmd(
+        callsign: types.Callsign, ground_speed: types.GroundSpeed
+    ) -> str:
+        return f"SPD {callsign} {ground_speed}"
+
+    @staticmethod
+    def _set_vertical_speed_cmd(
+        callsign: types.Callsign, vertical_speed: types.VerticalSpeed
+    ) -> str:
+        # TODO Correct unit conversion for BlueSky
+        return f"VS {callsign} {vertical_speed}"
+
+    @staticmethod
+    def _direct_to_waypoint_cmd(callsign: types.Callsign, waypoint: str) -> str:
+        return f"DIRECT {callsign} {waypoint}"
+
+    @staticmethod
+    def _create_cmd(
+        callsign: types.Callsign,
+        ac_type: str,
+        position: types.LatLon,
+        heading: types.Heading,
+        altitude: types.Altitude,
+        gspd: types.GroundSpeed,
+    ) -> str:
+        gspd_kts = gspd.meters_per_sec * KTS_PER_MS
+        return f"CRE {callsign} {ac_type} {position} {heading} {altitude} {gspd_kts}"
+
     def _tmp_stack_cmd_handle_list(
         self, cmd_str: str, resp_expected: bool = False
     ) -> Optional[str]:
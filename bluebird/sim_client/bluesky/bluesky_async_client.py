@@ -0,0 +1,373 @@
+"""
+Contains the asyncio implementation of the BlueSky client
+"""
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+from typing import Awaitable
+from typing import Deque
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import zmq.asyncio
+
+from bluebird.settings import Settings
+from bluebird.sim_client.bluesky.bluesky_client import _PendingCommands
+from bluebird.sim_client.bluesky.bluesky_client import ACK_MARKER
+from bluebird.sim_client.bluesky.bluesky_client import BlueSkyClient
+from bluebird.sim_client.bluesky.bluesky_client import CmdResponses
+from bluebird.sim_client.bluesky.bluesky_client import IO_POLL_TIMEOUT
+from bluebird.sim_client.bluesky.bluesky_client import IO_THREAD_ERR
+from bluebird.sim_client.bluesky.bluesky_client import QUIT_TIMEOUT
+from bluebird.utils.timer import Timer
+from bluebird.utils.timeutils import timeit
+
+
+# Error returned by the blocking methods if the event loop is not running
+LOOP_ERR = "The BlueSky client's event loop is not running"
+
+
+class _FutureEvent:
+    """
+    Replacement for the threading.Events used by BlueSkyClient, which can be awaited
+    from the client's event loop. Must only be used from the loop thread
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._flag = False
+        self._waiters: List[asyncio.Future] = []
+
+    def is_set(self) -> bool:
+        return self._flag
+
+    def set(self) -> None:
+        self._flag = True
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(True)
+        self._waiters.clear()
+
+    def clear(self) -> None:
+        self._flag = False
+
+    async def wait(self, timeout: float) -> bool:
+        """Waits until the event is set. Returns False if the timeout elapsed first"""
+        if self._flag:
+            return True
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+
+class AsyncBlueSkyClient(BlueSkyClient):
+    """
+    BlueSky client which runs an asyncio event loop in its I/O thread. Multiple
+    commands can be in-flight at once, rather than being serialised as in
+    BlueSkyClient.
+
+    The blocking methods of BlueSkyClient are the supported interface for the rest of
+    BlueBird, since the API is served from (WSGI) request threads. Each request thread
+    only blocks on its own command, while the waiting is done on the loop. Each command
+    also has an awaitable (*_async) version for callers which run on the client's loop,
+    e.g. by using submit(). The loop is closed when the client is stopped, after which
+    the blocking methods return an error
+    """
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The client's event loop"""
+        return self._loop
+
+    def __init__(self):
+        super().__init__()
+        self._loop = asyncio.new_event_loop()
+        self.timer = Timer(self._run_loop, None)
+        self._io_task: Optional[asyncio.Task] = None
+        self._reset_event = _FutureEvent(self._loop)
+        self._step_event = _FutureEvent(self._loop)
+        self._scn_event = _FutureEvent(self._loop)
+        self._quit_event = _FutureEvent(self._loop)
+        # Batches of stack commands which are waiting for their acks, in the order they
+        # were sent
+        self._pending_queue: Deque[
+            Tuple[_PendingCommands, asyncio.Future]
+        ] = collections.deque()
+
+    def stop(self):
+        # NOTE(rkm 2020-06-05) The task must be cancelled first, since super().stop()
+        # waits for the I/O thread to exit
+        self._stopping = True
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._cancel_io_task)
+        super().stop()
+        # NOTE(rkm 2020-06-22) The loop is normally closed by the I/O thread as it exits
+        if not self._loop.is_running() and not self._loop.is_closed():
+            self._loop.close()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedules a coroutine on the client's event loop, from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _queue_event(self, name, data, target) -> Optional[str]:
+        try:
+            self._loop.call_soon_threadsafe(self._send_event_now, name, data, target)
+        except RuntimeError:
+            # The loop has been closed
+            return IO_THREAD_ERR
+        return None
+
+    def _wake_io_thread(self) -> None:
+        # NOTE(rkm 2020-06-08) Not used, since events are passed to the loop directly
+        pass
+
+    # Awaitable commands
+
+    async def send_stack_cmd_async(
+        self, data=None, response_expected=False, target=b"*"
+    ):
+        """Awaitable version of send_stack_cmd"""
+        start = time.perf_counter()
+        echo_data = (await self._send_and_await_async([data], target))[0]
+        self.cmd_latencies.record(self._cmd_name(data), time.perf_counter() - start)
+        return self._parse_echo_data(data, echo_data, response_expected)
+
+    async def send_stack_cmds_async(
+        self, cmds: List[str], target=b"*"
+    ) -> List[Optional[str]]:
+        """Awaitable version of send_stack_cmds"""
+        results, valid_cmds = self._check_cmds(cmds)
+        if not valid_cmds:
+            return results
+        start = time.perf_counter()
+        responses = await self._send_and_await_async(valid_cmds, target)
+        self.cmd_latencies.record("BATCH", time.perf_counter() - start)
+        return self._merge_responses(cmds, results, responses)
+
+    async def upload_new_scenario_async(
+        self, name: str, lines: List[str]
+    ) -> Optional[str]:
+        """Awaitable version of upload_new_scenario"""
+        err = self._send_scenario(name, lines)
+        if err:
+            return err
+        await self._scn_event.wait(Settings.BS_SCN_TIMEOUT)
+        return self._parse_scn_response()
+
+    async def load_scenario_async(self, filename, start_paused=False) -> Optional[str]:
+        """Awaitable version of load_scenario"""
+        err = await self._send_reset_cmd_async("IC " + filename)
+        if err:
+            return err
+        if start_paused:
+            return await self.send_stack_cmd_async("HOLD")
+        return None
+
+    async def step_async(self) -> Optional[str]:
+        """Awaitable version of step"""
+        start = self._send_step()
+        if isinstance(start, str):
+            return start
+        completed = await self._step_event.wait(Settings.BS_STEP_TIMEOUT)
+        return self._finish_step(start, completed)
+
+    async def reset_sim_async(self) -> Optional[str]:
+        """Awaitable version of reset_sim"""
+        return await self._send_reset_cmd_async("RESET")
+
+    async def quit_async(self) -> bool:
+        """Awaitable version of quit"""
+        self._awaiting_exit_resp = True
+        self._quit_event.clear()
+        if self.send_event(b"QUIT", target=b"*"):
+            self._awaiting_exit_resp = False
+            return False
+        return await self._quit_event.wait(QUIT_TIMEOUT)
+
+    # Blocking versions of the commands
+
+    def send_stack_cmd(self, data=None, response_expected=False, target=b"*"):
+        return self._run(self.send_stack_cmd_async(data, response_expected, target))
+
+    def send_stack_cmds(self, cmds: List[str], target=b"*") -> List[Optional[str]]:
+        return self._run(self.send_stack_cmds_async(cmds, target))
+
+    @timeit("AsyncBlueSkyClient")
+    def upload_new_scenario(self, name: str, lines: List[str]):
+        return self._run(self.upload_new_scenario_async(name, lines))
+
+    def load_scenario(self, filename, start_paused=False) -> Optional[str]:
+        return self._run(self.load_scenario_async(filename, start_paused))
+
+    def step(self) -> Optional[str]:
+        return self._run(self.step_async())
+
+    def reset_sim(self) -> Optional[str]:
+        return self._run(self.reset_sim_async())
+
+    def quit(self):
+        return self._run(self.quit_async()) is True
+
+    def _run(self, coro):
+        """
+        Runs the coroutine on the event loop, and blocks until it completes. Returns an
+        error if the loop is not running, or if it exits before the coroutine completes
+        """
+        if self._io_thread_ident == threading.get_ident():
+            coro.close()
+            raise RuntimeError(
+                "Blocking calls must be made from outside the event loop"
+            )
+        if not self._loop.is_running():
+            coro.close()
+            return LOOP_ERR
+        try:
+            future = self.submit(coro)
+        except RuntimeError:
+            # The loop was closed after the check above
+            coro.close()
+            return LOOP_ERR
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            return LOOP_ERR
+
+    async def _send_and_await_async(
+        self, cmds: List[str], target, ends_on_reset: bool = False
+    ) -> List[CmdResponses]:
+        """Awaitable version of _send_and_await"""
+
+        pending, data = self._new_pending_cmds(cmds, ends_on_reset)
+        entry = (pending, self._loop.create_future())
+        self._pending_queue.append(entry)
+        err = self.send_event(b"STACKCMD", data, target)
+        if err:
+            self._pending_queue.remove(entry)
+            return [err for _ in cmds]
+        try:
+            await asyncio.wait_for(entry[1], Settings.BS_CMD_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._logger.warning(f"No acknowledgement received for {cmds}")
+        finally:
+            if entry in self._pending_queue:
+                self._pending_queue.remove(entry)
+        return pending.results(cmds)
+
+    async def _send_reset_cmd_async(self, cmd: str) -> Optional[str]:
+        """Awaitable version of _send_reset_cmd"""
+
+        start = time.perf_counter()
+        self._reset_event.clear()
+
+        echo_data = (await self._send_and_await_async([cmd], b"*", True))[0]
+        err = self._parse_echo_data(cmd, echo_data)
+        if err:
+            return err
+
+        remaining = Settings.BS_RESET_TIMEOUT - (time.perf_counter() - start)
+        completed = await self._reset_event.wait(max(remaining, 0))
+        return self._finish_reset(cmd, start, completed)
+
+    # Event loop
+
+    def _run_loop(self) -> None:
+        """
+        Body of the I/O thread. Runs the event loop until the client is stopped or the
+        connection is lost, then closes it
+        """
+        if self._stopping or self._loop.is_closed():
+            return
+        asyncio.set_event_loop(self._loop)
+        self._io_thread_ident = threading.get_ident()
+        self._io_task = self._loop.create_task(self._io_loop_async())
+        try:
+            self._loop.run_until_complete(self._io_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._close_loop()
+
+    def _close_loop(self) -> None:
+        """
+        Cancels any remaining tasks (e.g. commands from the blocking methods which are
+        still awaiting their responses), then closes the loop
+        """
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self._loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        self._loop.close()
+
+    def _cancel_io_task(self) -> None:
+        if self._io_task:
+            self._io_task.cancel()
+
+    async def _io_loop_async(self) -> None:
+        """Receives and processes all messages from BlueSky"""
+
+        # NOTE(rkm 2020-06-05) The shadow sockets must be created in the loop thread.
+        # The original sockets are still used to send and to drain received messages,
+        # which is fine since everything now happens in this thread
+        event_io = zmq.asyncio.Socket.shadow(self.event_io.underlying)
+        stream_in = zmq.asyncio.Socket.shadow(self.stream_in.underlying)
+        poller = zmq.asyncio.Poller()
+        poller.register(event_io, zmq.POLLIN)
+        poller.register(stream_in, zmq.POLLIN)
+
+        while True:
+            socks = dict(await poller.poll(IO_POLL_TIMEOUT))
+            self._handle_ready(
+                socks.get(event_io) == zmq.POLLIN, socks.get(stream_in) == zmq.POLLIN
+            )
+
+    def _process_event(self, eventname, pydata):
+        if eventname == b"ECHO" and self._pending_queue:
+            text = pydata["text"]
+            if not text.startswith(("Unknown command: METRICS", "IC: Opened")):
+                self._handle_echo(text)
+                return
+
+        super()._process_event(eventname, pydata)
+
+        if eventname == b"RESET":
+            for entry in list(self._pending_queue):
+                if entry[0].ends_on_reset:
+                    self._complete(entry)
+
+    def _handle_echo(self, text: str) -> None:
+        """Passes ECHO text to the pending command batches"""
+
+        if text.startswith(ACK_MARKER):
+            idx = next(
+                (i for i, x in enumerate(self._pending_queue) if text in x[0].acks),
+                None,
+            )
+            if idx is None:
+                return
+            # BlueSky processes the stack in order, so any batches sent before the one
+            # this ack belongs to must have lost their own acks (e.g. if the stack was
+            # cleared)
+            for _ in range(idx):
+                self._complete(self._pending_queue[0])
+
+        entry = self._pending_queue[0]
+        entry[0].add_echo(text)
+        if entry[0].complete:
+            self._complete(entry)
+
+    def _complete(self, entry: Tuple[_PendingCommands, asyncio.Future]) -> None:
+        self._pending_queue.remove(entry)
+        if not entry[1].done():
+            entry[1].set_result(None)
@@ -2,22 +2,28 @@
 Contains the BlueSky client class
 """
 # TODO(RKM 2019-11-21) Check all the proxy layer comments
+import itertools
 import json
 import logging
 import os
+import queue
 import sys
+import threading
 import time
-from copy import deepcopy
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
-from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 import msgpack
+import numpy as np
 import zmq
 
 from bluebird.settings import Settings
+from bluebird.utils.latency import LatencyRecorder
 from bluebird.utils.timer import Timer
 from bluebird.utils.timeutils import timeit
 
@@ -39,11 +45,15 @@ from bluesky.network.npcodec import decode_ndarray  # noqa: E402
 
 CMD_LOG_PREFIX = "C"
 
-# The BlueSky streams we subscribe to. 'ROUTEDATA' is also available
-ACTIVE_NODE_TOPICS = [b"ACDATA", b"SIMINFO", b"ROUTEDATA"]
+# Maximum time the I/O thread blocks waiting for messages. This bounds how long it
+# takes to notice a stream timeout or a request to stop
+IO_POLL_TIMEOUT = 100  # ms
 
-# Same rate as GuiClient polls for its data
-POLL_RATE = 50  # Hz
+# Maximum time to wait for the QUIT response
+QUIT_TIMEOUT = 1  # s
+
+# Error returned when an event can't be sent since the I/O thread has exited
+IO_THREAD_ERR = "Can't send events: the BlueSky client's I/O thread is not running"
 
 # Events which should be ignored
 IGNORED_EVENTS = [b"DEFWPT", b"DISPLAYFLAG", b"PANZOOM", b"SHAPE"]
@@ -51,37 +61,204 @@ IGNORED_EVENTS = [b"DEFWPT", b"DISPLAYFLAG", b"PANZOOM", b"SHAPE"]
 # Tuple of strings which should not be considered error responses from BlueSky
 IGNORED_RESPONSES = ("TIME", "DEFWPT", "AREA", "BlueSky Console Window")
 
+# Prefix of the text which is echoed back after each stack command. BlueSky processes
+# the stack in order, so receiving the echo means that any responses to the command
+# itself have already been received
+ACK_MARKER = "BBACK"
+
+# The responses to a stack command, or an error if the command was not acknowledged
+CmdResponses = Union[List[str], str]
+
+
+class _PendingCommands:
+    """
+    Collects the ECHO responses for a batch of stack commands. Each command is followed
+    by its own ack marker, so any text received before the n-th marker is a response to
+    the n-th command
+    """
+
+    def __init__(self, acks: List[str], ends_on_reset: bool = False):
+        self.acks = acks
+        # If set, then the commands are also considered complete when the sim is reset.
+        # BlueSky clears its stack on reset, so the ack marker(s) may never be echoed
+        self.ends_on_reset = ends_on_reset
+        self.responses: List[List[str]] = [[] for _ in acks]
+        self.acked = threading.Event()
+        self._idx = 0
+
+    @property
+    def complete(self) -> bool:
+        """Whether all the ack markers have been received"""
+        return self._idx == len(self.acks)
+
+    def results(self, cmds: List[str]) -> List[CmdResponses]:
+        """
+        Returns the responses received for each command, or an error for each command
+        which was not acknowledged. If ends_on_reset is set, then the responses are
+        always returned, since the sim may have been reset before the acks were sent
+        """
+        if self.ends_on_reset:
+            return self.responses
+        n_acked = self._idx
+        return [
+            resp if idx < n_acked else f"No acknowledgement received for {cmd}"
+            for idx, (cmd, resp) in enumerate(zip(cmds, self.responses))
+        ]
+
+    def add_echo(self, text: str) -> None:
+        """Handle an ECHO text received while the commands are pending"""
+        if self._idx == len(self.acks):
+            return
+        if text.startswith(ACK_MARKER):
+            if text == self.acks[self._idx]:
+                self._idx += 1
+                if self._idx == len(self.acks):
+                    self.acked.set()
+            return
+        self.responses[self._idx].append(text)
+
+
+class StreamFrame:
+    """
+    A read-only frame of data received from a BlueSky stream. The seq number increases
+    with each frame received, so can be used to check if the data has changed. Frames
+    can be created from the raw msgpack bytes, in which case they are only decoded when
+    the data is first accessed
+    """
+
+    __slots__ = ("seq", "time", "_data", "_raw", "_lock")
+
+    @property
+    def data(self) -> Any:
+        """The (read-only) frame data"""
+        if self._raw is not None:
+            with self._lock:
+                if self._raw is not None:
+                    self._data = _freeze(
+                        msgpack.unpackb(
+                            self._raw, object_hook=decode_ndarray, raw=False
+                        )
+                    )
+                    self._raw = None
+        return self._data
+
+    def __init__(self, seq: int, time: float, data: Any = None, raw: bytes = None):
+        """
+        :param seq: The sequence number of the frame
+        :param time: Wall-clock time the frame was received
+        :param data: The decoded frame data
+        :param raw: The raw frame data. Overrides data if set
+        """
+        self.seq = seq
+        self.time = time
+        self._data = data
+        self._raw = raw
+        self._lock = threading.Lock()
+
+
+def _freeze(data: Any) -> Any:
+    """
+    Converts the decoded stream data into a read-only form. Numpy arrays are marked as
+    non-writeable rather than copied
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(_freeze(x) for x in data)
+    if isinstance(data, np.ndarray):
+        data.flags.writeable = False
+    return data
+
 
 class BlueSkyClient(Client):
     """Client class for the BlueSky simulator"""
 
+    @property
+    def aircraft_stream_frame(self) -> StreamFrame:
+        """The latest ACDATA frame"""
+        return self._aircraft_frame
+
+    @property
+    def sim_info_stream_frame(self) -> StreamFrame:
+        """The latest SIMINFO frame"""
+        return self._sim_info_frame
+
+    @property
+    def route_stream_frame(self) -> StreamFrame:
+        """The latest ROUTEDATA frame. Only received if subscribed to in settings"""
+        return self._route_frame
+
     @property
     def aircraft_stream_data(self):
-        return deepcopy(self._aircraft_stream_data)
+        return self._aircraft_frame.data
 
     @property
     def sim_info_stream_data(self):
-        return deepcopy(self._sim_info_data)
+        return self._sim_info_frame.data
 
     def __init__(self):
-        super().__init__(ACTIVE_NODE_TOPICS)
+        super().__init__([x.encode() for x in Settings.BS_STREAM_TOPICS])
+        # NOTE(rkm 2020-06-04) ZMQ_CONFLATE can't be used since the streams are sent as
+        # multipart messages. Conflation is instead done in _handle_ready, which drains
+        # the queue and only keeps the latest frame of each topic. The HWM just bounds
+        # the queue size - when it is full, ZMQ drops the *newest* frames
+        self.stream_in.setsockopt(zmq.RCVHWM, Settings.BS_STREAM_HWM)
         self._logger = logging.getLogger(__name__)
-        self._aircraft_stream_data = {}
-        self._sim_info_data: List = []
-        self._route_data: Dict[str, Any] = {}
-
-        # Continually poll for the sim state
-        self.timer = Timer(self.receive, POLL_RATE)
+        # NOTE(rkm 2020-06-03) The frames are replaced (never modified) by the I/O
+        # thread, so readers can hold a reference to them without copying
+        self._frame_seq = itertools.count(1)
+        self._aircraft_frame = StreamFrame(0, 0.0, _freeze({}))
+        # Notified when a new ACDATA frame is received
+        self._aircraft_frame_cond = threading.Condition()
+        self._sim_info_frame = StreamFrame(0, 0.0, _freeze([]))
+        self._route_frame = StreamFrame(0, 0.0, _freeze({}))
+
+        # Dedicated I/O thread which blocks until there are messages to process
+        self.timer = Timer(self._io_loop, None)
+        # NOTE(rkm 2020-06-22) Set before the timer is started, so that no events are
+        # sent directly once the I/O thread may be using the sockets. Any events sent
+        # before the thread has run are queued until it does
+        self._io_started = False
+        self._io_thread_ident: Optional[int] = None
+        self._stopping = False
+
+        # NOTE(rkm 2020-06-02) ZMQ sockets are not thread-safe, so once the I/O thread
+        # is running, all events are sent from it. Other threads queue their events
+        # then wake the I/O thread via the inproc socket pair
+        self._send_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake_lock = threading.Lock()
+        wake_addr = f"inproc://bluesky-client-wake-{id(self)}"
+        ctx = zmq.Context.instance()
+        self._wake_recv = ctx.socket(zmq.PAIR)
+        self._wake_recv.bind(wake_addr)
+        self._wake_send = ctx.socket(zmq.PAIR)
+        self._wake_send.connect(wake_addr)
+        self.poller.register(self._wake_recv, zmq.POLLIN)
 
         # self.seed = None
         # self.step_dt = 1
 
         self._have_connection = False
-        self._reset_flag = False
-        self._step_flag = False
-        self._echo_data = []
+        # Set by the I/O thread when the corresponding event is received
+        self._reset_event = threading.Event()
+        self._step_event = threading.Event()
+        self._scn_event = threading.Event()
+        self._quit_event = threading.Event()
+        # Stack commands are serialised so that ECHO responses can be matched to them
+        self._cmd_lock = threading.Lock()
+        self._cmd_ids = itertools.count()
+        self._pending_cmds: Optional[_PendingCommands] = None
+        self.cmd_latencies = LatencyRecorder()
         self._scn_response = None
         self._awaiting_exit_resp = False
+        # State of the current (or last) step. See step()
+        self._step_init_t: Optional[float] = None
+        self._step_sent_at: Optional[float] = None
+        self._step_awaiting_frame = False
+        self._step_in_flight = False
+        # The number of STEP replies still to come from steps which timed out
+        self._stale_step_replies = 0
+        self._step_lock = threading.Lock()
         self._last_stream_time = None
 
     def connect(self, *args, **kwargs):
@@ -97,50 +274,223 @@ class BlueSkyClient(Client):
 
     def start_timers(self) -> List[Timer]:
         """Start the client timer"""
+        self._io_started = True
         self.timer.start()
         return [self.timer]
 
     def stop(self):
         """Stop polling for the stream data"""
+        # NOTE(rkm 2020-06-08) Wake the I/O thread first, otherwise Timer.stop() has to
+        # wait for the poll to time out
+        self._stopping = True
+        self._wake_io_thread()
         self.timer.stop()
+        with self._wake_lock:
+            self._wake_send.close(linger=0)
+            self._wake_recv.close(linger=0)
+        for name, histogram in self.cmd_latencies:
+            self._logger.info(f"Latency {name}: {histogram.summary()}")
         # TODO(RKM 2019-11-21) Proxy layer should handle this
         # bluebird.logging.close_episode_log("client was stopped")
 
+    def send_event(self, name, data=None, target=None) -> Optional[str]:
+        """
+        Sends an event to BlueSky. Once the I/O thread has been started, the event is
+        passed to it to be sent. Returns an error if the I/O thread has exited
+        """
+        if not self._io_started or self._io_thread_ident == threading.get_ident():
+            self._send_event_now(name, data, target)
+            return None
+        if self._stopping or self.timer.exited:
+            self._logger.warning(f"I/O thread is not running. Dropped {name} event")
+            return IO_THREAD_ERR
+        return self._queue_event(name, data, target)
+
+    def _queue_event(self, name, data, target) -> Optional[str]:
+        """Passes an event to the I/O thread to be sent"""
+        self._send_queue.put((name, data, target))
+        self._wake_io_thread()
+        return None
+
+    def _wake_io_thread(self) -> None:
+        with self._wake_lock:
+            if self._wake_send.closed:
+                return
+            try:
+                self._wake_send.send(b"", zmq.NOBLOCK)
+            except zmq.Again:
+                # The I/O thread already has a wakeup pending
+                pass
+
+    def _flush_send_queue(self) -> None:
+        while True:
+            try:
+                name, data, target = self._send_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._send_event_now(name, data, target)
+
+    def _send_event_now(self, name, data, target) -> None:
+        if name == b"STEP":
+            self._step_sent_at = time.perf_counter()
+        super().send_event(name, data, target)
+
+    def _io_loop(self) -> None:
+        """
+        Body of the I/O thread. Blocks until there are events to send or messages to
+        receive, then processes all of them
+        """
+        self._io_thread_ident = threading.get_ident()
+        if not self._stopping:
+            self.receive(IO_POLL_TIMEOUT)
+
     def stream(self, name, data, sender_id):
-        """Method called to process data received on a stream"""
+        """Method called to process (decoded) data received on a stream"""
+        frame = StreamFrame(next(self._frame_seq), time.time(), _freeze(data))
+        self._store_frame(name, frame)
+
+    def _receive_stream(self, name: bytes, raw: bytes) -> None:
+        """Stores the raw data received on a stream. Decoding is deferred"""
+        frame = StreamFrame(next(self._frame_seq), time.time(), raw=raw)
+        self._store_frame(name, frame)
+
+    def _store_frame(self, name: bytes, frame: StreamFrame) -> None:
         if name == b"ACDATA":
-            self._aircraft_stream_data = data
+            with self._aircraft_frame_cond:
+                self._aircraft_frame = frame
+                self._aircraft_frame_cond.notify_all()
         elif name == b"SIMINFO":
-            self._sim_info_data = data
+            self._sim_info_frame = frame
+            self._check_step_progress(frame)
         # TODO(RKM 2019-11-22) BlueSky is not currently set-up to send route data for
         # all flights - only the ones that are "enabled" from the GUI...
         elif name == b"ROUTEDATA":
-            self._route_data = data
+            self._route_frame = frame
         else:
             self._logger.warning(f'Unhandled data from stream "{name}"')
 
+    def wait_for_aircraft_frame(self, seq: int, timeout: float) -> bool:
+        """
+        Waits until an ACDATA frame newer than the given seq number has been received.
+        Returns False if the timeout elapsed first
+        """
+        with self._aircraft_frame_cond:
+            return self._aircraft_frame_cond.wait_for(
+                lambda: self._aircraft_frame.seq > seq, timeout
+            )
+
     def send_stack_cmd(self, data=None, response_expected=False, target=b"*"):
-        """Send a command to the BlueSky simulation command stack"""
+        """
+        Send a command to the BlueSky simulation command stack. Returns as soon as the
+        command has been acknowledged, or after Settings.BS_CMD_TIMEOUT if it was not
+        """
 
         # TODO(RKM 2019-11-21) Proxy layer should handle this
         # bluebird.logging.EP_LOGGER.debug(
         #     f"[{self._sim_state.sim_t}] {data}", extra={"PREFIX": CMD_LOG_PREFIX}
         # )
 
-        self._echo_data = []
-        self._logger.debug(f"STACKCMD: {data}")
-        self.send_event(b"STACKCMD", data, target)
-
-        time.sleep(25 / POLL_RATE)
-
-        if response_expected and self._echo_data:
-            return list(self._echo_data)
-
-        if self._echo_data:
-            if self._echo_data[0].startswith(IGNORED_RESPONSES):
+        start = time.perf_counter()
+        echo_data = self._send_and_await([data], target)[0]
+        self.cmd_latencies.record(self._cmd_name(data), time.perf_counter() - start)
+        return self._parse_echo_data(data, echo_data, response_expected)
+
+    def send_stack_cmds(self, cmds: List[str], target=b"*") -> List[Optional[str]]:
+        """
+        Send multiple commands to the BlueSky simulation command stack in a single
+        event. Returns a list containing the result of each command - either None or an
+        error string
+        """
+
+        results, valid_cmds = self._check_cmds(cmds)
+        if not valid_cmds:
+            return results
+
+        start = time.perf_counter()
+        responses = self._send_and_await(valid_cmds, target)
+        self.cmd_latencies.record("BATCH", time.perf_counter() - start)
+
+        return self._merge_responses(cmds, results, responses)
+
+    @staticmethod
+    def _check_cmds(cmds: List[str]) -> Tuple[List[Optional[str]], List[str]]:
+        """
+        Checks a list of commands before they are sent. Returns the initial results for
+        each command (an error string for any which are invalid), and the valid commands
+        """
+        # NOTE(rkm 2020-06-01) BlueSky splits the stack on ';', so any commands which
+        # contain one would break the matching of responses to commands
+        results: List[Optional[str]] = [
+            f"Invalid command '{x}'" if not x or ";" in x else None for x in cmds
+        ]
+        valid_cmds = [x for x, err in zip(cmds, results) if not err]
+        return results, valid_cmds
+
+    def _merge_responses(
+        self,
+        cmds: List[str],
+        results: List[Optional[str]],
+        responses: List[CmdResponses],
+    ) -> List[Optional[str]]:
+        """Fills-in the results for the valid commands from their responses"""
+        responses_iter = iter(responses)
+        for idx, cmd in enumerate(cmds):
+            if not results[idx]:
+                results[idx] = self._parse_echo_data(cmd, next(responses_iter))
+        return results
+
+    def _new_pending_cmds(
+        self, cmds: List[str], ends_on_reset: bool
+    ) -> Tuple[_PendingCommands, str]:
+        """
+        Creates the _PendingCommands for a new batch of commands, and the stack data to
+        send
+        """
+        batch_id = next(self._cmd_ids)
+        acks = [f"{ACK_MARKER} {batch_id}.{i}" for i in range(len(cmds))]
+        data = ";".join(f"{cmd};ECHO {ack}" for cmd, ack in zip(cmds, acks))
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"STACKCMD: {data}")
+        return _PendingCommands(acks, ends_on_reset), data
+
+    def _send_and_await(
+        self, cmds: List[str], target, ends_on_reset: bool = False
+    ) -> List[CmdResponses]:
+        """
+        Sends the commands in one STACKCMD event, each followed by an ack marker, then
+        waits until all the markers have been echoed back (or until the timeout).
+        Returns the responses received for each command, or an error for any which
+        were not acknowledged
+        """
+
+        with self._cmd_lock:
+            pending, data = self._new_pending_cmds(cmds, ends_on_reset)
+            self._pending_cmds = pending
+            err = self.send_event(b"STACKCMD", data, target)
+            if err:
+                self._pending_cmds = None
+                return [err for _ in cmds]
+            if not pending.acked.wait(Settings.BS_CMD_TIMEOUT):
+                self._logger.warning(f"No acknowledgement received for {cmds}")
+            self._pending_cmds = None
+        return pending.results(cmds)
+
+    def _parse_echo_data(
+        self, data: str, echo_data: CmdResponses, response_expected: bool = False
+    ):
+        """Converts the ECHO responses for a command into the appropriate result"""
+
+        if isinstance(echo_data, str):
+            return echo_data
+
+        if response_expected and echo_data:
+            return echo_data
+
+        if echo_data:
+            if echo_data[0].startswith(IGNORED_RESPONSES):
                 return None
-            self._logger.error(f"Command '{data}' resulted in error: {self._echo_data}")
-            errs = "\n".join(str(x) for x in self._echo_data)
+            self._logger.error(f"Command '{data}' resulted in error: {echo_data}")
+            errs = "\n".join(str(x) for x in echo_data)
             return str(f"Error(s): {errs}")
 
         if response_expected:
@@ -149,113 +499,152 @@ class BlueSkyClient(Client):
         return None
 
     def receive(self, timeout=0):
+        """
+        Waits up to timeout milliseconds for messages, then sends any queued events and
+        processes all received messages
+        """
         try:
             socks = dict(self.poller.poll(timeout))
-            if socks.get(self.event_io) == zmq.POLLIN:
-
-                self._have_connection = True
 
-                msg = self.event_io.recv_multipart()
+            if socks.get(self._wake_recv) == zmq.POLLIN:
+                self._drain(self._wake_recv)
+            self._flush_send_queue()
 
-                # Remove send-to-all flag if present
-                if msg[0] == b"*":
-                    msg.pop(0)
+            self._handle_ready(
+                socks.get(self.event_io) == zmq.POLLIN,
+                socks.get(self.stream_in) == zmq.POLLIN,
+            )
+            return True
 
-                route, eventname, data = msg[:-2], msg[-2], msg[-1]
+        except zmq.ZMQError as exc:
+            self._logger.error(exc)
+            return False
 
-                self.sender_id = route[0]
-                route.reverse()
-                pydata = (
-                    msgpack.unpackb(data, object_hook=decode_ndarray, raw=False)
-                    if data
-                    else None
+    def _handle_ready(self, events_ready: bool, streams_ready: bool) -> None:
+        """
+        Processes all the messages waiting on the event and/or stream sockets, then
+        checks that the stream data is still being received
+        """
+
+        if events_ready:
+            self._have_connection = True
+            for msg in self._drain(self.event_io):
+                self._receive_event(msg)
+
+        if streams_ready:
+            self._last_stream_time = time.time()
+            # Only the latest frame of each stream is kept
+            latest = {msg[0]: msg[1] for msg in self._drain(self.stream_in)}
+            for topic, raw in latest.items():
+                self._receive_stream(topic[:-5], raw)
+
+        # TODO(RKM 2019-11-26) This should probably be based on the stream frequency
+        if self._last_stream_time:
+            time_diff = time.time() - self._last_stream_time
+            if time_diff > Settings.BS_STREAM_TIMEOUT:
+                raise TimeoutError(
+                    f"Lost connection to BlueSky (time_diff={time_diff:.2f})"
                 )
 
-                self._logger.debug(f"EVT :: {eventname} :: {pydata}")
+    @staticmethod
+    def _drain(socket) -> List[List[bytes]]:
+        """Receives all the messages which are waiting on the socket"""
+        msgs = []
+        while True:
+            try:
+                msgs.append(socket.recv_multipart(zmq.NOBLOCK))
+            except zmq.Again:
+                return msgs
 
-                if eventname in IGNORED_EVENTS:
-                    self._logger.debug(f"Ignored event {eventname}")
+    def _receive_event(self, msg: List[bytes]) -> None:
+        """Decodes and handles a message received on the event socket"""
 
-                # TODO Is this case relevant here?
-                elif eventname == b"NODESCHANGED":
-                    self.servers.update(pydata)
-                    self.nodes_changed.emit(pydata)
+        # Remove send-to-all flag if present
+        if msg[0] == b"*":
+            msg.pop(0)
 
-                    # If this is the first known node, select it as active node
-                    nodes_myserver = next(iter(pydata.values())).get("nodes")
-                    if not self.act and nodes_myserver:
-                        self.actnode(nodes_myserver[0])
+        route, eventname, data = msg[:-2], msg[-2], msg[-1]
 
-                # TODO Also check the pydata contains 'syntax error' etc.
-                elif eventname == b"ECHO":
-                    text = pydata["text"]
-                    if text.startswith("Unknown command: METRICS"):
-                        self._logger.warning(
-                            'Ignored warning about invalid "METRICS" command'
-                        )
-                    elif not text.startswith("IC: Opened"):
-                        self._echo_data.append(text)
-
-                elif eventname == b"STEP":
-                    self._step_flag = True
+        self.sender_id = route[0]
+        route.reverse()
+        pydata = (
+            msgpack.unpackb(data, object_hook=decode_ndarray, raw=False)
+            if data
+            else None
+        )
 
-                elif eventname == b"RESET":
-                    self._reset_flag = True
+        self._process_event(eventname, pydata)
 
-                elif eventname == b"QUIT":
-                    if self._awaiting_exit_resp:
-                        self._awaiting_exit_resp = False
-                    else:
-                        self._logger.error("Unhandled quit event from simulation")
+    def _process_event(self, eventname: bytes, pydata: Any) -> None:
+        """Handles a (decoded) event received from BlueSky"""
 
-                elif eventname == b"SCENARIO":
-                    self._scn_response = pydata
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"EVT :: {eventname} :: {pydata}")
 
-                else:
-                    self._logger.warning(
-                        'Unhandled eventname "{} with data {}"'.format(
-                            eventname, pydata
-                        )
-                    )
-                    self.event(eventname, pydata, self.sender_id)
+        if eventname in IGNORED_EVENTS:
+            self._logger.debug(f"Ignored event {eventname}")
 
-            if socks.get(self.stream_in) == zmq.POLLIN:
+        # TODO Is this case relevant here?
+        elif eventname == b"NODESCHANGED":
+            self.servers.update(pydata)
+            self.nodes_changed.emit(pydata)
 
-                self._last_stream_time = time.time()
+            # If this is the first known node, select it as active node
+            nodes_myserver = next(iter(pydata.values())).get("nodes")
+            if not self.act and nodes_myserver:
+                self.actnode(nodes_myserver[0])
 
-                msg = self.stream_in.recv_multipart()
+        # TODO Also check the pydata contains 'syntax error' etc.
+        elif eventname == b"ECHO":
+            text = pydata["text"]
+            pending = self._pending_cmds
+            if text.startswith("Unknown command: METRICS"):
+                self._logger.warning('Ignored warning about invalid "METRICS" command')
+            elif pending and not text.startswith("IC: Opened"):
+                pending.add_echo(text)
 
-                strmname = msg[0][:-5]
-                sender_id = msg[0][-5:]
-                pydata = msgpack.unpackb(msg[1], object_hook=decode_ndarray, raw=False)
+        elif eventname == b"STEP":
+            self._handle_step_reply()
 
-                self.stream(strmname, pydata, sender_id)
+        elif eventname == b"RESET":
+            self._reset_event.set()
+            pending = self._pending_cmds
+            if pending and pending.ends_on_reset:
+                pending.acked.set()
 
-            # TODO(RKM 2019-11-26) This should probably be based on the stream frequency
-            if self._last_stream_time:
-                time_diff = time.time() - self._last_stream_time
-                if time_diff > Settings.BS_STREAM_TIMEOUT:
-                    raise TimeoutError(
-                        f"Lost connection to BlueSky (time_diff={time_diff:.2f})"
-                    )
+        elif eventname == b"QUIT":
+            if not self._awaiting_exit_resp:
+                self._logger.error("Unhandled quit event from simulation")
+            self._awaiting_exit_resp = False
+            self._quit_event.set()
 
-            return True
+        elif eventname == b"SCENARIO":
+            self._scn_response = pydata
+            self._scn_event.set()
 
-        except zmq.ZMQError as exc:
-            self._logger.error(exc)
-            return False
+        else:
+            self._logger.warning(
+                'Unhandled eventname "{} with data {}"'.format(eventname, pydata)
+            )
+            self.event(eventname, pydata, self.sender_id)
 
     @timeit("BlueSkyClient")
     def upload_new_scenario(self, name: str, lines: List[str]):
         """Uploads a new scenario file to the BlueSky simulation"""
 
-        self._scn_response = None
+        err = self._send_scenario(name, lines)
+        if err:
+            return err
+        self._scn_event.wait(Settings.BS_SCN_TIMEOUT)
+        return self._parse_scn_response()
 
+    def _send_scenario(self, name: str, lines: List[str]) -> Optional[str]:
+        self._scn_response = None
+        self._scn_event.clear()
         data = json.dumps({"name": name, "lines": lines})
-        self.send_event(b"SCENARIO", data)
-
-        time.sleep(25 / POLL_RATE)
+        return self.send_event(b"SCENARIO", data)
 
+    def _parse_scn_response(self) -> Optional[str]:
         resp = self._scn_response
         if resp == "Ok":
             return None
@@ -269,13 +658,7 @@ class BlueSkyClient(Client):
         # self._logger.info(f"Episode {episode_id} started. Speed {speed}")
         # self._ac_data.set_log_rate(speed, new_log=True)
 
-        self._reset_flag = False
-
-        err = self.send_stack_cmd("IC " + filename)
-        if err:
-            return err
-
-        err = self._await_reset_confirmation()
+        err = self._send_reset_cmd("IC " + filename)
         if err:
             return err
 
@@ -290,35 +673,95 @@ class BlueSkyClient(Client):
 
         return None
 
-    def step(self):
-        """Steps the simulation forward by one unit of DTMULT"""
+    def step(self) -> Optional[str]:
+        """
+        Steps the simulation forward by one unit of DTMULT. Returns as soon as either
+        the STEP response is received or the sim time is seen to advance. The time taken
+        is recorded in the STEP_* latency histograms:
+            STEP_SEND:      From the call until the STEP event is sent
+            STEP_COMPUTE:   From sending the event until the step is completed
+            STEP_FRAME:     From sending the event until the first SIMINFO frame with
+                            the new sim time is received
+        """
 
         # TODO(RKM 2019-11-21) Proxy layer should handle this
         # init_t = int(self._sim_state.sim_t)
         # bluebird.logging.EP_LOGGER.debug(
         #     f"[{init_t}] STEP", extra={"PREFIX": CMD_LOG_PREFIX}
         # )
-        # TODO(RKM 2019-11-21) Validate this
-
-        init_t = self._sim_info_data[2]
 
-        self._step_flag = False
-        self.send_event(b"STEP")
+        start = self._send_step()
+        if isinstance(start, str):
+            return start
+        return self._finish_step(start, self._step_event.wait(Settings.BS_STEP_TIMEOUT))
+
+    def _send_step(self) -> Union[float, str]:
+        """
+        Sends the STEP event. Returns the time at which the step was started, or an
+        error if the event could not be sent
+        """
+        start = time.perf_counter()
+        init_t = self._sim_info_frame.data[2]
+        with self._step_lock:
+            self._step_init_t = init_t
+            self._step_sent_at = None
+            self._step_event.clear()
+            self._step_awaiting_frame = True
+            self._step_in_flight = True
+        err = self.send_event(b"STEP")
+        if err:
+            with self._step_lock:
+                self._step_awaiting_frame = False
+                self._step_in_flight = False
+            return err
+        return start
+
+    def _finish_step(self, start: float, completed: bool) -> Optional[str]:
+        """Handles the result of waiting for a step, and records the latencies"""
+
+        with self._step_lock:
+            self._step_in_flight = False
+            if not completed:
+                self._step_awaiting_frame = False
+                self._stale_step_replies += 1
+
+        if not completed:
+            return (
+                "Error: Step command failed "
+                f"(timeout={Settings.BS_STEP_TIMEOUT}s init_t={self._step_init_t} "
+                f"new_t={self._sim_info_frame.data[2]})"
+            )
+
+        end = time.perf_counter()
+        sent_at = self._step_sent_at or start
+        self.cmd_latencies.record("STEP", end - start)
+        self.cmd_latencies.record("STEP_SEND", sent_at - start)
+        self.cmd_latencies.record("STEP_COMPUTE", end - sent_at)
+        return None
 
-        # Wait for the STEP response, and for the sim_t to have advanced
-        wait_t = 1 / POLL_RATE
-        total_t = 0
-        while not self._step_flag:
-            new_t = self._sim_info_data[2]
-            if new_t > init_t:
-                return None
-            time.sleep(wait_t)
-            total_t += wait_t
-            if total_t >= 5:
-                return (
-                    f"Error: Step command failed (step_flag={self._step_flag} "
-                    f"init_t={init_t} new_t={new_t})"
+    def _check_step_progress(self, frame: StreamFrame) -> None:
+        """
+        Called from the I/O thread to check if the sim time has advanced. The frame is
+        only decoded while waiting for the first post-step frame
+        """
+        with self._step_lock:
+            if not self._step_awaiting_frame or frame.data[2] <= self._step_init_t:
+                return
+            self._step_awaiting_frame = False
+            if self._step_sent_at:
+                self.cmd_latencies.record(
+                    "STEP_FRAME", time.perf_counter() - self._step_sent_at
                 )
+            self._step_event.set()
+
+    def _handle_step_reply(self) -> None:
+        """Called from the I/O thread when a STEP event is received"""
+        with self._step_lock:
+            if self._stale_step_replies:
+                # Late reply to a step which timed out
+                self._stale_step_replies -= 1
+            elif self._step_in_flight:
+                self._step_event.set()
 
     def reset_sim(self) -> Optional[str]:
         """Resets the BlueSky sim and handles the response"""
@@ -327,23 +770,42 @@ class BlueSkyClient(Client):
         # self._ac_data.timer.disabled = True
         # bluebird.logging.close_episode_log("sim reset")
 
-        self._reset_flag = False
-        err = self.send_stack_cmd("RESET")
-        return err if err else self._await_reset_confirmation()
+        return self._send_reset_cmd("RESET")
 
-    def _await_reset_confirmation(self):
-        """Checks if a reset confirmation is received before the timeout"""
-        time.sleep(1)
-        return (
-            "Did not receive reset confirmation in time"
-            if not self._reset_flag
-            else None
-        )
+    def _send_reset_cmd(self, cmd: str) -> Optional[str]:
+        """
+        Sends a stack command which resets the sim (i.e. RESET or IC), then waits until
+        the RESET event is received or Settings.BS_RESET_TIMEOUT has elapsed
+        """
+
+        start = time.perf_counter()
+        self._reset_event.clear()
+
+        echo_data = self._send_and_await([cmd], b"*", ends_on_reset=True)[0]
+        err = self._parse_echo_data(cmd, echo_data)
+        if err:
+            return err
+
+        remaining = Settings.BS_RESET_TIMEOUT - (time.perf_counter() - start)
+        return self._finish_reset(cmd, start, self._reset_event.wait(max(remaining, 0)))
+
+    def _finish_reset(self, cmd: str, start: float, completed: bool) -> Optional[str]:
+        if not completed:
+            return "Did not receive reset confirmation in time"
+        self.cmd_latencies.record(self._cmd_name(cmd), time.perf_counter() - start)
+        return None
+
+    @staticmethod
+    def _cmd_name(data: str) -> str:
+        """Returns the name of the given stack command"""
+        return data.split(maxsplit=1)[0].upper() if data and data.strip() else ""
 
     def quit(self):
         """Sends a shutdown message to the simulation server"""
 
         self._awaiting_exit_resp = True
-        self.send_event(b"QUIT", target=b"*")
-        time.sleep(1)
-        return not bool(self._awaiting_exit_resp)
+        self._quit_event.clear()
+        if self.send_event(b"QUIT", target=b"*"):
+            self._awaiting_exit_resp = False
+            return False
+        return self._quit_event.wait(QUIT_TIMEOUT)
@@ -10,6 +10,7 @@ from semver import VersionInfo
 from .bluesky_aircraft_controls import BlueSkyAircraftControls
 from .bluesky_simulator_controls import BlueSkySimulatorControls
 from bluebird.settings import Settings
+from bluebird.sim_client.bluesky.bluesky_async_client import AsyncBlueSkyClient
 from bluebird.sim_client.bluesky.bluesky_client import BlueSkyClient
 from bluebird.utils.abstract_sim_client import AbstractSimClient
 from bluebird.utils.timer import Timer
@@ -51,7 +52,9 @@ class SimClient(AbstractSimClient):
         return self._client.host_version
 
     def __init__(self, **kwargs):
-        self._client = BlueSkyClient()
+        self._client = (
+            AsyncBlueSkyClient() if Settings.BS_ASYNC_CLIENT else BlueSkyClient()
+        )
         self._aircraft_controls = BlueSkyAircraftControls(self._client)
         self._sim_controls = BlueSkySimulatorControls(self._client)
 
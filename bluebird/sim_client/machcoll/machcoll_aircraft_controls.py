@@ -58,7 +58,7 @@ class MachCollAircraftControls(AbstractAircraftControls):
             return []
         if not isinstance(callsigns, list):
             return callsigns
-        return [types.Callsign(x) for x in callsigns]
+        return [types.Callsign.intern(x) for x in callsigns]
 
     def set_cleared_fl(
         self, callsign: types.Callsign, flight_level: types.Altitude, **kwargs
@@ -124,7 +124,7 @@ class MachCollAircraftControls(AbstractAircraftControls):
             return props.AircraftProperties(
                 aircraft_type=ac_props["flight-data"]["type"],
                 altitude=types.Altitude(f'FL{ac_props["pos"]["afl"]}'),
-                callsign=types.Callsign(ac_props["flight-data"]["callsign"]),
+                callsign=types.Callsign.intern(ac_props["flight-data"]["callsign"]),
                 cleared_flight_level=None,
                 ground_speed=types.GroundSpeed(ac_props["pos"]["speed"]),
                 heading=types.Heading(0),
@@ -0,0 +1,472 @@
+"""
+Contains the AircraftStore class
+"""
+import bisect
+import copy
+import math
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import KeysView
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+import bluebird.utils.types as types
+from bluebird.utils.aircraft_table import AircraftTable
+from bluebird.utils.properties import AircraftProperties
+
+
+# Names of the numpy columns. Missing values are stored as NaN
+_COLUMNS = (
+    "lat",
+    "lon",
+    "alt_ft",
+    "ground_speed",
+    "heading",
+    "vertical_speed",
+    "cleared_fl_ft",
+    "initial_fl_ft",
+    "requested_fl_ft",
+    "cleared_heading",
+    "cleared_ground_speed",
+    "cleared_vertical_speed",
+)
+
+# Columns which are updated from the simulator on each refresh, and the matching
+# columns in an AircraftTable
+_SIM_COLUMNS = {
+    "lat": "lats",
+    "lon": "lons",
+    "alt_ft": "altitudes_ft",
+    "ground_speed": "ground_speeds",
+    "heading": "headings",
+    "vertical_speed": "vertical_speeds",
+}
+
+# Names of the deadbands which apply to each column when comparing stores. Any other
+# columns must match exactly
+_DEADBANDS = {
+    "lat": "position",
+    "lon": "position",
+    "alt_ft": "altitude",
+    "ground_speed": "ground_speed",
+    "heading": "heading",
+    "vertical_speed": "vertical_speed",
+}
+
+_MIN_CAPACITY = 64
+
+
+def _value(obj, attr: str) -> float:
+    """Returns the given attribute of the type, or NaN if it is not set"""
+    return getattr(obj, attr) if obj is not None else math.nan
+
+
+class AircraftStore(Mapping):
+    """
+    Struct-of-arrays store of the aircraft properties tracked by the proxy. Each
+    aircraft is allocated a slot in the numpy columns which it keeps until it is
+    removed, so that the data from the simulator can be copied in with bulk array
+    assignments. The AircraftProperties are created (then cached) when accessed.
+    Aircraft which have been added without any properties are mapped to None.
+    Snapshots of the store are read-only, and have a version number. Lookups from a
+    snapshot return copies of the cached AircraftProperties, so that the snapshot
+    can't be modified through them
+    """
+
+    @property
+    def ids(self) -> KeysView[str]:
+        """The (uppercase) callsign strings of all the aircraft"""
+        return self._slots.keys()
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._capacity = 0
+        self._columns: Dict[str, np.ndarray] = {x: np.empty(0) for x in _COLUMNS}
+        self._callsigns: List[Optional[types.Callsign]] = []
+        self._aircraft_types: List[Optional[str]] = []
+        self._route_names: List[Optional[str]] = []
+        self._props: Dict[int, AircraftProperties] = {}
+        self.version: Optional[int] = None
+
+    def __getitem__(
+        self, callsign: Union[types.Callsign, str]
+    ) -> Optional[AircraftProperties]:
+        slot = self._slot(callsign)
+        if slot is None:
+            raise KeyError(callsign)
+        if self._aircraft_types[slot] is None:
+            return None
+        ac_props = self._props.get(slot)
+        if not ac_props:
+            ac_props = self._props[slot] = self._create_props(slot)
+        return ac_props if self.version is None else copy.copy(ac_props)
+
+    def __contains__(self, callsign) -> bool:
+        return self._slot(callsign) is not None
+
+    def __iter__(self) -> Iterator[types.Callsign]:
+        return (self._callsigns[x] for x in self._slots.values())
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(
+        self, callsign: types.Callsign, props: Optional[AircraftProperties]
+    ) -> None:
+        """Adds an aircraft to the store, replacing any existing entry"""
+        self._check_writable()
+        slot = self._slot(callsign)
+        if slot is None:
+            slot = self._allocate(callsign)
+        self._set_props(slot, props)
+
+    def remove(self, callsign: types.Callsign) -> None:
+        """Removes an aircraft from the store, freeing its slot"""
+        self._check_writable()
+        slot = self._slots.pop(callsign.value)
+        self._set_props(slot, None)
+        self._callsigns[slot] = None
+        self._free.append(slot)
+
+    def set_cleared_fl(self, callsign: types.Callsign, altitude: types.Altitude):
+        """Sets the cleared flight level of the aircraft"""
+        self._set_value(callsign, "cleared_fl_ft", altitude.feet)
+
+    def set_heading(self, callsign: types.Callsign, heading: types.Heading):
+        """Sets the commanded heading of the aircraft"""
+        self._set_value(callsign, "cleared_heading", heading.degrees)
+
+    def set_ground_speed(
+        self, callsign: types.Callsign, ground_speed: types.GroundSpeed
+    ):
+        """Sets the commanded ground speed of the aircraft"""
+        self._set_value(callsign, "cleared_ground_speed", ground_speed.meters_per_sec)
+
+    def set_vertical_speed(
+        self, callsign: types.Callsign, vertical_speed: types.VerticalSpeed
+    ):
+        """Sets the commanded vertical speed of the aircraft"""
+        self._set_value(callsign, "cleared_vertical_speed", vertical_speed.feet_per_min)
+
+    def update_from_sim(
+        self, sim_props: Mapping[types.Callsign, AircraftProperties]
+    ) -> List[types.Callsign]:
+        """
+        Updates the simulator-tracked properties of all the aircraft, and removes any
+        which are no longer in the simulation. Returns the removed callsigns
+        """
+
+        self._check_writable()
+
+        if isinstance(sim_props, AircraftTable):
+            removed = [
+                self._callsigns[self._slots[x]] for x in self.ids - sim_props.ids
+            ]
+        else:
+            removed = [x for x in self if x not in sim_props]
+        for callsign in removed:
+            self.remove(callsign)
+
+        # Aircraft which were added without any properties are copied in full
+        new_slots = {x for x in self._slots.values() if not self._aircraft_types[x]}
+        for slot in new_slots:
+            self._set_props(slot, sim_props[self._callsigns[slot]])
+
+        if isinstance(sim_props, AircraftTable):
+            slots = np.fromiter(self._slots.values(), dtype=int, count=len(self))
+            rows = sim_props.rows(self.ids)
+            for name, table_name in _SIM_COLUMNS.items():
+                self._columns[name][slots] = getattr(sim_props, table_name)[rows]
+        else:
+            for slot in self._slots.values():
+                if slot not in new_slots:
+                    self._set_sim_props(slot, sim_props[self._callsigns[slot]])
+
+        self._props.clear()
+        return removed
+
+    def routes(self) -> Tuple[List[types.Callsign], List[str], np.ndarray, np.ndarray]:
+        """
+        Returns the callsigns, route names, latitudes, and longitudes of the aircraft
+        which have a route
+        """
+        slots = [x for x in self._slots.values() if self._route_names[x]]
+        return (
+            [self._callsigns[x] for x in slots],
+            [self._route_names[x] for x in slots],
+            self._columns["lat"][slots],
+            self._columns["lon"][slots],
+        )
+
+    def select(
+        self,
+        callsigns: Optional[Iterable[Union[types.Callsign, str]]] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> Tuple[List[types.Callsign], Optional[str]]:
+        """
+        Returns the aircraft which have properties (optionally only those given),
+        ordered by callsign. If a limit is given then only that many are returned, and
+        the callsign to continue from is also returned if there are more. Otherwise
+        this is None. Results can be started after a callsign from a previous call
+        """
+
+        if callsigns is None:
+            ids = [x for x, y in self._slots.items() if self._aircraft_types[y]]
+        else:
+            slots = {self._slot(x) for x in callsigns}
+            ids = [
+                self._callsigns[x].value
+                for x in slots
+                if x is not None and self._aircraft_types[x]
+            ]
+        ids.sort()
+
+        if after is not None:
+            start = bisect.bisect_right(ids, after.upper())
+            ids = ids[start:]
+        next_after = None
+        if limit is not None and len(ids) > limit:
+            ids = ids[:limit]
+            next_after = ids[-1]
+
+        return [self._callsigns[self._slots[x]] for x in ids], next_after
+
+    def columns(
+        self,
+        names: Sequence[str],
+        callsigns: Optional[Iterable[Union[types.Callsign, str]]] = None,
+    ) -> Tuple[List[types.Callsign], Dict[str, Union[np.ndarray, List[Optional[str]]]]]:
+        """
+        Returns the callsigns of the aircraft which have properties (optionally only
+        those given), and the values of the named columns for them. The
+        "aircraft_type" and "route_name" columns are also available. Only the named
+        columns are copied, and no AircraftProperties are created
+        """
+
+        if callsigns is None:
+            slots = [x for x in self._slots.values() if self._aircraft_types[x]]
+        else:
+            slots = [self._slot(x) for x in callsigns]
+            slots = [x for x in slots if x is not None and self._aircraft_types[x]]
+        slot_array = np.array(slots, dtype=int)
+
+        columns: Dict[str, Union[np.ndarray, List[Optional[str]]]] = {}
+        for name in names:
+            if name == "aircraft_type":
+                columns[name] = [self._aircraft_types[x] for x in slots]
+            elif name == "route_name":
+                columns[name] = [self._route_names[x] for x in slots]
+            else:
+                columns[name] = self._columns[name][slot_array]
+        return [self._callsigns[x] for x in slots], columns
+
+    def changed(
+        self, reference: "AircraftStore", deadbands: Mapping[str, float]
+    ) -> List[types.Callsign]:
+        """
+        Returns the aircraft in both stores whose properties differ from those in the
+        reference by more than the deadbands
+        """
+
+        common = [x for x in self._slots if x in reference._slots]
+        if not common:
+            return []
+        slots = np.fromiter((self._slots[x] for x in common), dtype=int)
+        ref_slots = np.fromiter((reference._slots[x] for x in common), dtype=int)
+
+        mask = np.zeros(len(common), dtype=bool)
+        for name, column in self._columns.items():
+            new = column[slots]
+            old = reference._columns[name][ref_slots]
+            diff = np.abs(new - old)
+            if name == "heading":
+                diff = np.minimum(diff, 360 - diff)
+            with np.errstate(invalid="ignore"):
+                mask |= diff > deadbands.get(_DEADBANDS.get(name), 0)
+            mask |= np.isnan(new) != np.isnan(old)
+
+        for i in np.flatnonzero(~mask):
+            slot, ref_slot = slots[i], ref_slots[i]
+            mask[i] = (
+                self._aircraft_types[slot] != reference._aircraft_types[ref_slot]
+                or self._route_names[slot] != reference._route_names[ref_slot]
+            )
+
+        return [self._callsigns[x] for x in slots[mask]]
+
+    def copy_rows(
+        self, source: "AircraftStore", callsigns: Iterable[types.Callsign]
+    ) -> None:
+        """Copies the given aircraft from the source store, adding any which are new"""
+
+        self._check_writable()
+
+        slots, src_slots = [], []
+        for callsign in callsigns:
+            slot = self._slot(callsign)
+            if slot is None:
+                slot = self._allocate(callsign)
+            src_slot = source._slots[callsign.value]
+            self._aircraft_types[slot] = source._aircraft_types[src_slot]
+            self._route_names[slot] = source._route_names[src_slot]
+            self._props.pop(slot, None)
+            slots.append(slot)
+            src_slots.append(src_slot)
+
+        if slots:
+            for name, column in self._columns.items():
+                column[slots] = source._columns[name][src_slots]
+
+    def copy(self) -> "AircraftStore":
+        """Returns a copy of the store, which does not share any of the columns"""
+        other = AircraftStore.__new__(AircraftStore)
+        other._slots = self._slots.copy()
+        other._free = self._free.copy()
+        other._capacity = self._capacity
+        other._columns = {x: y.copy() for x, y in self._columns.items()}
+        other._callsigns = self._callsigns.copy()
+        other._aircraft_types = self._aircraft_types.copy()
+        other._route_names = self._route_names.copy()
+        other._props = {}
+        other.version = None
+        return other
+
+    def snapshot(self, version: int) -> "AircraftStore":
+        """Returns a read-only copy of the store with the given version number"""
+        other = self.copy()
+        other.version = version
+        return other
+
+    def _check_writable(self) -> None:
+        if self.version is not None:
+            raise TypeError("AircraftStore snapshots can not be modified")
+
+    def _set_value(self, callsign: types.Callsign, name: str, value: float) -> None:
+        self._check_writable()
+        slot = self._slots[callsign.value]
+        self._columns[name][slot] = value
+        self._props.pop(slot, None)
+
+    def _slot(self, callsign) -> Optional[int]:
+        if isinstance(callsign, types.Callsign):
+            return self._slots.get(callsign.value)
+        if isinstance(callsign, str):
+            return self._slots.get(callsign.upper())
+        return None
+
+    def _allocate(self, callsign: types.Callsign) -> int:
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._slots[callsign.value] = slot
+        self._callsigns[slot] = callsign
+        return slot
+
+    def _grow(self) -> None:
+        old_capacity = self._capacity
+        self._capacity = max(2 * old_capacity, _MIN_CAPACITY)
+        extra = self._capacity - old_capacity
+        for name, column in self._columns.items():
+            self._columns[name] = np.concatenate((column, np.full(extra, math.nan)))
+        for values in (self._callsigns, self._aircraft_types, self._route_names):
+            values.extend([None] * extra)
+        # NOTE(rkm 2020-06-14) Reversed so that the lowest slots are used first
+        self._free.extend(range(self._capacity - 1, old_capacity - 1, -1))
+
+    def _set_props(self, slot: int, props: Optional[AircraftProperties]) -> None:
+        """Sets all the properties for the slot"""
+        columns = self._columns
+        if props is None:
+            for column in columns.values():
+                column[slot] = math.nan
+            self._aircraft_types[slot] = None
+            self._route_names[slot] = None
+            self._props.pop(slot, None)
+            return
+        self._set_sim_props(slot, props)
+        columns["cleared_fl_ft"][slot] = _value(props.cleared_flight_level, "feet")
+        columns["initial_fl_ft"][slot] = _value(props.initial_flight_level, "feet")
+        columns["requested_fl_ft"][slot] = _value(props.requested_flight_level, "feet")
+        columns["cleared_heading"][slot] = _value(props.cleared_heading, "degrees")
+        columns["cleared_ground_speed"][slot] = _value(
+            props.cleared_ground_speed, "meters_per_sec"
+        )
+        columns["cleared_vertical_speed"][slot] = _value(
+            props.cleared_vertical_speed, "feet_per_min"
+        )
+        self._aircraft_types[slot] = props.aircraft_type
+        self._route_names[slot] = props.route_name
+
+    def _set_sim_props(self, slot: int, props: AircraftProperties) -> None:
+        """Sets the properties which are tracked by the simulator"""
+        columns = self._columns
+        columns["lat"][slot] = _value(props.position, "lat_degrees")
+        columns["lon"][slot] = _value(props.position, "lon_degrees")
+        columns["alt_ft"][slot] = _value(props.altitude, "feet")
+        columns["ground_speed"][slot] = _value(props.ground_speed, "meters_per_sec")
+        columns["heading"][slot] = _value(props.heading, "degrees")
+        columns["vertical_speed"][slot] = _value(props.vertical_speed, "feet_per_min")
+        self._props.pop(slot, None)
+
+    def _create_props(self, slot: int) -> AircraftProperties:
+        values = {x: y[slot].item() for x, y in self._columns.items()}
+
+        def altitude(name: str) -> Optional[types.Altitude]:
+            value = values[name]
+            if math.isnan(value):
+                return None
+            # NOTE(rkm 2020-06-14) Flight levels are stored as whole numbers of feet
+            return types.Altitude.trusted(int(value) if value.is_integer() else value)
+
+        def integer(name: str) -> Optional[int]:
+            return None if math.isnan(values[name]) else int(values[name])
+
+        def ground_speed(name: str) -> Optional[types.GroundSpeed]:
+            value = values[name]
+            return None if math.isnan(value) else types.GroundSpeed.trusted(value)
+
+        heading = integer("heading")
+        vertical_speed = integer("vertical_speed")
+        cleared_heading = integer("cleared_heading")
+        cleared_vertical_speed = integer("cleared_vertical_speed")
+        return AircraftProperties(
+            aircraft_type=self._aircraft_types[slot],
+            altitude=altitude("alt_ft"),
+            callsign=self._callsigns[slot],
+            cleared_flight_level=altitude("cleared_fl_ft"),
+            ground_speed=ground_speed("ground_speed"),
+            heading=None if heading is None else types.Heading.trusted(heading),
+            initial_flight_level=altitude("initial_fl_ft"),
+            position=(
+                None
+                if math.isnan(values["lat"])
+                else types.LatLon.trusted(values["lat"], values["lon"])
+            ),
+            requested_flight_level=altitude("requested_fl_ft"),
+            route_name=self._route_names[slot],
+            vertical_speed=(
+                None
+                if vertical_speed is None
+                else types.VerticalSpeed.trusted(vertical_speed)
+            ),
+            cleared_heading=(
+                None
+                if cleared_heading is None
+                else types.Heading.trusted(cleared_heading)
+            ),
+            cleared_ground_speed=ground_speed("cleared_ground_speed"),
+            cleared_vertical_speed=(
+                None
+                if cleared_vertical_speed is None
+                else types.VerticalSpeed.trusted(cleared_vertical_speed)
+            ),
+        )
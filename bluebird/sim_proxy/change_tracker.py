@@ -0,0 +1,96 @@
+"""
+Contains the ChangeTracker class
+"""
+import itertools
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """The aircraft which were added, removed, or changed up to a snapshot version"""
+
+    version: int
+    added: Tuple[types.Callsign, ...] = ()
+    removed: Tuple[types.Callsign, ...] = ()
+    changed: Tuple[types.Callsign, ...] = ()
+
+
+class ChangeTracker:
+    """
+    Tracks the aircraft which were added, removed, or changed in each snapshot of an
+    AircraftStore. Aircraft are compared against the properties they had when they
+    were last reported as changed, so that changes within the deadbands accumulate
+    until they are reported
+    """
+
+    @property
+    def version(self) -> int:
+        """The version of the last snapshot"""
+        return self._version
+
+    def __init__(self, deadbands: Mapping[str, float], maxlen: int):
+        self._deadbands = dict(deadbands)
+        self._reference = AircraftStore()
+        self._changes: Deque[ChangeSet] = deque(maxlen=maxlen)
+        self._version = 0
+
+    def update(self, snapshot: AircraftStore) -> ChangeSet:
+        """Records the changes in a new snapshot, and returns them"""
+
+        reference = self._reference
+        added = tuple(x for x in snapshot if x not in reference)
+        removed = tuple(x for x in reference if x not in snapshot)
+        changed = tuple(snapshot.changed(reference, self._deadbands))
+
+        for callsign in removed:
+            reference.remove(callsign)
+        reference.copy_rows(snapshot, itertools.chain(added, changed))
+
+        changes = ChangeSet(snapshot.version, added, removed, changed)
+        self._changes.append(changes)
+        self._version = snapshot.version
+        return changes
+
+    def since(self, version: int) -> Optional[ChangeSet]:
+        """
+        Returns the combined changes from after the given version up to the latest
+        snapshot, or None if they are no longer (or not yet) known
+        """
+
+        if version == self._version:
+            return ChangeSet(version)
+        if not self._changes or not (
+            self._changes[0].version - 1 <= version < self._version
+        ):
+            return None
+
+        # NOTE(rkm 2020-06-16) Dicts are used as ordered sets
+        added, removed, changed = {}, {}, {}
+        for changes in self._changes:
+            if changes.version <= version:
+                continue
+            for callsign in changes.removed:
+                changed.pop(callsign, None)
+                if callsign in added:
+                    del added[callsign]
+                else:
+                    removed[callsign] = None
+            for callsign in changes.added:
+                if callsign in removed:
+                    del removed[callsign]
+                    changed[callsign] = None
+                else:
+                    added[callsign] = None
+            for callsign in changes.changed:
+                if callsign not in added:
+                    changed[callsign] = None
+
+        return ChangeSet(self._version, tuple(added), tuple(removed), tuple(changed))
@@ -0,0 +1,65 @@
+"""
+Contains the CommandQueue class
+"""
+import threading
+from collections import OrderedDict
+from typing import List
+from typing import Tuple
+
+import bluebird.utils.types as types
+from bluebird.utils.properties import AircraftCommand
+
+
+# The aircraft field which is set by each command. Heading and direct-to both set the
+# lateral guidance, so replace each other
+_FIELDS = {
+    "set_cleared_fl": "altitude",
+    "set_heading": "lateral",
+    "direct_to_waypoint": "lateral",
+    "set_ground_speed": "ground_speed",
+    "set_vertical_speed": "vertical_speed",
+}
+
+
+class CommandQueue:
+    """
+    Queue of the aircraft commands which are deferred until the next step. Commands are
+    coalesced, so that only the last one for each aircraft and field is kept. The
+    commands are taken in the order in which they were last queued
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands: "OrderedDict[Tuple[types.Callsign, str], AircraftCommand]" = (
+            OrderedDict()
+        )
+        self._n_coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def put(self, command: AircraftCommand) -> None:
+        """Queues the command, replacing any for the same aircraft and field"""
+        key = (command.args[0], _FIELDS[command.name])
+        with self._lock:
+            if self._commands.pop(key, None):
+                self._n_coalesced += 1
+            self._commands[key] = command
+
+    def take(self) -> Tuple[List[AircraftCommand], int]:
+        """
+        Removes and returns all the queued commands, and the number of commands which
+        were replaced since the last call
+        """
+        with self._lock:
+            commands = list(self._commands.values())
+            n_coalesced = self._n_coalesced
+            self._commands.clear()
+            self._n_coalesced = 0
+        return commands, n_coalesced
+
+    def clear(self) -> None:
+        """Removes all the queued commands"""
+        with self._lock:
+            self._commands.clear()
+            self._n_coalesced = 0
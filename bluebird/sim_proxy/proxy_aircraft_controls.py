@@ -1,99 +1,184 @@
 """
 Contains the ProxyAircraftControls class
 """
-import copy
+import itertools
 import logging
+import threading
+from collections import abc
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque
 from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Tuple
 from typing import Union
 
-from aviary.sector.route import Route
 from aviary.sector.sector_element import SectorElement
 
 import bluebird.utils.types as types
+from bluebird.settings import in_agent_mode
+from bluebird.settings import Settings
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.sim_proxy.change_tracker import ChangeSet
+from bluebird.sim_proxy.change_tracker import ChangeTracker
+from bluebird.sim_proxy.command_queue import CommandQueue
+from bluebird.sim_proxy.route_index import RouteIndex
 from bluebird.utils.abstract_aircraft_controls import AbstractAircraftControls
+from bluebird.utils.properties import AircraftCommand
 from bluebird.utils.properties import AircraftProperties
 
 
+# The AircraftStore setters for the commands whose targets are written through
+_WRITE_THROUGH = {
+    "set_cleared_fl": AircraftStore.set_cleared_fl,
+    "set_heading": AircraftStore.set_heading,
+    "set_ground_speed": AircraftStore.set_ground_speed,
+    "set_vertical_speed": AircraftStore.set_vertical_speed,
+}
+
+# The commands which can be sent in a batch
+_BATCH_COMMANDS = frozenset(_WRITE_THROUGH) | {"direct_to_waypoint", "create"}
+
+
+@dataclass(frozen=True)
+class HistoryFrame:
+    """The properties of all aircraft at the start of a step"""
+
+    scenario_time: Optional[float]
+    aircraft: AircraftStore
+
+
 class ProxyAircraftControls(AbstractAircraftControls):
     """Proxy implementation of AbstractAircraftControls"""
 
     @property
-    def all_properties(self) -> Union[Dict[types.Callsign, AircraftProperties], str]:
+    def all_properties(self) -> Union[AircraftStore, str]:
+        """
+        Returns a read-only snapshot of the properties of all aircraft. If the data is
+        invalid then exactly one thread refreshes it from the simulator, and any others
+        wait for the new snapshot. Any changes made by commands since the last snapshot
+        are published first
+        """
         self._logger.debug("all_properties: Accessed")
-        if self._data_valid:
+        if self._data_valid and not self._dirty:
             self._logger.debug("all_properties: Using cache")
-            return self._ac_props
-        all_props = self._aircraft_controls.all_properties
-        if not isinstance(all_props, dict):
-            return all_props
-        for callsign in list(self._ac_props):
-            if callsign not in all_props:
+            return self._snapshot
+        with self._lock:
+            if self._data_valid:
+                if self._dirty:
+                    self._publish()
+                return self._snapshot
+            all_props = self._aircraft_controls.all_properties
+            if not isinstance(all_props, abc.Mapping):
+                return all_props
+            self._ac_props.update_from_sim(all_props)
+            changes = self._publish()
+            for callsign in changes.removed:
                 self._logger.warning(
                     f"all_properties: Aircraft {callsign} has "
                     "been removed from the simulation"
                 )
-                self._ac_props.pop(callsign, None)
-                continue
-            self._update_ac_properties(callsign, all_props[callsign])
-        self._logger.debug("all_properties: Data now valid")
-        self._data_valid = True
-        return self._ac_props
+            types.Callsign.release(x.value for x in changes.removed)
+            self._logger.debug("all_properties: Data now valid")
+            self._data_valid = True
+            return self._snapshot
 
     @property
     def callsigns(self) -> Union[List[types.Callsign], str]:
-        if not self._data_valid:
-            err = self.all_properties
-            if isinstance(err, str):
-                return err
-        return list(self._ac_props.keys())
+        all_props = self.all_properties
+        return all_props if isinstance(all_props, str) else list(all_props)
+
+    @property
+    def version(self) -> int:
+        """
+        The version of the current snapshot. Any changes made by commands are
+        published first
+        """
+        with self._lock:
+            if self._dirty:
+                self._publish()
+            return self._snapshot.version
 
     def __init__(self, aircraft_controls: AbstractAircraftControls):
         self._logger = logging.getLogger(__name__)
         self._aircraft_controls = aircraft_controls
 
-        self._ac_props: Dict[types.Callsign, Optional[AircraftProperties]] = {}
-        self._prev_ac_props: Dict[types.Callsign, Optional[AircraftProperties]] = {}
-        self._routes: Dict[str, Route] = {}
+        # The working copy of the aircraft properties, and the latest read-only snapshot
+        # of it. Changes to either must be made while holding the lock
+        self._lock = threading.Lock()
+        self._ac_props = AircraftStore()
+        self._snapshot = self._ac_props.snapshot(0)
+        # NOTE(rkm 2020-06-22) Set when the working copy has been changed by a command.
+        # The new snapshot is only published when the data is next read, so that each
+        # command doesn't have to copy the whole store
+        self._dirty = False
+        # The aircraft which changed in each snapshot
+        self._changes = ChangeTracker(
+            Settings.DELTA_DEADBANDS, Settings.DELTA_HISTORY_LEN
+        )
+        # Ring buffer of the aircraft properties at the start of each step
+        self._history: Deque[HistoryFrame] = deque(maxlen=Settings.STEP_HISTORY_LEN)
+        # Index of the routes in the current sector
+        self._routes = RouteIndex()
+        self._sector_element: Optional[SectorElement] = None
+        # The commands which are deferred until the next step
+        self._queue = CommandQueue()
         self._data_valid: bool = False
 
     def set_cleared_fl(
         self, callsign: types.Callsign, flight_level: types.Altitude, **kwargs
     ) -> Optional[str]:
+        if self._defer("set_cleared_fl", (callsign, flight_level), kwargs):
+            return None
         err = self._aircraft_controls.set_cleared_fl(callsign, flight_level, **kwargs)
         if err:
             return err
-        self._ac_props[callsign].cleared_flight_level = flight_level
+        self._write_through(callsign, AircraftStore.set_cleared_fl, flight_level)
         return None
 
     def set_heading(
         self, callsign: types.Callsign, heading: types.Heading
     ) -> Optional[str]:
-        return self._aircraft_controls.set_heading(callsign, heading)
+        if self._defer("set_heading", (callsign, heading)):
+            return None
+        err = self._aircraft_controls.set_heading(callsign, heading)
+        if err:
+            return err
+        self._write_through(callsign, AircraftStore.set_heading, heading)
+        return None
 
     def set_ground_speed(
         self, callsign: types.Callsign, ground_speed: types.GroundSpeed
     ) -> Optional[str]:
-        return self._aircraft_controls.set_ground_speed(callsign, ground_speed)
+        if self._defer("set_ground_speed", (callsign, ground_speed)):
+            return None
+        err = self._aircraft_controls.set_ground_speed(callsign, ground_speed)
+        if err:
+            return err
+        self._write_through(callsign, AircraftStore.set_ground_speed, ground_speed)
+        return None
 
     def set_vertical_speed(
         self, callsign: types.Callsign, vertical_speed: types.VerticalSpeed
     ) -> Optional[str]:
-        return self._aircraft_controls.set_vertical_speed(callsign, vertical_speed)
+        if self._defer("set_vertical_speed", (callsign, vertical_speed)):
+            return None
+        err = self._aircraft_controls.set_vertical_speed(callsign, vertical_speed)
+        if err:
+            return err
+        self._write_through(callsign, AircraftStore.set_vertical_speed, vertical_speed)
+        return None
 
     def direct_to_waypoint(
         self, callsign: types.Callsign, waypoint: str
     ) -> Optional[str]:
-        props = self.properties(callsign)
-        if not isinstance(props, AircraftProperties):
-            return props
-        if not props.route_name:
-            return "Aircraft has no route"
-        route_waypoints = [x[0] for x in self._routes[props.route_name].fix_list]
-        if waypoint not in route_waypoints:
-            return f'Waypoint "{waypoint}" is not in the route {route_waypoints}'
+        err = self._check_direct(callsign, waypoint)
+        if err:
+            return err
+        if self._defer("direct_to_waypoint", (callsign, waypoint)):
+            return None
         return self._aircraft_controls.direct_to_waypoint(callsign, waypoint)
 
     def create(
@@ -110,38 +195,145 @@ class ProxyAircraftControls(AbstractAircraftControls):
         exists = self.exists(callsign)
         if not isinstance(exists, bool):
             return exists
-        if self.exists(callsign):
+        if exists:
             return "Aircraft already exists"
         err = self._aircraft_controls.create(
             callsign, ac_type, position, heading, altitude, gspd
         )
         if err:
             return err
-        # Create an empty entry for the new aircraft and ensure we get new data back
-        self._ac_props[callsign] = None
-        self._data_valid = False
-        all_properties = self.all_properties
-        if not isinstance(all_properties, dict):
-            return all_properties
-        return (
-            None if callsign in all_properties else "New callsign missing from sim data"
+        # Add the new aircraft by looking it up, rather than refreshing all the data
+        props = self._aircraft_controls.properties(callsign)
+        if not isinstance(props, AircraftProperties):
+            self._missing_new_aircraft([callsign], props)
+            return None
+        with self._lock:
+            self._ac_props.add(callsign, props)
+            self._dirty = True
+        return None
+
+    def batch(self, commands: List[AircraftCommand]) -> List[Optional[str]]:
+        """
+        Sends multiple aircraft commands. These are sent in a single call if the
+        simulator supports it, otherwise one at a time. If commands are being deferred,
+        then all but the creates are queued in the same way as the single commands.
+        Returns the result of each command - either None or an error string
+        """
+
+        results: List[Optional[str]] = [None] * len(commands)
+        to_send: List[AircraftCommand] = []
+        idxs: List[int] = []
+        for idx, command in enumerate(commands):
+            if command.name not in _BATCH_COMMANDS:
+                results[idx] = f"Unsupported command {command.name}"
+            elif command.name == "direct_to_waypoint":
+                results[idx] = self._check_direct(*command.args)
+            if results[idx]:
+                continue
+            if command.name != "create" and self._defer(
+                command.name, command.args, command.kwargs
+            ):
+                continue
+            to_send.append(command)
+            idxs.append(idx)
+
+        for idx, err in zip(idxs, self._send_batch(to_send)):
+            results[idx] = err
+        return results
+
+    def _send_batch(self, commands: List[AircraftCommand]) -> List[Optional[str]]:
+        """
+        Sends the (validated) commands to the simulator, and writes through the targets
+        of any which succeeded. Returns the result of each
+        """
+
+        if not commands:
+            return []
+
+        sim_batch = getattr(self._aircraft_controls, "batch", None)
+        if sim_batch:
+            results = list(sim_batch(commands))
+        else:
+            results = [
+                getattr(self._aircraft_controls, x.name)(*x.args, **x.kwargs)
+                for x in commands
+            ]
+
+        new_aircraft: Dict[types.Callsign, AircraftProperties] = {}
+        missing: List[types.Callsign] = []
+        for command, err in zip(commands, results):
+            if err or command.name != "create":
+                continue
+            callsign = command.args[0]
+            props = self._aircraft_controls.properties(callsign)
+            if isinstance(props, AircraftProperties):
+                new_aircraft[callsign] = props
+            else:
+                missing.append(callsign)
+
+        with self._lock:
+            for callsign, props in new_aircraft.items():
+                self._ac_props.add(callsign, props)
+                self._dirty = True
+            for command, err in zip(commands, results):
+                setter = _WRITE_THROUGH.get(command.name)
+                callsign = command.args[0]
+                if setter and not err and callsign in self._ac_props:
+                    setter(self._ac_props, callsign, command.args[1])
+                    self._dirty = True
+
+        if missing:
+            self._missing_new_aircraft(missing, None)
+        return results
+
+    def flush_commands(self) -> None:
+        """
+        Sends any deferred commands to the simulator in a single batch. Called before
+        each step. Any errors are logged, since the commands have already been accepted
+        """
+        commands, n_coalesced = self._queue.take()
+        if not commands:
+            return
+        self._logger.debug(
+            f"flush_commands: Sending {len(commands)} commands "
+            f"({n_coalesced} coalesced)"
         )
+        for command, err in zip(commands, self._send_batch(commands)):
+            if err:
+                self._logger.warning(
+                    f"flush_commands: Deferred command {command.name} for "
+                    f"{command.args[0]} failed: {err}"
+                )
 
     def exists(self, callsign: types.Callsign) -> Union[bool, str]:
-        all_callsings = self.callsigns
-        return (
-            bool(callsign in all_callsings)
-            if isinstance(all_callsings, list)
-            else all_callsings
-        )
+        all_props = self.all_properties
+        if not isinstance(all_props, abc.Mapping):
+            return all_props
+        return callsign in all_props
 
     def properties(self, callsign: types.Callsign) -> Union[AircraftProperties, str]:
         """Utility function to return only the properties for the specified aircraft"""
         all_props = self.all_properties
-        if not isinstance(all_props, dict):
+        if not isinstance(all_props, abc.Mapping):
             return all_props
         return all_props.get(callsign, None) or f"Unknown callsign {callsign}"
 
+    def changes_since(
+        self, version: int
+    ) -> Union[Tuple[AircraftStore, ChangeSet], str]:
+        """
+        Returns the current snapshot, and the aircraft which have been added, removed,
+        or changed since the given snapshot version
+        """
+        all_props = self.all_properties
+        if not isinstance(all_props, abc.Mapping):
+            return all_props
+        with self._lock:
+            changes = self._changes.since(version)
+            if changes is None:
+                return f"Changes since snapshot version {version} are not available"
+            return self._snapshot, changes
+
     def route(self, callsign: types.Callsign) -> Union[Tuple[str, str, List[str]], str]:
         """Utility function to return only the route for the specified aircraft"""
         props = self.properties(callsign)
@@ -150,27 +342,65 @@ class ProxyAircraftControls(AbstractAircraftControls):
         if not props.route_name:
             return "Aircraft has no route"
 
-        route = self._routes[props.route_name]
-        next_waypoint = route.next_waypoint(
-            props.position.lat_degrees, props.position.lon_degrees
+        next_waypoint = self._routes.next_waypoint(
+            props.route_name, props.position.lat_degrees, props.position.lon_degrees
+        )
+        return (
+            props.route_name,
+            next_waypoint,
+            self._routes.waypoints(props.route_name),
         )
-        return (props.route_name, next_waypoint, [x[0] for x in route.fix_list])
+
+    def all_routes(
+        self,
+    ) -> Union[Dict[types.Callsign, Tuple[str, Optional[str], List[str]]], str]:
+        """
+        Returns the route name, next waypoint, and route waypoints of all aircraft
+        which have a route. The next waypoints are found for all aircraft at once
+        """
+        all_props = self.all_properties
+        if not isinstance(all_props, AircraftStore):
+            return all_props
+        callsigns, route_names, lats, lons = all_props.routes()
+        next_waypoints = self._routes.next_waypoints(route_names, lats, lons)
+        return {
+            callsign: (route_name, next_waypoint, self._routes.waypoints(route_name))
+            for callsign, route_name, next_waypoint in zip(
+                callsigns, route_names, next_waypoints
+            )
+        }
 
     def invalidate_data(self, clear: bool = False) -> None:
         """Clears the data_valid flag"""
-        if clear:
-            self._ac_props = {}
-            self._prev_ac_props = {}
-        self._data_valid = False
+        with self._lock:
+            if clear:
+                self._queue.clear()
+                self._ac_props = AircraftStore()
+                self._dirty = True
+                self._history.clear()
+                types.Callsign.clear_pool()
+            self._data_valid = False
 
-    def store_current_props(self):
+    def store_current_props(self, scenario_time: Optional[float] = None) -> None:
+        """Stores the current aircraft properties in the step history"""
         # TODO(rkm 2020-01-12) In sandbox mode, this needs to be hooked-up to a timer
         # which stores the current state every n seconds
-        self._prev_ac_props = copy.deepcopy(self._ac_props)
+        # NOTE(rkm 2020-06-15) The snapshots are read-only, so can be stored directly
+        snapshot = self.all_properties
+        if not isinstance(snapshot, AircraftStore):
+            self._logger.warning(f"Could not store the current properties: {snapshot}")
+            return
+        self._history.append(HistoryFrame(scenario_time, snapshot))
+
+    def prev_ac_props(self) -> Mapping[types.Callsign, Optional[AircraftProperties]]:
+        """Returns the (read-only) aircraft properties from before the last step"""
+        return self._history[-1].aircraft if self._history else {}
 
-    def prev_ac_props(self) -> Dict[types.Callsign, Optional[AircraftProperties]]:
-        # NOTE(rkm 2020-01-29) Defensive copy
-        return copy.deepcopy(self._prev_ac_props)
+    def history(self, steps: Optional[int] = None) -> List["HistoryFrame"]:
+        """Returns the stored properties from (up to) the last n steps, oldest first"""
+        if steps is None or steps >= len(self._history):
+            return list(self._history)
+        return list(itertools.islice(self._history, len(self._history) - steps, None))
 
     def set_initial_properties(
         self, sector_element: SectorElement, scenario_content: dict
@@ -180,40 +410,80 @@ class ProxyAircraftControls(AbstractAircraftControls):
         levels, routes, and aircraft types
         """
 
-        for route in sector_element.routes():
-            self._routes[route.name] = route
+        if sector_element is not self._sector_element:
+            self._routes = RouteIndex(sector_element.routes())
+            self._sector_element = sector_element
 
-        new_props: Dict[types.Callsign, AircraftProperties] = {}
+        new_props = AircraftStore()
         for aircraft in scenario_content["aircraft"]:
-            callsign = types.Callsign(aircraft["callsign"])
-            new_props[callsign] = AircraftProperties.from_data(aircraft)
-            if "route" not in aircraft:
-                new_props[callsign].route_name = None
-                continue
-            # Match the route name to the waypoints in the scenario data
-            aircraft_route_waypoints = [x["fixName"] for x in aircraft["route"]]
-            new_props[callsign].route_name = next(
-                x
-                for x in self._routes
-                if self._routes[x].fix_names() == aircraft_route_waypoints
-            )
+            props = AircraftProperties.from_data(aircraft)
+            if "route" in aircraft:
+                # Match the route name to the waypoints in the scenario data
+                props.route_name = self._routes.match(
+                    x["fixName"] for x in aircraft["route"]
+                )
+                if not props.route_name:
+                    self._logger.warning(
+                        f"set_initial_properties: No route matches the waypoints for "
+                        f"aircraft {props.callsign}"
+                    )
+            new_props.add(props.callsign, props)
 
-        self._ac_props = new_props
-        self._data_valid = False
-
-    def _update_ac_properties(
-        self, callsign: types.Callsign, new_props: AircraftProperties
-    ):
-        """Updates the stored AircraftProperties with new data from the simulator"""
-        # NOTE(rkm 2020-01-12) If we don't have any existing properties, then that means
-        # this is an aircraft that has been created after the scenario has been started.
-        # We therefore (currently) don't have any route or req. flight level information
-        if not self._ac_props[callsign]:
-            self._ac_props[callsign] = new_props
-        else:
-            props = self._ac_props[callsign]
-            props.altitude = new_props.altitude
-            props.ground_speed = new_props.ground_speed
-            props.heading = new_props.heading
-            props.position = new_props.position
-            props.vertical_speed = new_props.vertical_speed
+        with self._lock:
+            self._ac_props = new_props
+            self._dirty = True
+            self._data_valid = False
+
+    def _defer(self, name: str, args: tuple, kwargs: Optional[dict] = None) -> bool:
+        """
+        Queues the command until the next step if commands are being deferred, and
+        returns whether it was queued
+        """
+        if not (Settings.DEFER_COMMANDS and in_agent_mode()):
+            return False
+        self._queue.put(AircraftCommand(name, args, kwargs or {}))
+        return True
+
+    def _check_direct(self, callsign: types.Callsign, waypoint: str) -> Optional[str]:
+        """Checks that the waypoint is on the aircraft's route"""
+        props = self.properties(callsign)
+        if not isinstance(props, AircraftProperties):
+            return props
+        if not props.route_name:
+            return "Aircraft has no route"
+        if not self._routes.has_waypoint(props.route_name, waypoint):
+            route_waypoints = self._routes.waypoints(props.route_name)
+            return f'Waypoint "{waypoint}" is not in the route {route_waypoints}'
+        return None
+
+    def _missing_new_aircraft(
+        self, callsigns: List[types.Callsign], err: Optional[str]
+    ) -> None:
+        """
+        Called if newly created aircraft are not in the sim data yet. They were still
+        created, so the data is refreshed on the next access instead
+        """
+        self._logger.warning(
+            f"New aircraft {[str(x) for x in callsigns]} not in the sim data yet "
+            f"({err or 'not found'}). Invalidating the data"
+        )
+        self.invalidate_data()
+
+    def _write_through(self, callsign: types.Callsign, setter, value) -> None:
+        """
+        Records a commanded value for the aircraft. This is published in the next
+        snapshot
+        """
+        with self._lock:
+            if callsign in self._ac_props:
+                setter(self._ac_props, callsign, value)
+                self._dirty = True
+
+    def _publish(self) -> ChangeSet:
+        """
+        Replaces the snapshot with a new version, and returns the aircraft which were
+        changed. The lock must be held
+        """
+        self._snapshot = self._ac_props.snapshot(self._snapshot.version + 1)
+        self._dirty = False
+        return self._changes.update(self._snapshot)
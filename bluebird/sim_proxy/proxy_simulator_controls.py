@@ -6,9 +6,10 @@ Contains the ProxySimulatorControls class
 # simulators. Capture this in AircraftProperties, expose it, and add tests
 # TODO(rkm 2020-01-22) Check the effect of loading a new sector when a scenario is
 # already running (cached data etc.)
-import copy
+import dataclasses
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import List
 from typing import Optional
@@ -23,7 +24,9 @@ from bluebird.utils.properties import Scenario
 from bluebird.utils.properties import Sector
 from bluebird.utils.properties import SimProperties
 from bluebird.utils.scenario_validation import validate_json_scenario
-from bluebird.utils.sector_validation import validate_geojson_sector
+from bluebird.utils.scenario_validation import validate_scenario_against_sector
+from bluebird.utils.sector_cache import CachedSector
+from bluebird.utils.sector_cache import SECTOR_CACHE
 from bluebird.utils.timer import Timer
 from bluebird.utils.timeutils import timeit
 
@@ -52,17 +55,26 @@ class ProxySimulatorControls(AbstractSimulatorControls):
         self._scenario: Optional[Scenario] = None
         self._sim_props: Optional[SimProperties] = None
         self._data_valid: bool = False
+        self._lock = threading.Lock()
 
     @property
     def properties(self) -> Union[SimProperties, str]:
-        if not self._sim_props or not self._data_valid:
-            sim_props = copy.deepcopy(self._sim_controls.properties)
+        if self._sim_props and self._data_valid:
+            return self._sim_props
+        # NOTE(rkm 2020-06-15) Only one thread refreshes the properties. The new object
+        # is fully updated before it replaces the old one
+        with self._lock:
+            if self._sim_props and self._data_valid:
+                return self._sim_props
+            sim_props = self._sim_controls.properties
             if not isinstance(sim_props, SimProperties):
                 return sim_props
+            # NOTE(rkm 2020-06-03) Shallow copy, since we only replace attributes
+            sim_props = dataclasses.replace(sim_props)
             self._update_sim_props(sim_props)
             self._sim_props = sim_props
             self._data_valid = True
-        return self._sim_props
+            return self._sim_props
 
     def load_sector(self, sector: Sector) -> Optional[str]:
         """
@@ -169,7 +181,11 @@ class ProxySimulatorControls(AbstractSimulatorControls):
     def step(self) -> Optional[str]:
         if not self._scenario:
             return "No scenario set"
-        self._proxy_aircraft_controls.store_current_props()
+        self._proxy_aircraft_controls.flush_commands()
+        sim_props = self.properties
+        self._proxy_aircraft_controls.store_current_props(
+            sim_props.scenario_time if isinstance(sim_props, SimProperties) else None
+        )
         return self._invalidating_response(self._sim_controls.step())
 
     def set_speed(self, speed: float) -> Optional[str]:
@@ -227,7 +243,10 @@ class ProxySimulatorControls(AbstractSimulatorControls):
 
     def _invalidate_data(self, clear: bool = False):
         self._proxy_aircraft_controls.invalidate_data(clear=clear)
-        self._data_valid = False
+        # NOTE(rkm 2020-06-15) Waits for any in-progress refresh, so that it can't then
+        # mark the old data as valid
+        with self._lock:
+            self._data_valid = False
 
     def _update_sim_props(self, sim_props: SimProperties) -> None:
         """Update sim_props with any properties which we manually keep track of"""
@@ -248,17 +267,20 @@ class ProxySimulatorControls(AbstractSimulatorControls):
         self._logger.debug(f"Loading sector from {sector_file}")
         if not sector_file.exists():
             return f"No sector file at {sector_file}"
-        with open(sector_file) as f:
-            sector_json = json.load(f)
-        return validate_geojson_sector(sector_json)
+        cached = SECTOR_CACHE.from_file(sector_file)
+        return cached.element if isinstance(cached, CachedSector) else cached
 
     def _save_sector_to_file(self, sector: Sector):
         sector_file = self._sector_filename(sector.name)
+        if SECTOR_CACHE.is_saved(sector_file, sector.element):
+            self._logger.debug(f"Sector already saved to {sector_file}")
+            return
         self._logger.debug(f"Saving sector to {sector_file}")
         if sector_file.exists():
             self._logger.warning("Overwriting existing file")
         self._assert_parent_dir_exists(sector_file)
         sector.element.write_geojson(str(sector_file))
+        SECTOR_CACHE.saved_file(sector_file, sector.element)
 
     @staticmethod
     def _scenario_filename(scenario_name: str) -> Path:
@@ -286,21 +308,18 @@ class ProxySimulatorControls(AbstractSimulatorControls):
     def _assert_parent_dir_exists(file: Path):
         file.parent.mkdir(parents=True, exist_ok=True)
 
-    @staticmethod
-    def _validate_scenario_against_sector(sector: SectorElement, scenario: dict):
+    @timeit("ProxySimulatorControls")
+    def _validate_scenario_against_sector(
+        self, sector: SectorElement, scenario: dict
+    ) -> Optional[str]:
         """
-        Asserts that all waypoints defined in the scenario exist in the current sector
+        Checks that all waypoints defined in the scenario exist in the current sector.
+        Any fixes whose coordinates don't match the sector are logged as warnings
         """
-        # TODO(rkm 2020-01-23) Additionally, since the coordinates are repeated in both
-        # the sector and scenario definitions, we could also assert that the coordinates
-        # for each fix match
         assert sector
-        try:
-            sector_fixes = list(sector.shape.fixes.keys())
-            for aircraft in scenario["aircraft"]:
-                for fixName in [x["fixName"] for x in aircraft["route"]]:
-                    assert (
-                        fixName in sector_fixes
-                    ), f"Fix {fixName} not in {sector_fixes}"
-        except AssertionError as e:
-            return f"Scenario not valid with the current sector: {e}"
+        err, warnings = validate_scenario_against_sector(sector, scenario)
+        for warning in warnings:
+            self._logger.warning(f"Scenario fix mismatch: {warning}")
+        if err:
+            return f"Scenario not valid with the current sector: {err}"
+        return None
@@ -0,0 +1,129 @@
+"""
+Contains the RouteIndex class
+"""
+import math
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from aviary.sector.route import Route
+
+
+class _RouteGeometry:
+    """The segments of a route, in a local equirectangular projection"""
+
+    __slots__ = ("scale", "start_x", "start_y", "dx", "dy", "len_sq")
+
+    def __init__(self, route: Route):
+        lons = np.array([x[1].x for x in route.fix_list], dtype=float)
+        lats = np.array([x[1].y for x in route.fix_list], dtype=float)
+        # NOTE(rkm 2020-06-17) Longitudes are scaled so that the (small) distances are
+        # comparable in both directions
+        self.scale = math.cos(math.radians(lats.mean()))
+        xs = lons * self.scale
+        self.start_x = xs[:-1]
+        self.start_y = lats[:-1]
+        self.dx = np.diff(xs)
+        self.dy = np.diff(lats)
+        self.len_sq = self.dx ** 2 + self.dy ** 2
+
+    def next_fixes(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Returns the index of the next fix for each position. This is the end of the
+        nearest segment, or the first fix if the position is before the route
+        """
+
+        if not len(self.dx):
+            return np.zeros(len(lats), dtype=int)
+
+        rel_x = lons[:, None] * self.scale - self.start_x
+        rel_y = lats[:, None] - self.start_y
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = (rel_x * self.dx + rel_y * self.dy) / self.len_sq
+        t = np.clip(np.nan_to_num(t), 0, 1)
+        dist_sq = (rel_x - t * self.dx) ** 2 + (rel_y - t * self.dy) ** 2
+
+        nearest = np.argmin(dist_sq, axis=1)
+        before_start = (nearest == 0) & (t[:, 0] <= 0)
+        return np.where(before_start, 0, nearest + 1)
+
+
+class RouteIndex(Mapping):
+    """
+    Index of the routes in a sector, mapping each route name to its Route. Built once
+    when the sector is loaded, so that the routes can be matched from their fixes,
+    and the next waypoints found for many aircraft at once
+    """
+
+    def __init__(self, routes: Iterable[Route] = ()):
+        self._routes: Dict[str, Route] = {}
+        self._by_fixes: Dict[Tuple[str, ...], str] = {}
+        self._waypoints: Dict[str, Tuple[str, ...]] = {}
+        self._waypoint_sets: Dict[str, FrozenSet[str]] = {}
+        self._geometry: Dict[str, _RouteGeometry] = {}
+        for route in routes:
+            fixes = tuple(x[0] for x in route.fix_list)
+            self._routes[route.name] = route
+            # NOTE(rkm 2020-06-17) The first route is used if any have the same fixes
+            self._by_fixes.setdefault(fixes, route.name)
+            self._waypoints[route.name] = fixes
+            self._waypoint_sets[route.name] = frozenset(fixes)
+            self._geometry[route.name] = _RouteGeometry(route)
+
+    def __getitem__(self, route_name: str) -> Route:
+        return self._routes[route_name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._routes)
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def match(self, fix_names: Iterable[str]) -> Optional[str]:
+        """Returns the name of the route with the given fixes, if there is one"""
+        return self._by_fixes.get(tuple(fix_names))
+
+    def waypoints(self, route_name: str) -> List[str]:
+        """Returns the names of the waypoints in the route"""
+        return list(self._waypoints[route_name])
+
+    def has_waypoint(self, route_name: str, waypoint: str) -> bool:
+        """Checks if the waypoint is in the route"""
+        return waypoint in self._waypoint_sets[route_name]
+
+    def next_waypoint(self, route_name: str, lat: float, lon: float) -> str:
+        """Returns the next waypoint on the route for an aircraft at the position"""
+        return self.next_waypoints([route_name], np.array([lat]), np.array([lon]))[0]
+
+    def next_waypoints(
+        self, route_names: Sequence[str], lats: np.ndarray, lons: np.ndarray
+    ) -> List[Optional[str]]:
+        """
+        Returns the next waypoint for each of the aircraft, given their routes and
+        positions. The aircraft on each route are handled together. None is returned
+        for any aircraft whose position is unknown
+        """
+
+        next_waypoints: List[Optional[str]] = [None] * len(route_names)
+        by_route: Dict[str, List[int]] = {}
+        for i, route_name in enumerate(route_names):
+            by_route.setdefault(route_name, []).append(i)
+
+        for route_name, idxs in by_route.items():
+            idxs = np.array(idxs)
+            idxs = idxs[~(np.isnan(lats[idxs]) | np.isnan(lons[idxs]))]
+            if not len(idxs):
+                continue
+            fixes = self._waypoints[route_name]
+            next_fixes = self._geometry[route_name].next_fixes(lats[idxs], lons[idxs])
+            for i, fix in zip(idxs, next_fixes):
+                next_waypoints[i] = fixes[fix]
+
+        return next_waypoints
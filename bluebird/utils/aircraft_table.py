@@ -0,0 +1,138 @@
+"""
+Contains the AircraftTable class, which holds the aircraft data received from the
+simulator in columnar form. Currently created from BlueSky ACDATA frames
+"""
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import KeysView
+from typing import Mapping
+from typing import Optional
+from typing import Union
+
+import numpy as np
+
+import bluebird.utils.properties as props
+import bluebird.utils.types as types
+from bluebird.utils.units import METERS_PER_FOOT
+
+
+class AircraftTable(Mapping):
+    """
+    Read-only mapping of callsign to AircraftProperties, backed by the numpy columns
+    from a single ACDATA frame. The unit conversions and validation are done in one
+    vectorised pass when the table is created, and the AircraftProperties for an
+    aircraft are only created (then cached) when it is accessed
+    """
+
+    def __init__(self, data: Mapping[str, Any]):
+        """
+        :param data: The decoded ACDATA stream data
+        :raises ValueError: If the data contains any invalid aircraft
+        """
+
+        ids = np.char.upper(np.asarray(data["id"], dtype=str))
+        self.callsigns = ids
+        self.aircraft_types = np.asarray(data["actype"], dtype=str)
+        self.altitudes_ft = np.asarray(data["alt"], dtype=float) / METERS_PER_FOOT
+        self.ground_speeds = np.asarray(data["gs"], dtype=float).astype(int)
+        self.headings = np.asarray(data["trk"], dtype=float).astype(int) % 360
+        self.lats = np.asarray(data["lat"], dtype=float)
+        self.lons = np.asarray(data["lon"], dtype=float)
+        self.vertical_speeds = (
+            np.asarray(data["vs"], dtype=float) * 60 / METERS_PER_FOOT
+        ).astype(int)
+
+        lengths = {len(x) for x in self._columns()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths {sorted(lengths)}")
+
+        # NOTE(rkm 2020-06-10) Equivalent to the checks done by the types constructors.
+        # The callsign regex only checks the first 3 characters
+        prefixes = ids.astype("<U3")
+        valid = (
+            (np.char.str_len(prefixes) == 3)
+            & np.char.isalnum(prefixes)
+            & (np.char.str_len(self.aircraft_types) > 0)
+            & (self.altitudes_ft >= 0)
+            & (self.ground_speeds >= 0)
+            & (np.abs(self.lats) <= 90)
+            & (np.abs(self.lons) <= 180)
+        )
+        if not valid.all():
+            raise ValueError(f"Invalid data for aircraft {ids[~valid].tolist()}")
+
+        self._rows: Dict[str, int] = {x: i for i, x in enumerate(ids.tolist())}
+        self._props: Dict[int, props.AircraftProperties] = {}
+
+    def __getitem__(self, callsign: Union[types.Callsign, str]):
+        row = self.row(callsign)
+        if row is None:
+            raise KeyError(callsign)
+        ac_props = self._props.get(row)
+        if not ac_props:
+            ac_props = self._props[row] = self._create_props(row)
+        return ac_props
+
+    def __contains__(self, callsign: Any) -> bool:
+        return self.row(callsign) is not None
+
+    def __iter__(self) -> Iterator[types.Callsign]:
+        return (types.Callsign.intern(x) for x in self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def ids(self) -> KeysView[str]:
+        """The (uppercase) callsign strings of all the aircraft"""
+        return self._rows.keys()
+
+    def row(self, callsign: Union[types.Callsign, str]) -> Optional[int]:
+        """Returns the index of the aircraft in the columns, or None if not present"""
+        if isinstance(callsign, types.Callsign):
+            # NOTE(rkm 2020-06-10) Callsign values are already uppercase
+            return self._rows.get(callsign.value)
+        if isinstance(callsign, str):
+            return self._rows.get(callsign.upper())
+        return None
+
+    def rows(self, ids: Iterable[str]) -> np.ndarray:
+        """
+        Returns the row indices for the given (uppercase) callsign strings
+        :raises KeyError: If any of the aircraft are not present
+        """
+        rows = self._rows
+        return np.fromiter((rows[x] for x in ids), dtype=int)
+
+    def _columns(self):
+        return (
+            self.callsigns,
+            self.aircraft_types,
+            self.altitudes_ft,
+            self.ground_speeds,
+            self.headings,
+            self.lats,
+            self.lons,
+            self.vertical_speeds,
+        )
+
+    def _create_props(self, row: int) -> props.AircraftProperties:
+        # NOTE(rkm 2020-06-10) The data has already been validated, so the trusted
+        # constructors can be used
+        return props.AircraftProperties(
+            aircraft_type=self.aircraft_types[row].item(),
+            altitude=types.Altitude.trusted(self.altitudes_ft[row].item()),
+            callsign=types.Callsign.intern(self.callsigns[row].item()),
+            cleared_flight_level=None,
+            ground_speed=types.GroundSpeed.trusted(self.ground_speeds[row].item()),
+            heading=types.Heading.trusted(self.headings[row].item()),
+            initial_flight_level=None,
+            position=types.LatLon.trusted(self.lats[row].item(), self.lons[row].item()),
+            requested_flight_level=None,
+            route_name=None,
+            vertical_speed=types.VerticalSpeed.trusted(
+                self.vertical_speeds[row].item()
+            ),
+        )
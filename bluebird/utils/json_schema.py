@@ -0,0 +1,43 @@
+"""
+Contains utility functions for JSON schema validation
+"""
+from typing import Any
+from typing import Optional
+
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+
+def _inline_refs(schema: Any, definitions: dict) -> Any:
+    """Replaces any local references with the definitions they refer to"""
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            name = schema["$ref"].rsplit("/", 1)[-1]
+            return _inline_refs(definitions[name], definitions)
+        return {
+            x: _inline_refs(y, definitions)
+            for x, y in schema.items()
+            if x != "definitions"
+        }
+    if isinstance(schema, list):
+        return [_inline_refs(x, definitions) for x in schema]
+    return schema
+
+
+def compile_validator(schema: dict):
+    """
+    Returns a validator for the schema, which can be re-used for each instance. Any
+    references to "#/definitions/..." are inlined, since resolving them is slow for
+    large instances. The schema must not be recursive
+    """
+    # NOTE(rkm 2020-06-19) This matches jsonschema.validate, which picks the validator
+    # class based on the schema
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(_inline_refs(schema, schema.get("definitions", {})))
+
+
+def validation_error(validator, instance: Any) -> Optional[str]:
+    """Returns the most relevant validation error for the instance, if there is one"""
+    err = best_match(validator.iter_errors(instance))
+    return str(err) if err else None
@@ -0,0 +1,110 @@
+"""
+Contains utility classes for recording latency histograms
+"""
+import bisect
+import threading
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+
+# Upper bounds (in milliseconds) of the histogram buckets. Values above the last bound
+# are counted in an additional overflow bucket
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of latencies with fixed, roughly logarithmic, buckets"""
+
+    @property
+    def count(self) -> int:
+        """The number of latencies recorded"""
+        return self._count
+
+    @property
+    def mean_ms(self) -> float:
+        """The mean of the recorded latencies in milliseconds"""
+        return self._total_ms / self._count if self._count else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        """The maximum recorded latency in milliseconds"""
+        return self._max_ms
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: List[int] = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self._count = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record a single latency, given in seconds"""
+        millis = seconds * 1000
+        idx = bisect.bisect_left(BUCKET_BOUNDS_MS, millis)
+        with self._lock:
+            self._buckets[idx] += 1
+            self._count += 1
+            self._total_ms += millis
+            self._max_ms = max(self._max_ms, millis)
+
+    def percentile_ms(self, pct: float) -> float:
+        """
+        Returns an upper bound for the given percentile, in milliseconds. This is the
+        bound of the bucket which contains the percentile (or the max latency if the
+        percentile falls in the overflow bucket)
+        """
+        assert 0 <= pct <= 100, "Percentile must satisfy 0 <= x <= 100"
+        with self._lock:
+            if not self._count:
+                return 0.0
+            target = pct / 100 * self._count
+            seen = 0
+            for idx, bucket_count in enumerate(self._buckets):
+                seen += bucket_count
+                if seen >= target and bucket_count:
+                    break
+        if idx == len(BUCKET_BOUNDS_MS):
+            return self._max_ms
+        return min(float(BUCKET_BOUNDS_MS[idx]), self._max_ms)
+
+    def buckets(self) -> List[Tuple[str, int]]:
+        """Returns the (label, count) pair for each bucket"""
+        labels = [f"<={x}ms" for x in BUCKET_BOUNDS_MS]
+        labels.append(f">{BUCKET_BOUNDS_MS[-1]}ms")
+        with self._lock:
+            return list(zip(labels, self._buckets))
+
+    def summary(self) -> str:
+        """Returns a short human-readable summary of the histogram"""
+        return (
+            f"n={self.count} mean={self.mean_ms:.1f}ms "
+            f"p50<={self.percentile_ms(50):.0f}ms p99<={self.percentile_ms(99):.0f}ms "
+            f"max={self.max_ms:.1f}ms"
+        )
+
+
+class LatencyRecorder:
+    """Collection of LatencyHistograms, keyed by name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a latency (in seconds) in the histogram with the given name"""
+        histogram = self._histograms.get(name)
+        if not histogram:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+        histogram.record(seconds)
+
+    def get(self, name: str) -> LatencyHistogram:
+        """Returns the histogram with the given name, or an empty histogram"""
+        return self._histograms.get(name) or LatencyHistogram()
+
+    def __iter__(self) -> Iterator[Tuple[str, LatencyHistogram]]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+        yield from items
@@ -2,11 +2,13 @@
 Contains property class definitions
 """
 from dataclasses import dataclass
+from dataclasses import field
 from datetime import datetime
 from enum import IntEnum
 from typing import Any
 from typing import Dict
 from typing import Optional
+from typing import Tuple
 
 from aviary.sector.sector_element import SectorElement
 
@@ -117,6 +119,10 @@ class AircraftProperties:
     requested_flight_level: types.Altitude
     route_name: str
     vertical_speed: types.VerticalSpeed
+    # The last commanded targets. These are only tracked by BlueBird
+    cleared_heading: Optional[types.Heading] = None
+    cleared_ground_speed: Optional[types.GroundSpeed] = None
+    cleared_vertical_speed: Optional[types.VerticalSpeed] = None
 
     def __post_init__(self):
         assert self.aircraft_type, "Aircraft type must be defined"
@@ -130,7 +136,7 @@ class AircraftProperties:
         return cls(
             aircraft_type=data["type"],
             altitude=types.Altitude(f"FL{data['currentFlightLevel']}"),
-            callsign=types.Callsign(data["callsign"]),
+            callsign=types.Callsign.intern(data["callsign"]),
             cleared_flight_level=types.Altitude(f"FL{data['clearedFlightLevel']}"),
             ground_speed=None,
             # TODO(rkm 2020-01-22) Check if we should know the initial heading here
@@ -142,3 +148,15 @@ class AircraftProperties:
             route_name=None,
             vertical_speed=None,
         )
+
+
+@dataclass
+class AircraftCommand:
+    """
+    Dataclass representing a single aircraft command, for sending as part of a batch.
+    The name is that of the corresponding AbstractAircraftControls method
+    """
+
+    name: str
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
@@ -1,10 +1,16 @@
 """
 Contains functions to validate scenario and sector data
 """
+import math
+from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from aviary.sector.sector_element import SectorElement
+
+from bluebird.utils.json_schema import compile_validator
+from bluebird.utils.json_schema import validation_error
 
 
 _START_TIME_RE = r"\d{2}:\d{2}:\d{2}"
@@ -69,9 +75,50 @@ _SCENARIO_SCHEMA = {
 }
 
 
+_VALIDATOR = compile_validator(_SCENARIO_SCHEMA)
+
+# Max. difference (in degrees) between the fix coordinates in the scenario and sector
+_FIX_COORD_TOLERANCE = 1e-6
+
+
 def validate_json_scenario(data: dict) -> Optional[str]:
     """Returns an error description if the given scenario is invalid, otherwise None"""
-    try:
-        validate(instance=data, schema=_SCENARIO_SCHEMA)
-    except ValidationError as exc:
-        return str(exc)
+    return validation_error(_VALIDATOR, data)
+
+
+def validate_scenario_against_sector(
+    sector: SectorElement, scenario: dict
+) -> Tuple[Optional[str], List[str]]:
+    """
+    Checks that all the fixes in the scenario routes exist in the sector. Returns an
+    error description if any are missing, and a warning for each fix whose coordinates
+    in the scenario don't match those in the sector
+    """
+
+    sector_fixes = sector.shape.fixes
+    warnings: List[str] = []
+    # The (fix name, coordinates) pairs which have already been checked
+    checked: Set[Tuple[str, Tuple[float, ...]]] = set()
+
+    for aircraft in scenario["aircraft"]:
+        for route_item in aircraft.get("route", ()):
+            fix_name = route_item["fixName"]
+            fix = sector_fixes.get(fix_name)
+            if fix is None:
+                return f"Fix {fix_name} not in {list(sector_fixes)}", warnings
+            if "geometry" not in route_item:
+                continue
+            coords = tuple(route_item["geometry"]["coordinates"])
+            if (fix_name, coords) in checked:
+                continue
+            checked.add((fix_name, coords))
+            if len(coords) < 2 or not all(
+                math.isclose(x, y, abs_tol=_FIX_COORD_TOLERANCE)
+                for x, y in zip(coords, (fix.x, fix.y))
+            ):
+                warnings.append(
+                    f"Fix {fix_name} is at {list(coords)} in the scenario, but "
+                    f"{[fix.x, fix.y]} in the sector"
+                )
+
+    return None, warnings
@@ -0,0 +1,172 @@
+"""
+Contains the SectorCache class
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import geojson
+from aviary.sector.sector_element import SectorElement
+
+from bluebird.settings import Settings
+from bluebird.utils.sector_validation import validate_geojson_sector
+
+
+class CachedSector:
+    """A parsed sector, and its GeoJSON (which is only serialised when first used)"""
+
+    __slots__ = ("content_hash", "element", "size", "_geojson")
+
+    def __init__(self, content_hash: str, element: SectorElement, size: int):
+        self.content_hash = content_hash
+        self.element = element
+        self.size = size
+        self._geojson: Optional[str] = None
+
+    @property
+    def geojson(self) -> str:
+        """The serialised GeoJSON of the sector element"""
+        if self._geojson is None:
+            self._geojson = geojson.dumps(self.element)
+            self.size += len(self._geojson)
+        return self._geojson
+
+
+class SectorCache:
+    """
+    LRU cache of the parsed sectors, keyed by a hash of their content. Sector files are
+    also tracked by their modification time and size, so that they are only re-read
+    and re-validated if they change. The least-recently used sectors are evicted once
+    the total size of their content exceeds Settings.SECTOR_CACHE_SIZE
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self._logger = logging.getLogger(__name__)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._sectors: "OrderedDict[str, CachedSector]" = OrderedDict()
+        self._files: Dict[Tuple[str, int, int], str] = {}
+        self._elements: Dict[int, str] = {}
+
+    @property
+    def max_size(self) -> int:
+        """The max. total size of the cached sectors"""
+        return (
+            self._max_size if self._max_size is not None else Settings.SECTOR_CACHE_SIZE
+        )
+
+    def __len__(self) -> int:
+        return len(self._sectors)
+
+    def from_geojson(self, sector_json: dict) -> Union[CachedSector, str]:
+        """Returns the parsed sector, or an error string if the content is invalid"""
+
+        content = json.dumps(sector_json, sort_keys=True, separators=(",", ":"))
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        with self._lock:
+            cached = self._get(content_hash)
+        if cached:
+            return cached
+
+        sector_element = validate_geojson_sector(sector_json)
+        if not isinstance(sector_element, SectorElement):
+            return sector_element
+
+        cached = CachedSector(content_hash, sector_element, len(content))
+        with self._lock:
+            self._sectors[content_hash] = cached
+            self._elements[id(sector_element)] = content_hash
+            self._evict()
+        return cached
+
+    def from_file(self, sector_file: Path) -> Union[CachedSector, str]:
+        """
+        Returns the parsed sector from the file, or an error string. The file is only
+        read if it has changed since it was last seen
+        """
+
+        file_key = self._file_key(sector_file)
+        with self._lock:
+            cached = self._get(self._files.get(file_key))
+        if cached:
+            return cached
+
+        with open(sector_file) as f:
+            sector_json = json.load(f)
+        cached = self.from_geojson(sector_json)
+        if isinstance(cached, CachedSector):
+            self._set_file(file_key, cached)
+        return cached
+
+    def saved_file(self, sector_file: Path, sector_element: SectorElement) -> None:
+        """Records that the sector file was written from the (cached) sector element"""
+        with self._lock:
+            cached = self._get(self._elements.get(id(sector_element)))
+        if cached and cached.element is sector_element:
+            self._set_file(self._file_key(sector_file), cached)
+
+    def is_saved(self, sector_file: Path, sector_element: SectorElement) -> bool:
+        """Checks if the file already contains the (cached) sector element"""
+        if not sector_file.exists():
+            return False
+        file_key = self._file_key(sector_file)
+        with self._lock:
+            cached = self._sectors.get(self._files.get(file_key))
+        return bool(cached) and cached.element is sector_element
+
+    def geojson(self, sector_element: SectorElement) -> str:
+        """
+        Returns the serialised GeoJSON of the sector element. This is cached if the
+        element came from the cache
+        """
+        with self._lock:
+            cached = self._sectors.get(self._elements.get(id(sector_element)))
+        if cached and cached.element is sector_element:
+            return cached.geojson
+        return geojson.dumps(sector_element)
+
+    def clear(self) -> None:
+        """Removes all the cached sectors"""
+        with self._lock:
+            self._sectors.clear()
+            self._files.clear()
+            self._elements.clear()
+
+    def _get(self, content_hash: Optional[str]) -> Optional[CachedSector]:
+        """Gets a sector and marks it as recently used. The lock must be held"""
+        cached = self._sectors.get(content_hash)
+        if cached:
+            self._sectors.move_to_end(content_hash)
+        return cached
+
+    def _set_file(self, file_key: Tuple[str, int, int], cached: CachedSector) -> None:
+        with self._lock:
+            if cached.content_hash in self._sectors:
+                self._files[file_key] = cached.content_hash
+
+    def _evict(self) -> None:
+        """Evicts the least-recently used sectors. The lock must be held"""
+        # NOTE(rkm 2020-06-18) The most recent sector is always kept
+        total_size = sum(x.size for x in self._sectors.values())
+        while total_size > self.max_size and len(self._sectors) > 1:
+            content_hash, cached = self._sectors.popitem(last=False)
+            total_size -= cached.size
+            self._elements.pop(id(cached.element), None)
+            self._files = {x: y for x, y in self._files.items() if y != content_hash}
+            self._logger.debug(f"Evicted sector {content_hash}")
+
+    @staticmethod
+    def _file_key(sector_file: Path) -> Tuple[str, int, int]:
+        stat = sector_file.stat()
+        return (str(sector_file.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+# The cache shared by the API and the proxy
+SECTOR_CACHE = SectorCache()
@@ -9,7 +9,9 @@ from io import StringIO
 from typing import Union
 
 from aviary.sector.sector_element import SectorElement
-from jsonschema import validate
+
+from bluebird.utils.json_schema import compile_validator
+from bluebird.utils.json_schema import validation_error
 
 
 _SECTOR_SCHEMA = {
@@ -69,10 +71,15 @@ _SECTOR_SCHEMA = {
 }
 
 
+_VALIDATOR = compile_validator(_SECTOR_SCHEMA)
+
+
 def validate_geojson_sector(geojson: dict) -> Union[SectorElement, str]:
     """Returns a SectorElement or an error string"""
     try:
-        validate(instance=geojson, schema=_SECTOR_SCHEMA)
+        err = validation_error(_VALIDATOR, geojson)
+        if err:
+            return err
         # TODO (RKM 2019-12-20) Check what exceptions this can throw
         return SectorElement.deserialise(StringIO(json.dumps(geojson)))
     except Exception as exc:
@@ -6,15 +6,18 @@ import sys
 from threading import Event
 from threading import Thread
 from time import sleep
+from typing import Optional
 
 
 class Timer(Thread):
     """Simple timer which calls the given method periodically"""
 
-    def __init__(self, method, tickrate, *args, **kwargs):
+    def __init__(self, method, tickrate: Optional[float], *args, **kwargs):
         """
         :param method: The method to call periodically
-        :param tickrate: The rate per second at which the method is called
+        :param tickrate: The rate per second at which the method is called. If None,
+        then the method is called again as soon as it returns (i.e. the method itself
+        is expected to block)
         :param args: Positional arguments to call the method with
         :param kwargs: Keyword arguments to call the method with
         """
@@ -24,8 +27,10 @@ class Timer(Thread):
         self._event = Event()
         self._cmd = lambda: method(*args, **kwargs)
 
-        self._check_rate(tickrate)
-        self._sleep_time = 1 / tickrate
+        self._sleep_time = None
+        if tickrate is not None:
+            self._check_rate(tickrate)
+            self._sleep_time = 1 / tickrate
 
         self.disabled = False
         self.started = False
@@ -33,6 +38,11 @@ class Timer(Thread):
         self._logger = logging.getLogger(f"{__name__}[{self._name}]")
         self.exc_info = None
 
+    @property
+    def exited(self) -> bool:
+        """Whether the thread has exited, either by being stopped or from an error"""
+        return self._exited
+
     def run(self):
         """
         Start the timer
@@ -43,7 +53,11 @@ class Timer(Thread):
             while not self._event.is_set():
                 if not self.disabled:
                     self._cmd()
-                sleep(self._sleep_time)
+                elif not self._sleep_time:
+                    # Avoid spinning if a blocking method has been disabled
+                    self._event.wait(0.1)
+                if self._sleep_time:
+                    sleep(self._sleep_time)
         except Exception:
             self._logger.error("Thread threw an exception")
             self.exc_info = sys.exc_info()
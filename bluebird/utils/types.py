@@ -1,8 +1,12 @@
 """
-Contains utility dataclasses representing physical units
+Contains utility dataclasses representing physical units. The normal constructors
+validate their arguments, and should be used for any user input. Data from the
+simulators can be created with the (unvalidated) trusted constructors
 """
 import re
 from dataclasses import dataclass
+from typing import Dict
+from typing import Iterable
 from typing import Union
 
 from bluebird.utils.units import METERS_PER_FOOT
@@ -11,6 +15,9 @@ from bluebird.utils.units import METERS_PER_FOOT
 _FL_REGEX = re.compile(r"^FL[0-9]\d*$")
 _CALLSIGN_REGEX = re.compile(r"^[A-Z0-9]{3,}")
 
+# Used by the trusted constructors to create instances without calling __init__
+_new = object.__new__
+
 
 def is_valid_seed(seed: int) -> bool:
     """Checks if the given int is a valid seed"""
@@ -24,6 +31,8 @@ class Altitude:
     Dataclass representing an altitude in feet
     """
 
+    __slots__ = ("feet",)
+
     feet: int
 
     def __init__(self, alt: Union[int, str]):
@@ -42,6 +51,16 @@ class Altitude:
             assert alt >= 0, "Altitude must be positive"
             self.feet = alt
 
+    @classmethod
+    def trusted(cls, feet: Union[int, float]) -> "Altitude":
+        """
+        Creates an Altitude without validation. Only for use with data which is known
+        to be valid, e.g. from the simulator
+        """
+        obj = _new(cls)
+        obj.feet = feet
+        return obj
+
     @property
     def meters(self) -> int:
         """
@@ -67,19 +86,78 @@ class Callsign:
     converted to uppercase
     """
 
+    __slots__ = ("value",)
+
     value: str
 
     def __post_init__(self):
         self.value = self.value.upper()
         assert _CALLSIGN_REGEX.match(self.value), f"Invalid callsign '{self.value}'"
 
+    @classmethod
+    def trusted(cls, value: str) -> "Callsign":
+        """Creates a Callsign without validation. The value must already be uppercase"""
+        obj = _new(cls)
+        obj.value = value
+        return obj
+
+    @classmethod
+    def intern(cls, value: str) -> "Callsign":
+        """
+        Returns the canonical Callsign for the given value, adding it to the pool if
+        required. Should be used for the aircraft in the simulation, which must be
+        released from the pool once they are removed
+        """
+        callsign = _CALLSIGN_POOL.get(value)
+        if callsign is None:
+            callsign = cls(value)
+            callsign = _CALLSIGN_POOL.setdefault(callsign.value, callsign)
+        return callsign
+
+    @classmethod
+    def canonical(cls, value: str) -> "Callsign":
+        """
+        Returns the canonical Callsign for the given value if it is in the pool, or a
+        new (validated) Callsign otherwise. Used to parse API input without growing the
+        pool
+        """
+        callsign = _CALLSIGN_POOL.get(value)
+        if callsign is None:
+            callsign = cls(value)
+            callsign = _CALLSIGN_POOL.get(callsign.value, callsign)
+        return callsign
+
+    @staticmethod
+    def release(values: Iterable[str]) -> None:
+        """Removes the given (uppercase) callsign values from the pool"""
+        for value in values:
+            _CALLSIGN_POOL.pop(value, None)
+
+    @staticmethod
+    def clear_pool() -> None:
+        """Removes all callsigns from the pool"""
+        _CALLSIGN_POOL.clear()
+
+    def __eq__(self, other):
+        # NOTE(rkm 2020-06-11) Interned callsigns can be compared by identity
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.value == other.value
+
     def __hash__(self):
+        # NOTE(rkm 2020-06-11) Strings cache their own hash
         return hash(self.value)
 
     def __repr__(self):
         return self.value
 
 
+# Pool of the canonical Callsign instances, keyed by their value
+_CALLSIGN_POOL: Dict[str, Callsign] = {}
+
+
 # TODO(RKM 2019-11-23) Add support for parsing Mach numbers
 @dataclass(eq=True)
 class GroundSpeed:
@@ -87,6 +165,8 @@ class GroundSpeed:
     Dataclass representing an aircraft's ground speed [meters/sec]
     """
 
+    __slots__ = ("meters_per_sec",)
+
     meters_per_sec: float
 
     def __post_init__(self):
@@ -95,6 +175,13 @@ class GroundSpeed:
         ), "Ground speed must be numeric"
         assert self.meters_per_sec >= 0, "Ground speed must be positive"
 
+    @classmethod
+    def trusted(cls, meters_per_sec: Union[int, float]) -> "GroundSpeed":
+        """Creates a GroundSpeed without validation"""
+        obj = _new(cls)
+        obj.meters_per_sec = meters_per_sec
+        return obj
+
     @property
     def feet_per_sec(self) -> int:
         """
@@ -112,6 +199,8 @@ class Heading:
     Dataclass representing an aircraft's heading [°]
     """
 
+    __slots__ = ("degrees",)
+
     degrees: int
 
     def __post_init__(self):
@@ -119,6 +208,13 @@ class Heading:
         self.degrees = self.degrees % 360
         assert 0 <= self.degrees < 360, "Heading must satisfy 0 <= x < 360"
 
+    @classmethod
+    def trusted(cls, degrees: int) -> "Heading":
+        """Creates a Heading without validation. The value must satisfy 0 <= x < 360"""
+        obj = _new(cls)
+        obj.degrees = degrees
+        return obj
+
     def __repr__(self):
         return str(self.degrees)
 
@@ -129,6 +225,8 @@ class LatLon:
     Dataclass representing a lat/lon pair
     """
 
+    __slots__ = ("lat_degrees", "lon_degrees")
+
     lat_degrees: float
     lon_degrees: float
 
@@ -139,6 +237,14 @@ class LatLon:
         assert abs(self.lat_degrees) <= 90, "Latitude must satisfy abs(x) <= 90"
         assert abs(self.lon_degrees) <= 180, "Longitude must satisfy abs(x) <= 180"
 
+    @classmethod
+    def trusted(cls, lat_degrees: float, lon_degrees: float) -> "LatLon":
+        """Creates a LatLon without validation"""
+        obj = _new(cls)
+        obj.lat_degrees = lat_degrees
+        obj.lon_degrees = lon_degrees
+        return obj
+
     def __repr__(self):
         return f"{self.lat_degrees:f} {self.lon_degrees:f}"
 
@@ -149,11 +255,20 @@ class VerticalSpeed:
     Dataclass representing a vertical speed [feet/min]
     """
 
+    __slots__ = ("feet_per_min",)
+
     feet_per_min: int
 
     def __post_init__(self):
         assert isinstance(self.feet_per_min, int), "Vertical speed must be an integer"
 
+    @classmethod
+    def trusted(cls, feet_per_min: int) -> "VerticalSpeed":
+        """Creates a VerticalSpeed without validation"""
+        obj = _new(cls)
+        obj.feet_per_min = feet_per_min
+        return obj
+
     def __repr__(self):
         return str(self.feet_per_min)
 
@@ -33,6 +33,16 @@ def _parse_args() -> Dict[str, Any]:
         help="Resets the simulation on connection",
     )
     parser.add_argument("--log-rate", type=float, help="Log rate in sim-seconds")
+    parser.add_argument(
+        "--bs-async",
+        action=_ARG_BOOL_ACTION,
+        help="Use the asyncio client when connecting to BlueSky",
+    )
+    parser.add_argument(
+        "--defer-cmds",
+        action=_ARG_BOOL_ACTION,
+        help="In agent mode, queue the aircraft commands until the next step",
+    )
     # NOTE(RKM 2019-11-21) Disabled until we re-implement the free-run mode
     # parser.add_argument(
     #     "--sim-mode",
@@ -57,6 +67,12 @@ def _parse_args() -> Dict[str, Any]:
     if args.sim_type:
         Settings.SIM_TYPE = args.sim_type
 
+    if args.bs_async:
+        Settings.BS_ASYNC_CLIENT = True
+
+    if args.defer_cmds:
+        Settings.DEFER_COMMANDS = True
+
     return vars(args)
 
 
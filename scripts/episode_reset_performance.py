@@ -0,0 +1,78 @@
+"""
+Measures the time taken to reset an episode (i.e. to re-load a scenario) through the
+API. Run this against different BlueBird versions to compare them. Requires that the
+sector and scenario have already been uploaded
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+
+API_URL_BASE = "http://localhost:5001/api/v2"
+
+
+def measure_episode_reset(sector, scenario, episodes, steps):
+    """
+    Measure the time taken to load the scenario at the start of each episode
+    :param sector: Name of the sector to use
+    :param scenario: Name of the scenario to load for each episode
+    :param episodes: The number of episodes to run
+    :param steps: The number of steps in each episode
+    :return:
+    """
+
+    resp = requests.post(f"{API_URL_BASE}/sector", json={"name": sector})
+    assert resp.status_code == 201, f"Expected the sector to be loaded: {resp.text}"
+
+    times = []
+
+    try:
+        for episode in range(episodes):
+            print(f"Episode {episode + 1}")
+
+            start = time.perf_counter()
+
+            resp = requests.post(f"{API_URL_BASE}/scenario", json={"name": scenario})
+            assert resp.status_code == 201, "Expected the scenario to be loaded"
+
+            times.append(time.perf_counter() - start)
+
+            for _ in range(steps):
+                resp = requests.post(f"{API_URL_BASE}/step")
+                assert resp.status_code == 200, "Expected the simulation was stepped"
+
+    except KeyboardInterrupt:
+        print("Cancelled")
+
+    if not times:
+        print("No data collected")
+        return
+
+    print(f"times: {[round(x, 3) for x in times]}")
+    print(
+        f"Episode reset time: mean {statistics.mean(times):.3f}s, "
+        f"median {statistics.median(times):.3f}s, max {max(times):.3f}s "
+        f"({len(times)} episodes)"
+    )
+
+
+def main():
+    """
+    Main
+    :return:
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sector", type=str, required=True)
+    parser.add_argument("--scenario", type=str, required=True)
+    parser.add_argument("--episodes", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=1)
+    args = parser.parse_args()
+
+    measure_episode_reset(args.sector, args.scenario, args.episodes, args.steps)
+
+
+if __name__ == "__main__":
+    main()
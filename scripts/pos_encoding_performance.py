@@ -0,0 +1,105 @@
+"""
+Measures the time taken to encode (and decode) the properties of many aircraft, in each
+of the encodings supported by GET /pos. Run this against different BlueBird versions
+to compare them
+"""
+import argparse
+import dataclasses
+import io
+import json
+import timeit
+
+import msgpack
+import numpy as np
+
+import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.utils.properties import AircraftProperties
+
+
+def make_store(n_aircraft: int) -> AircraftStore:
+    """
+    Creates a snapshot containing the given number of aircraft
+    :param n_aircraft:
+    :return:
+    """
+
+    props = AircraftProperties(
+        aircraft_type="B744",
+        altitude=types.Altitude("FL250"),
+        callsign=types.Callsign("TEST"),
+        cleared_flight_level=types.Altitude("FL300"),
+        ground_speed=types.GroundSpeed(200),
+        heading=types.Heading(90),
+        initial_flight_level=types.Altitude("FL250"),
+        position=types.LatLon(51.5, -0.1),
+        requested_flight_level=types.Altitude("FL350"),
+        route_name="ROUTE1",
+        vertical_speed=types.VerticalSpeed(0),
+    )
+    store = AircraftStore()
+    for i in range(n_aircraft):
+        callsign = types.Callsign(f"TEST{i}")
+        store.add(callsign, dataclasses.replace(props, callsign=callsign))
+    return store.snapshot(1)
+
+
+def measure_encodings(sizes, number):
+    """
+    Measure the encode and decode times for snapshots of each size
+    :param sizes: The numbers of aircraft in each snapshot
+    :param number: The number of times to encode each snapshot
+    :return:
+    """
+
+    try:
+        import bluebird.api.resources.utils.encodings as encodings
+    except ImportError:
+        encodings = None
+
+    def encode_json(store):
+        return json.dumps(utils.convert_all_aircraft_props(store))
+
+    encoders = {"json": (encode_json, json.loads)}
+    if encodings:
+        encoders["msgpack"] = (
+            lambda x: encodings.to_msgpack({"aircraft": encodings.aircraft_columns(x)}),
+            lambda x: msgpack.unpackb(x, raw=False),
+        )
+        encoders["npy"] = (
+            lambda x: encodings.to_npy(encodings.aircraft_columns(x)),
+            lambda x: np.load(io.BytesIO(x), allow_pickle=False),
+        )
+
+    print(f"{'aircraft':>10}{'encoding':>10}{'encode (ms)':>14}{'decode (ms)':>14}")
+    for size in sizes:
+        for name, (encode, decode) in encoders.items():
+            # NOTE(rkm 2020-06-21) A new snapshot is used each time, so that any cached
+            # AircraftProperties are not re-used
+            stores = [make_store(size) for _ in range(number)]
+            encode_time = timeit.timeit(lambda: encode(stores.pop()), number=number)
+            data = encode(make_store(size))
+            decode_time = timeit.timeit(lambda: decode(data), number=number)
+            print(
+                f"{size:>10}{name:>10}{1e3 * encode_time / number:>14.1f}"
+                f"{1e3 * decode_time / number:>14.1f}"
+            )
+
+
+def main():
+    """
+    Main
+    :return:
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    measure_encodings(args.sizes, args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures the memory use and construction time of the value types in
+bluebird.utils.types. Run this against different BlueBird versions to compare them.
+The trusted constructors are also measured, if available
+"""
+import argparse
+import sys
+import timeit
+
+import bluebird.utils.types as types
+
+
+# Arguments for creating each type, as passed to the normal and trusted constructors
+_ARGS = {
+    types.Altitude: ((12_000,), (12_000,)),
+    types.Callsign: (("test123",), ("TEST123",)),
+    types.GroundSpeed: ((123.4,), (123.4,)),
+    types.Heading: ((450,), (90,)),
+    types.LatLon: ((51.5, -0.12), (51.5, -0.12)),
+    types.VerticalSpeed: ((-1000,), (-1000,)),
+}
+
+
+def object_size(obj) -> int:
+    """
+    Returns the size of the object in bytes, including its __dict__ (if it has one).
+    The sizes of the attribute values themselves are not included
+    :param obj:
+    :return:
+    """
+
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def measure_types(number):
+    """
+    Measure the size and construction time of each type
+    :param number: The number of objects to create when timing each constructor
+    :return:
+    """
+
+    print(f"{'type':<14}{'size (B)':>10}{'checked (ns)':>14}{'trusted (ns)':>14}")
+    for cls, (args, trusted_args) in _ARGS.items():
+        size = object_size(cls(*args))
+        checked = timeit.timeit(lambda: cls(*args), number=number) / number
+        trusted = "-"
+        if hasattr(cls, "trusted"):
+            trusted_time = timeit.timeit(
+                lambda: cls.trusted(*trusted_args), number=number
+            )
+            trusted = f"{1e9 * trusted_time / number:.0f}"
+        print(f"{cls.__name__:<14}{size:>10}{1e9 * checked:>14.0f}{trusted:>14}")
+
+
+def main():
+    """
+    Main
+    :return:
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    measure_types(args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures the time taken to validate scenarios with many aircraft, both against the
+scenario schema and against the test sector. Run this against different BlueBird
+versions to compare them
+"""
+import argparse
+import copy
+import json
+import timeit
+from pathlib import Path
+
+from bluebird.utils.scenario_validation import validate_json_scenario
+from bluebird.utils.sector_validation import validate_geojson_sector
+
+
+_TEST_DATA_DIR = Path("tests") / "data"
+
+
+def make_scenario(base_scenario: dict, n_aircraft: int) -> dict:
+    """
+    Creates a scenario with the given number of aircraft, by copying those in the base
+    scenario
+    :param base_scenario:
+    :param n_aircraft:
+    :return:
+    """
+
+    scenario = copy.deepcopy(base_scenario)
+    base_aircraft = base_scenario["aircraft"]
+    scenario["aircraft"] = []
+    for i in range(n_aircraft):
+        aircraft = copy.deepcopy(base_aircraft[i % len(base_aircraft)])
+        aircraft["callsign"] = f"TEST{i}"
+        scenario["aircraft"].append(aircraft)
+    return scenario
+
+
+def measure_validation(sizes, number):
+    """
+    Measure the validation time for scenarios of each size
+    :param sizes: The numbers of aircraft in each scenario
+    :param number: The number of times to validate each scenario
+    :return:
+    """
+
+    with open(_TEST_DATA_DIR / "test_sector.geojson") as f:
+        sector_element = validate_geojson_sector(json.load(f))
+    with open(_TEST_DATA_DIR / "test_scenario.json") as f:
+        base_scenario = json.load(f)
+
+    try:
+        from bluebird.utils.scenario_validation import validate_scenario_against_sector
+    except ImportError:
+        validate_scenario_against_sector = None
+
+    print(f"{'aircraft':>10}{'schema (ms)':>14}{'sector (ms)':>14}")
+    for size in sizes:
+        scenario = make_scenario(base_scenario, size)
+        schema_time = timeit.timeit(
+            lambda: validate_json_scenario(scenario), number=number
+        )
+        sector_time = "-"
+        if validate_scenario_against_sector:
+            sector_time = timeit.timeit(
+                lambda: validate_scenario_against_sector(sector_element, scenario),
+                number=number,
+            )
+            sector_time = f"{1e3 * sector_time / number:.1f}"
+        print(f"{size:>10}{1e3 * schema_time / number:>14.1f}{sector_time:>14}")
+
+
+def main():
+    """
+    Main
+    :return:
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    measure_validation(args.sizes, args.number)
+
+
+if __name__ == "__main__":
+    main()
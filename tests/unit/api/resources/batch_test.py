@@ -0,0 +1,145 @@
+"""
+Tests for the BATCH endpoint
+"""
+from http import HTTPStatus
+from unittest import mock
+
+import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.utils.properties import AircraftCommand
+from tests.unit.api.resources import endpoint_path
+from tests.unit.api.resources import patch_utils_path
+from tests.unit.api.resources import TEST_AIRCRAFT_PROPS
+
+
+_ENDPOINT = "batch"
+_ENDPOINT_PATH = endpoint_path(_ENDPOINT)
+
+
+def test_batch_post(test_flask_client):
+    """Tests the POST method"""
+
+    # Test arg parsing
+
+    resp = test_flask_client.post(_ENDPOINT_PATH)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    data = {"commands": [{"cmd": "FOO", utils.CALLSIGN_LABEL: "A380"}]}
+    resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode().startswith('Invalid command 0: Unknown command "FOO"')
+
+    data = {
+        "commands": [
+            {"cmd": "HDG", utils.CALLSIGN_LABEL: "A380", "hdg": 123},
+            {"cmd": "ALT", utils.CALLSIGN_LABEL: "A380"},
+        ]
+    }
+    resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == (
+        "Invalid command 1: alt: Missing required parameter in the JSON body"
+    )
+
+    data["commands"][1]["alt"] = "FL250"
+    data["commands"][1]["foo"] = 1
+    resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == "Invalid command 1: Unknown arguments: foo"
+
+    data["commands"][1].pop("foo")
+    data["commands"].append({"cmd": "direct", utils.CALLSIGN_LABEL: "A380"})
+    data["commands"][2]["waypoint"] = ""
+    resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == "Invalid command 2: Waypoint name must be specified"
+
+    data["commands"][2]["waypoint"] = "FIYRE"
+    data["commands"].append(
+        {
+            "cmd": "CRE",
+            utils.CALLSIGN_LABEL: "NEW1",
+            "type": "B744",
+            "lat": 0,
+            "lon": 0,
+            "hdg": 0,
+            "alt": 0,
+            "gspd": 0,
+        }
+    )
+    data["commands"].append({"cmd": "GSPD", utils.CALLSIGN_LABEL: "NEW1", "gspd": 50})
+    data["commands"].append({"cmd": "GSPD", utils.CALLSIGN_LABEL: "NEW2", "gspd": 50})
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+
+        # Test error from all_properties
+
+        sim_proxy_mock.aircraft.all_properties = "Error"
+
+        resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+        assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert resp.data.decode() == "Could not check if the aircraft exist: Error"
+        sim_proxy_mock.aircraft.batch.assert_not_called()
+
+        # Test valid response
+
+        store = AircraftStore()
+        callsign = types.Callsign("A380")
+        store.add(callsign, TEST_AIRCRAFT_PROPS)
+        sim_proxy_mock.aircraft.all_properties = store.snapshot(1)
+        sim_proxy_mock.aircraft.batch.return_value = [None, None, "Error", None, None]
+
+        resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "results": [
+                {"cmd": "HDG", utils.CALLSIGN_LABEL: "A380", "error": None},
+                {"cmd": "ALT", utils.CALLSIGN_LABEL: "A380", "error": None},
+                {"cmd": "DIRECT", utils.CALLSIGN_LABEL: "A380", "error": "Error"},
+                {"cmd": "CRE", utils.CALLSIGN_LABEL: "NEW1", "error": None},
+                {"cmd": "GSPD", utils.CALLSIGN_LABEL: "NEW1", "error": None},
+                {
+                    "cmd": "GSPD",
+                    utils.CALLSIGN_LABEL: "NEW2",
+                    "error": 'Aircraft "NEW2" does not exist',
+                },
+            ]
+        }
+
+        commands = sim_proxy_mock.aircraft.batch.call_args[0][0]
+        assert [x.name for x in commands] == [
+            "set_heading",
+            "set_cleared_fl",
+            "direct_to_waypoint",
+            "create",
+            "set_ground_speed",
+        ]
+        assert commands[0] == AircraftCommand(
+            "set_heading", (callsign, types.Heading(123))
+        )
+        assert commands[1] == AircraftCommand(
+            "set_cleared_fl", (callsign, types.Altitude("FL250")), {"vspd": None}
+        )
+        assert commands[3].args[2] == types.LatLon(0, 0)
+
+        # Test create for an existing aircraft
+
+        sim_proxy_mock.aircraft.batch.reset_mock()
+        data["commands"][3][utils.CALLSIGN_LABEL] = "A380"
+        data["commands"] = data["commands"][3:4]
+
+        resp = test_flask_client.post(_ENDPOINT_PATH, json=data)
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json["results"] == [
+            {
+                "cmd": "CRE",
+                utils.CALLSIGN_LABEL: "A380",
+                "error": 'Aircraft "A380" already exists',
+            }
+        ]
+        sim_proxy_mock.aircraft.batch.assert_not_called()
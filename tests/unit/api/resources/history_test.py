@@ -0,0 +1,121 @@
+"""
+Tests for the HISTORY endpoint
+"""
+import io
+from http import HTTPStatus
+from unittest import mock
+
+import msgpack
+import numpy as np
+
+import bluebird.api.resources.utils.encodings as encodings
+import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.sim_proxy.proxy_aircraft_controls import HistoryFrame
+from tests.unit.api.resources import endpoint_path
+from tests.unit.api.resources import patch_utils_path
+from tests.unit.api.resources import TEST_AIRCRAFT_PROPS
+
+
+_ENDPOINT = "history"
+_ENDPOINT_PATH = endpoint_path(_ENDPOINT)
+
+
+def test_history_get(test_flask_client):
+    """Tests the GET method"""
+
+    # Test arg parsing
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?steps=0")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "steps" in resp.json["message"]
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=A")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert utils.CALLSIGN_LABEL in resp.json["message"]
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+
+        callsign = types.Callsign("A380")
+        frames = [
+            HistoryFrame(0, {}),
+            HistoryFrame(5, {callsign: TEST_AIRCRAFT_PROPS}),
+        ]
+        sim_proxy_mock.aircraft.history.return_value = frames
+
+        # Test all aircraft
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?steps=2")
+        assert resp.status_code == HTTPStatus.OK
+        sim_proxy_mock.aircraft.history.assert_called_once_with(2)
+        assert resp.json == {
+            "history": [
+                {"scenario_time": 0, "aircraft": {}},
+                {
+                    "scenario_time": 5,
+                    "aircraft": utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS),
+                },
+            ]
+        }
+
+        # Test a single aircraft
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=a380")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json["history"][1]["aircraft"] == utils.convert_aircraft_props(
+            TEST_AIRCRAFT_PROPS
+        )
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=TEST")
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+        assert resp.data.decode() == 'No history for aircraft "TEST"'
+
+
+def test_history_get_encoded(test_flask_client):
+    """Tests the GET method with the binary encodings"""
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+
+        store = AircraftStore()
+        frames = [HistoryFrame(0, store.snapshot(1))]
+        store.add(types.Callsign("A380"), TEST_AIRCRAFT_PROPS)
+        frames.append(HistoryFrame(5, store.snapshot(2)))
+        sim_proxy_mock.aircraft.history.return_value = frames
+
+        # Test msgpack
+
+        resp = test_flask_client.get(
+            _ENDPOINT_PATH, headers={"Accept": encodings.MSGPACK}
+        )
+        assert resp.status_code == HTTPStatus.OK
+        history = msgpack.unpackb(resp.data, raw=False)["history"]
+        assert [x["scenario_time"] for x in history] == [0, 5]
+        assert history[0]["aircraft"]["callsign"] == []
+        assert history[1]["aircraft"]["callsign"] == ["A380"]
+
+        # Test NPY
+
+        resp = test_flask_client.get(_ENDPOINT_PATH, headers={"Accept": encodings.NPY})
+        assert resp.status_code == HTTPStatus.OK
+        array = np.load(io.BytesIO(resp.data), allow_pickle=False)
+        assert array.dtype.names[:2] == ("scenario_time", "callsign")
+        assert array["scenario_time"].tolist() == [5]
+        assert array["callsign"].tolist() == ["A380"]
+
+        # Test unknown aircraft
+
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=TEST",
+            headers={"Accept": encodings.NPY},
+        )
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+        assert resp.data.decode() == 'No history for aircraft "TEST"'
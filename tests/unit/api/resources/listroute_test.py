@@ -6,6 +6,7 @@ from unittest import mock
 
 import bluebird.api as api
 import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
 from bluebird.api.resources.utils.responses import bad_request_resp
 from tests.unit.api.resources import endpoint_path
 from tests.unit.api.resources import patch_utils_path
@@ -21,9 +22,6 @@ def test_listroute_get(test_flask_client):
 
     # Test arg parsing
 
-    resp = test_flask_client.get(_ENDPOINT_PATH)
-    assert resp.status_code == HTTPStatus.BAD_REQUEST
-
     callsign_str = "A"
     resp = test_flask_client.get(f"{endpoint_path}{callsign_str}")
     assert resp.status_code == HTTPStatus.BAD_REQUEST
@@ -79,3 +77,56 @@ def test_listroute_get(test_flask_client):
             "next_waypoint": route_info[1],
             "route_waypoints": route_info[2],
         }
+
+
+def test_listroute_get_all(test_flask_client):
+    """Tests the GET method with all aircraft"""
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+
+        # Test error from all_routes
+
+        sim_proxy_mock.aircraft.all_routes.return_value = "Couldn't get routes"
+
+        resp = test_flask_client.get(_ENDPOINT_PATH)
+        assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert resp.data.decode() == "Couldn't get routes"
+
+        # Test response when no aircraft have a route
+
+        sim_proxy_mock.aircraft.all_routes.return_value = {}
+
+        resp = test_flask_client.get(_ENDPOINT_PATH)
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+        assert resp.data.decode() == "No aircraft have a route"
+
+        # Test valid response
+
+        route_info = (
+            "test_route",
+            "FIRE",
+            ["WATER", "FIRE", "EARTH"],
+        )
+        sim_proxy_mock.aircraft.all_routes.return_value = {
+            types.Callsign("TEST1"): route_info,
+            types.Callsign("TEST2"): (route_info[0], None, route_info[2]),
+        }
+
+        resp = test_flask_client.get(_ENDPOINT_PATH)
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "TEST1": {
+                "route_name": route_info[0],
+                "next_waypoint": route_info[1],
+                "route_waypoints": route_info[2],
+            },
+            "TEST2": {
+                "route_name": route_info[0],
+                "next_waypoint": None,
+                "route_waypoints": route_info[2],
+            },
+        }
@@ -1,12 +1,22 @@
 """
 Tests for the POS endpoint
 """
+import dataclasses
+import io
 from http import HTTPStatus
 from unittest import mock
 
+import msgpack
+import numpy as np
+
 import bluebird.api as api
+import bluebird.api.resources.utils.encodings as encodings
 import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
 from bluebird.api.resources.utils.responses import bad_request_resp
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.sim_proxy.change_tracker import ChangeSet
+from bluebird.utils.properties import AircraftProperties
 from tests.unit.api.resources import endpoint_path
 from tests.unit.api.resources import patch_utils_path
 from tests.unit.api.resources import TEST_AIRCRAFT_PROPS
@@ -17,6 +27,13 @@ _ENDPOINT = "pos"
 _ENDPOINT_PATH = endpoint_path(_ENDPOINT)
 
 
+def _snapshot(*all_props: AircraftProperties) -> AircraftStore:
+    store = AircraftStore()
+    for props in all_props:
+        store.add(types.Callsign(str(props.callsign)), props)
+    return store.snapshot(1)
+
+
 def test_pos_get_single(test_flask_client):
     """Tests the GET method with a single aircraft"""
 
@@ -59,21 +76,23 @@ def test_pos_get_single(test_flask_client):
         # Test error from aircraft properties
 
         utils_patch.check_exists.return_value = None
-        sim_proxy_mock.aircraft.properties.return_value = "Missing properties"
+        sim_proxy_mock.aircraft.all_properties = _snapshot()
 
         resp = test_flask_client.get(endpoint_str)
         assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
-        assert resp.data.decode() == "Missing properties"
+        assert resp.data.decode() == "No properties for aircraft TEST"
 
         # Test valid response
 
-        sim_proxy_mock.aircraft.properties.return_value = TEST_AIRCRAFT_PROPS
+        sim_proxy_mock.aircraft.all_properties = _snapshot(TEST_AIRCRAFT_PROPS)
+        endpoint_str = endpoint_str.replace("TEST", str(TEST_AIRCRAFT_PROPS.callsign))
 
         resp = test_flask_client.get(endpoint_str)
         assert resp.status_code == HTTPStatus.OK
         assert resp.json == {
             **utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS),
             "scenario_time": TEST_SIM_PROPS.scenario_time,
+            "snapshot_version": 1,
         }
 
 
@@ -97,7 +116,7 @@ def test_pos_get_all(test_flask_client):
 
         # Test error when no aircraft
 
-        sim_proxy_mock.aircraft.all_properties = None
+        sim_proxy_mock.aircraft.all_properties = _snapshot()
 
         resp = test_flask_client.get(_ENDPOINT_PATH)
         assert resp.status_code == HTTPStatus.BAD_REQUEST
@@ -105,13 +124,209 @@ def test_pos_get_all(test_flask_client):
 
         # Test valid response
 
-        sim_proxy_mock.aircraft.all_properties = {
-            str(TEST_AIRCRAFT_PROPS.callsign): TEST_AIRCRAFT_PROPS,
-        }
+        sim_proxy_mock.aircraft.all_properties = _snapshot(TEST_AIRCRAFT_PROPS)
 
         resp = test_flask_client.get(_ENDPOINT_PATH)
         assert resp.status_code == HTTPStatus.OK
         assert resp.json == {
             **utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS),
             **{"scenario_time": TEST_SIM_PROPS.scenario_time},
+            "snapshot_version": 1,
+        }
+
+
+def test_pos_get_changes(test_flask_client):
+    """Tests the GET method with a snapshot version"""
+
+    # Test arg parsing
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?since=-1")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert "since" in resp.json["message"]
+
+    resp = test_flask_client.get(
+        f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=TEST&since=1"
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == "Can't specify both a callsign and a snapshot version"
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+        sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+
+        # Test error from changes_since
+
+        sim_proxy_mock.aircraft.changes_since.return_value = "Error"
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?since=1")
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+        assert resp.data.decode() == "Error"
+        sim_proxy_mock.aircraft.changes_since.assert_called_once_with(1)
+
+        # Test valid response
+
+        snapshot = _snapshot(TEST_AIRCRAFT_PROPS)
+        changes = ChangeSet(
+            1,
+            changed=(TEST_AIRCRAFT_PROPS.callsign,),
+            removed=(types.Callsign("OLD1"),),
+        )
+        sim_proxy_mock.aircraft.changes_since.return_value = (snapshot, changes)
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?since=0")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            **utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS),
+            "removed": ["OLD1"],
+            "scenario_time": TEST_SIM_PROPS.scenario_time,
+            "snapshot_version": 1,
+        }
+
+
+def test_pos_get_encoded(test_flask_client):
+    """Tests the GET method with the binary encodings"""
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+        sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+        snapshot = _snapshot(TEST_AIRCRAFT_PROPS)
+        sim_proxy_mock.aircraft.all_properties = snapshot
+        sim_proxy_mock.aircraft.exists.return_value = True
+
+        # Test JSON is the default
+
+        resp = test_flask_client.get(_ENDPOINT_PATH, headers={"Accept": "text/html"})
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.mimetype == encodings.JSON
+
+        # Test msgpack
+
+        resp = test_flask_client.get(
+            _ENDPOINT_PATH, headers={"Accept": encodings.MSGPACK}
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.mimetype == encodings.MSGPACK
+        data = msgpack.unpackb(resp.data, raw=False)
+        json_data = utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS)["A380"]
+        assert data["aircraft"]["callsign"] == ["A380"]
+        for field in ("actype", "current_fl", "gs", "lat", "lon", "vs"):
+            assert data["aircraft"][field] == [json_data[field]]
+        assert data["scenario_time"] == TEST_SIM_PROPS.scenario_time
+        assert data["snapshot_version"] == 1
+
+        # Test NPY for a single aircraft
+
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=A380",
+            headers={"Accept": encodings.NPY},
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.mimetype == encodings.NPY
+        array = np.load(io.BytesIO(resp.data), allow_pickle=False)
+        assert array["callsign"].tolist() == ["A380"]
+        assert array["hdg"].tolist() == [json_data["hdg"]]
+        assert resp.headers["X-Scenario-Time"] == str(TEST_SIM_PROPS.scenario_time)
+        assert resp.headers["X-Snapshot-Version"] == "1"
+
+        # Test msgpack for the changes since a version
+
+        sim_proxy_mock.aircraft.changes_since.return_value = (
+            snapshot,
+            ChangeSet(1, changed=(types.Callsign("A380"),), removed=("B747",)),
+        )
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?since=0", headers={"Accept": encodings.MSGPACK}
+        )
+        assert resp.status_code == HTTPStatus.OK
+        data = msgpack.unpackb(resp.data, raw=False)
+        assert data["aircraft"]["callsign"] == ["A380"]
+        assert data["removed"] == ["B747"]
+
+
+def test_pos_get_selected(test_flask_client):
+    """Tests the GET method with field projection, callsign filtering and pages"""
+
+    # Test arg parsing
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?fields=lat,foo")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode().startswith("Invalid fields ['foo']")
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?callsigns=A,B")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?limit=0")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    resp = test_flask_client.get(f"{_ENDPOINT_PATH}?since=1&limit=1")
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == (
+        "Can't specify callsigns, limit, or cursor with a callsign or a snapshot "
+        "version"
+    )
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+        sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+        sim_proxy_mock.aircraft.exists.return_value = True
+        all_props = [
+            dataclasses.replace(TEST_AIRCRAFT_PROPS, callsign=types.Callsign(x))
+            for x in ("TEST3", "TEST1", "TEST2")
+        ]
+        sim_proxy_mock.aircraft.all_properties = _snapshot(*all_props)
+
+        # Test field projection
+
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?{utils.CALLSIGN_LABEL}=TEST1&fields=lat,current_fl"
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "TEST1": {"current_fl": 18_500, "lat": 51.529761},
+            "scenario_time": 0,
+            "snapshot_version": 1,
         }
+
+        # Test callsign filtering. Unknown aircraft are ignored
+
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?callsigns=TEST2,TEST3,TEST4&fields=hdg"
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "TEST2": {"hdg": 74},
+            "TEST3": {"hdg": 74},
+            "next_cursor": None,
+            "scenario_time": 0,
+            "snapshot_version": 1,
+        }
+
+        # Test pagination
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?limit=2&fields=vs")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "TEST1": {"vs": 73},
+            "TEST2": {"vs": 73},
+            "next_cursor": "TEST2",
+            "scenario_time": 0,
+            "snapshot_version": 1,
+        }
+
+        resp = test_flask_client.get(
+            f"{_ENDPOINT_PATH}?limit=2&cursor=TEST2&fields=vs",
+            headers={"Accept": encodings.MSGPACK},
+        )
+        assert resp.status_code == HTTPStatus.OK
+        data = msgpack.unpackb(resp.data, raw=False)
+        assert data["aircraft"] == {"callsign": ["TEST3"], "vs": [73]}
+        assert data["next_cursor"] is None
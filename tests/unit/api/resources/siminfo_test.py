@@ -4,6 +4,7 @@ Tests for the SIMINFO endpoint
 from http import HTTPStatus
 from unittest import mock
 
+import bluebird.api.resources.utils.utils as utils
 from bluebird.settings import Settings
 from bluebird.utils.types import Callsign
 from tests.unit.api.resources import endpoint_path
@@ -18,7 +19,7 @@ _ENDPOINT_PATH = endpoint_path(_ENDPOINT)
 def test_siminfo_get(test_flask_client):
     """Tests the POST method"""
 
-    with mock.patch(patch_utils_path(_ENDPOINT)) as utils_patch:
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
 
         sim_proxy_mock = mock.Mock()
         utils_patch.sim_proxy.return_value = sim_proxy_mock
@@ -59,3 +60,37 @@ def test_siminfo_get(test_flask_client):
             "dt": TEST_SIM_PROPS.dt,
             "utc_datetime": str(TEST_SIM_PROPS.utc_datetime),
         }
+
+
+def test_siminfo_get_fields(test_flask_client):
+    """Tests the GET method with only some of the fields"""
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
+
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+        sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+        callsigns_mock = mock.PropertyMock(return_value=[Callsign("AAA")])
+        type(sim_proxy_mock.aircraft).callsigns = callsigns_mock
+
+        # Test invalid fields
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?fields=state,foo")
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+        assert resp.data.decode().startswith("Invalid fields ['foo']")
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?fields=")
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+        # Test the callsigns are not fetched unless requested
+
+        callsigns_mock.reset_mock()
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?fields=scenario_time,state")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {"scenario_time": 0, "state": "INIT"}
+        callsigns_mock.assert_not_called()
+
+        resp = test_flask_client.get(f"{_ENDPOINT_PATH}?fields=callsigns")
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {"callsigns": ["AAA"]}
+        callsigns_mock.assert_called_once()
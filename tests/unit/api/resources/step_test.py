@@ -1,13 +1,19 @@
 """
 Tests for the STEP endpoint
 """
+import dataclasses
 from http import HTTPStatus
 from unittest import mock
 
+import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
 from bluebird.settings import Settings
+from bluebird.sim_proxy.aircraft_store import AircraftStore
 from bluebird.utils.properties import SimMode
 from tests.unit.api.resources import endpoint_path
 from tests.unit.api.resources import patch_utils_path
+from tests.unit.api.resources import TEST_AIRCRAFT_PROPS
+from tests.unit.api.resources import TEST_SIM_PROPS
 
 
 _ENDPOINT = "step"
@@ -25,7 +31,7 @@ def test_step_post(test_flask_client):
     assert resp.status_code == HTTPStatus.BAD_REQUEST
     assert resp.data.decode() == "Must be in agent mode to use step"
 
-    with mock.patch(patch_utils_path(_ENDPOINT)) as utils_patch:
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as utils_patch:
 
         sim_proxy_mock = mock.Mock()
         utils_patch.sim_proxy.return_value = sim_proxy_mock
@@ -46,3 +52,116 @@ def test_step_post(test_flask_client):
 
         resp = test_flask_client.post(_ENDPOINT_PATH)
         assert resp.status_code == HTTPStatus.OK
+
+
+def test_step_post_observe(test_flask_client):
+    """Tests the POST method with the post-step observation"""
+
+    Settings.SIM_MODE = SimMode.Agent
+
+    # Test arg parsing
+
+    resp = test_flask_client.post(_ENDPOINT_PATH, json={"metrics": [{"args": "A"}]})
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.data.decode() == "Each metric must have a name"
+
+    with mock.patch(
+        patch_utils_path(_ENDPOINT), wraps=utils
+    ) as utils_patch, mock.patch(
+        "bluebird.api.resources.metrics.utils"
+    ) as metrics_utils_patch:
+
+        sim_proxy_mock = mock.Mock()
+        utils_patch.sim_proxy.return_value = sim_proxy_mock
+        metrics_utils_patch.sim_proxy.return_value = sim_proxy_mock
+        sim_proxy_mock.simulation.step.return_value = None
+
+        # Test error from the sim properties
+
+        sim_proxy_mock.simulation.properties = "Error"
+
+        resp = test_flask_client.post(_ENDPOINT_PATH, json={"observe": True})
+        assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert resp.data.decode() == "Couldn't get the sim properties: Error"
+        sim_proxy_mock.simulation.step.assert_called_once()
+
+        # Test error from the aircraft properties
+
+        sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+        sim_proxy_mock.aircraft.all_properties = "Error"
+
+        resp = test_flask_client.post(_ENDPOINT_PATH, json={"observe": True})
+        assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert resp.data.decode() == "Couldn't get the aircraft properties: Error"
+
+        # Test valid response
+
+        store = AircraftStore()
+        store.add(types.Callsign("A380"), TEST_AIRCRAFT_PROPS)
+        sim_proxy_mock.aircraft.all_properties = store.snapshot(3)
+        sim_proxy_mock.metrics_providers = mock.MagicMock()
+        sim_proxy_mock.call_metric_function.side_effect = [1.5, "Metric error"]
+
+        resp = test_flask_client.post(
+            _ENDPOINT_PATH,
+            json={
+                "metrics": [
+                    {"name": "test1", "args": "A,B"},
+                    {"name": "test2", "args": ["C"], "provider": "Other"},
+                ]
+            },
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json == {
+            "aircraft": utils.convert_aircraft_props(TEST_AIRCRAFT_PROPS),
+            "metrics": [
+                {"name": "test1", "args": ["A", "B"], "result": 1.5},
+                {"name": "test2", "args": ["C"], "error": "Metric error"},
+            ],
+            "scenario_time": TEST_SIM_PROPS.scenario_time,
+            "sim_info": utils.convert_sim_props(TEST_SIM_PROPS, ["A380"]),
+            "snapshot_version": 3,
+        }
+        provider_calls = sim_proxy_mock.metrics_providers.get.call_args_list
+        assert [x[0][0] for x in provider_calls] == ["BlueBird", "Other"]
+
+
+def test_step_post_observe_matches_pos(test_flask_client):
+    """Tests that the observed aircraft data is the same as that returned by GET /pos"""
+
+    Settings.SIM_MODE = SimMode.Agent
+
+    store = AircraftStore()
+    store.add(types.Callsign("A380"), TEST_AIRCRAFT_PROPS)
+    store.add(
+        types.Callsign("B747"),
+        dataclasses.replace(
+            TEST_AIRCRAFT_PROPS,
+            callsign=types.Callsign("B747"),
+            cleared_flight_level=None,
+            requested_flight_level=None,
+        ),
+    )
+    store.add(types.Callsign("C130"), None)
+
+    sim_proxy_mock = mock.Mock()
+    sim_proxy_mock.simulation.step.return_value = None
+    sim_proxy_mock.simulation.properties = TEST_SIM_PROPS
+    sim_proxy_mock.aircraft.all_properties = store.snapshot(3)
+
+    with mock.patch(patch_utils_path(_ENDPOINT), wraps=utils) as step_utils_patch:
+        step_utils_patch.sim_proxy.return_value = sim_proxy_mock
+        step_resp = test_flask_client.post(_ENDPOINT_PATH, json={"observe": True})
+    assert step_resp.status_code == HTTPStatus.OK
+
+    with mock.patch(patch_utils_path("pos"), wraps=utils) as pos_utils_patch:
+        pos_utils_patch.CALLSIGN_LABEL = utils.CALLSIGN_LABEL
+        pos_utils_patch.sim_proxy.return_value = sim_proxy_mock
+        pos_resp = test_flask_client.get(endpoint_path("pos"))
+    assert pos_resp.status_code == HTTPStatus.OK
+
+    pos_data = dict(pos_resp.json)
+    del pos_data["scenario_time"]
+    del pos_data["snapshot_version"]
+    assert step_resp.json["aircraft"] == pos_data
+    assert list(pos_data) == ["A380", "B747"]
@@ -0,0 +1,97 @@
+"""
+Tests for the binary encodings
+"""
+import io
+
+import msgpack
+import numpy as np
+
+import bluebird.api.resources.utils.encodings as encodings
+import bluebird.api.resources.utils.utils as utils
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from tests.unit.api.resources import TEST_AIRCRAFT_PROPS
+
+
+def _store() -> AircraftStore:
+    store = AircraftStore()
+    store.add(types.Callsign("A380"), TEST_AIRCRAFT_PROPS)
+    store.add(types.Callsign("B747"), None)
+    return store.snapshot(1)
+
+
+def test_aircraft_columns():
+    """Tests that the columns are read from the store in the API field order"""
+
+    columns = encodings.aircraft_columns(_store())
+    assert list(columns) == ["callsign", *encodings.AIRCRAFT_FIELDS]
+    assert columns["callsign"] == ["A380"]
+    assert columns["actype"] == ["TEST1"]
+    assert np.array_equal(columns["current_fl"], [18_500])
+    assert np.isnan(columns["cleared_hdg"][0])
+
+    columns = encodings.aircraft_columns(_store(), ["B747"])
+    assert columns["callsign"] == []
+
+
+def test_to_json():
+    """Tests that the columns are converted into the JSON format"""
+
+    columns = encodings.aircraft_columns(_store())
+    assert encodings.to_json(columns) == utils.convert_aircraft_props(
+        TEST_AIRCRAFT_PROPS
+    )
+
+    columns = encodings.aircraft_columns(_store(), fields=["hdg", "cleared_fl", "lat"])
+    assert list(columns) == ["callsign", "hdg", "lat", "cleared_fl"]
+    assert encodings.to_json(columns) == {
+        "A380": {"hdg": 74, "lat": 51.529761, "cleared_fl": 22_000}
+    }
+
+
+def test_to_msgpack():
+    """Tests that the columns are packed as lists"""
+
+    data = {"aircraft": encodings.aircraft_columns(_store()), "snapshot_version": 1}
+    unpacked = msgpack.unpackb(encodings.to_msgpack(data), raw=False)
+    assert unpacked["snapshot_version"] == 1
+    assert unpacked["aircraft"]["callsign"] == ["A380"]
+    assert unpacked["aircraft"]["lat"] == [TEST_AIRCRAFT_PROPS.position.lat_degrees]
+
+
+def test_to_npy():
+    """Tests that the columns are packed into a structured array"""
+
+    columns = encodings.aircraft_columns(_store())
+    array = np.load(io.BytesIO(encodings.to_npy(columns)), allow_pickle=False)
+    assert array.dtype.names == ("callsign", *encodings.AIRCRAFT_FIELDS)
+    assert array["callsign"].tolist() == ["A380"]
+    assert array["actype"].tolist() == ["TEST1"]
+    assert array["hdg"].tolist() == [74]
+    assert np.isnan(array["cleared_vs"][0])
+
+    array = np.load(io.BytesIO(encodings.to_npy({"callsign": []})))
+    assert array.shape == (0,)
+
+
+def test_concat_columns():
+    """Tests that the rows of multiple sets of columns are joined"""
+
+    columns = encodings.aircraft_columns(_store())
+    joined = encodings.concat_columns([columns, columns])
+    assert joined["callsign"] == ["A380", "A380"]
+    assert np.array_equal(joined["lat"], np.repeat(columns["lat"], 2))
+    assert encodings.concat_columns([]) == {}
+
+
+def test_npy_headers():
+    """Tests that the extra data is converted into headers"""
+
+    headers = encodings.npy_headers(
+        {"scenario_time": 1.5, "snapshot_version": 3, "removed": ["A", "B"]}
+    )
+    assert headers == {
+        "X-Scenario-Time": "1.5",
+        "X-Snapshot-Version": "3",
+        "X-Removed": "A,B",
+    }
@@ -117,6 +117,7 @@ def test_convert_aircraft_props():
         requested_flight_level=types.Altitude(25_000),
         route_name=None,
         vertical_speed=types.VerticalSpeed(32),
+        cleared_heading=types.Heading(90),
     )
 
     converted = utils.convert_aircraft_props(ac_props)
@@ -124,7 +125,7 @@ def test_convert_aircraft_props():
     assert len(converted) == 1
 
     converted_props = converted["TEST"]
-    assert len(converted_props) == 9
+    assert len(converted_props) == 12
     assert converted_props["actype"] == "A380"
     assert converted_props["cleared_fl"] == 22_500
     assert converted_props["current_fl"] == 18_500
@@ -134,3 +135,6 @@ def test_convert_aircraft_props():
     assert converted_props["lon"] == 123.4
     assert converted_props["requested_fl"] == 25_000
     assert converted_props["vs"] == 32.0
+    assert converted_props["cleared_hdg"] == 90
+    assert converted_props["cleared_gs"] is None
+    assert converted_props["cleared_vs"] is None
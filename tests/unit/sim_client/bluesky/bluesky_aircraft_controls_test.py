@@ -1,12 +1,20 @@
 """
 Tests for BlueSkyAircraftControls
 """
+import threading
+import time
 from unittest import mock
 
+import bluebird.utils.types as types
+from bluebird.settings import Settings
 from bluebird.sim_client.bluesky.bluesky_aircraft_controls import (
     BlueSkyAircraftControls,
 )
+from bluebird.sim_client.bluesky.bluesky_client import ACK_MARKER
+from bluebird.sim_client.bluesky.bluesky_client import BlueSkyClient
+from bluebird.sim_client.bluesky.bluesky_client import StreamFrame
 from bluebird.utils.abstract_aircraft_controls import AbstractAircraftControls
+from bluebird.utils.properties import AircraftCommand
 
 
 def test_abstract_class_implemented():
@@ -15,7 +23,177 @@ def test_abstract_class_implemented():
     # Test basic instantiation
     BlueSkyAircraftControls(mock.Mock())
 
-    # Test ABC exactly implemented
-    assert AbstractAircraftControls.__abstractmethods__ == {
+    # Test ABC exactly implemented (plus the batch method)
+    assert AbstractAircraftControls.__abstractmethods__.union({"batch"}) == {
         x for x in dir(BlueSkyAircraftControls) if not x.startswith("_")
     }
+
+
+def test_batch():
+    """Tests that the batch method sends all the commands at once"""
+
+    bs_client_mock = mock.Mock()
+    aircraft_controls = BlueSkyAircraftControls(bs_client_mock)
+
+    callsign = types.Callsign("TEST1")
+    commands = [
+        AircraftCommand("set_cleared_fl", (callsign, types.Altitude("FL250"))),
+        AircraftCommand("set_heading", (callsign, types.Heading(123))),
+        AircraftCommand("properties", (callsign,)),
+        AircraftCommand("direct_to_waypoint", (callsign, "FIYRE")),
+        AircraftCommand("set_heading", (callsign,)),
+    ]
+
+    bs_client_mock.send_stack_cmds.return_value = [None, "Error", None]
+    results = aircraft_controls.batch(commands)
+
+    bs_client_mock.send_stack_cmds.assert_called_once_with(
+        ["ALT TEST1 25000", "HDG TEST1 123", "DIRECT TEST1 FIYRE"]
+    )
+    assert results[:4] == [None, "Error", "Unsupported command properties", None]
+    assert results[4].startswith("Invalid arguments for set_heading")
+
+
+def test_all_properties_cached():
+    """Tests that the aircraft properties are only converted once per stream frame"""
+
+    bs_client_mock = mock.Mock()
+    aircraft_controls = BlueSkyAircraftControls(bs_client_mock)
+
+    data = {
+        "id": ["TEST1"],
+        "actype": ["B747"],
+        "alt": [3048],
+        "gs": [100],
+        "trk": [90],
+        "lat": [50],
+        "lon": [0],
+        "vs": [0],
+    }
+    bs_client_mock.aircraft_stream_frame = StreamFrame(1, 0, data)
+
+    all_props = aircraft_controls.all_properties
+    assert list(all_props) == [types.Callsign("TEST1")]
+    assert aircraft_controls.all_properties is all_props
+
+    bs_client_mock.aircraft_stream_frame = StreamFrame(2, 0, data)
+    assert aircraft_controls.all_properties is not all_props
+
+
+def test_single_aircraft_lookups():
+    """Tests that properties and exists only create the requested aircraft"""
+
+    bs_client_mock = mock.Mock()
+    aircraft_controls = BlueSkyAircraftControls(bs_client_mock)
+
+    bs_client_mock.aircraft_stream_frame = StreamFrame(1, 0, {})
+    assert aircraft_controls.exists(types.Callsign("TEST1")).startswith("Error")
+    assert aircraft_controls.callsigns.startswith("Error")
+
+    data = {
+        "id": ["TEST1", "TEST2"],
+        "actype": ["B747", "A320"],
+        "alt": [3048, 3048],
+        "gs": [100, 100],
+        "trk": [90, 90],
+        "lat": [50, 51],
+        "lon": [0, 0],
+        "vs": [0, 0],
+    }
+    bs_client_mock.aircraft_stream_frame = StreamFrame(2, 0, data)
+
+    assert aircraft_controls.callsigns == [
+        types.Callsign("TEST1"),
+        types.Callsign("TEST2"),
+    ]
+    assert aircraft_controls.exists(types.Callsign("TEST2")) is True
+    assert aircraft_controls.exists(types.Callsign("TEST3")) is False
+    assert aircraft_controls.properties(types.Callsign("TEST3")) is None
+
+    props = aircraft_controls.properties(types.Callsign("TEST2"))
+    assert props.position == types.LatLon(51, 0)
+    assert list(aircraft_controls.all_properties._props) == [1]
+
+
+def test_removed_callsigns_released():
+    """Tests that callsigns are released from the pool once aircraft are removed"""
+
+    bs_client_mock = mock.Mock()
+    aircraft_controls = BlueSkyAircraftControls(bs_client_mock)
+    types.Callsign.clear_pool()
+
+    data = {
+        "id": ["TEST1", "TEST2"],
+        "actype": ["B747", "A320"],
+        "alt": [3048, 3048],
+        "gs": [100, 100],
+        "trk": [90, 90],
+        "lat": [50, 51],
+        "lon": [0, 0],
+        "vs": [0, 0],
+    }
+    bs_client_mock.aircraft_stream_frame = StreamFrame(1, 0, data)
+    callsigns = aircraft_controls.callsigns
+    assert all(x is types.Callsign.intern(x.value) for x in callsigns)
+
+    # TEST1 removed
+    bs_client_mock.aircraft_stream_frame = StreamFrame(2, 0, {})
+    assert isinstance(aircraft_controls.all_properties, str)
+    bs_client_mock.aircraft_stream_frame = StreamFrame(
+        3, 0, {k: v[1:] for k, v in data.items()}
+    )
+    assert aircraft_controls.callsigns == [callsigns[1]]
+    assert aircraft_controls.callsigns[0] is callsigns[1]
+    assert set(types._CALLSIGN_POOL) == {"TEST2"}
+
+
+def test_create_awaits_frame():
+    """
+    Tests that create waits for the aircraft data which was sent after the CRE command
+    was acknowledged
+    """
+
+    client = BlueSkyClient()
+    aircraft_controls = BlueSkyAircraftControls(client)
+    callsign = types.Callsign("TEST1")
+    data = {
+        "id": ["TEST1"],
+        "actype": ["B747"],
+        "alt": [3048],
+        "gs": [100],
+        "trk": [90],
+        "lat": [50],
+        "lon": [0],
+        "vs": [0],
+    }
+
+    def send_event(name, data=None, target=None):
+        # Acknowledge the CRE immediately, before the new aircraft data is sent
+        for line in data.split(";"):
+            if line.startswith(f"ECHO {ACK_MARKER}"):
+                client._process_event(b"ECHO", {"text": line[5:], "flags": 0})
+
+    def send_frame():
+        time.sleep(0.05)
+        client.stream(b"ACDATA", data, b"")
+
+    create_args = (
+        callsign,
+        "B747",
+        types.LatLon(50, 0),
+        types.Heading(90),
+        types.Altitude(10_000),
+        types.GroundSpeed(100),
+    )
+    with mock.patch.object(client, "send_event", side_effect=send_event):
+        thread = threading.Thread(target=send_frame)
+        thread.start()
+        start = time.perf_counter()
+        assert aircraft_controls.create(*create_args) is None
+        assert time.perf_counter() - start >= 0.05
+        thread.join()
+        assert aircraft_controls.properties(callsign).aircraft_type == "B747"
+
+        # Test create still succeeds if no new data is received
+        with mock.patch.object(Settings, "BS_FRAME_TIMEOUT", 0.05):
+            assert aircraft_controls.create(*create_args) is None
@@ -0,0 +1,175 @@
+"""
+Tests for AsyncBlueSkyClient
+"""
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from bluebird.settings import Settings
+from bluebird.sim_client.bluesky.bluesky_async_client import AsyncBlueSkyClient
+from bluebird.sim_client.bluesky.bluesky_async_client import LOOP_ERR
+from bluebird.sim_client.bluesky.bluesky_client import ACK_MARKER
+from bluebird.sim_client.bluesky.bluesky_client import Client
+
+
+def _fake_bluesky(client: AsyncBlueSkyClient, sent: list):
+    """
+    Returns a function which can replace Client.send_event, and which responds to
+    events in the same way as BlueSky
+    """
+
+    def send_event(name, data=None, target=None):
+        sent.append((name, threading.get_ident()))
+        if name == b"STEP":
+            client._process_event(b"STEP", None)
+            return
+        assert name == b"STACKCMD"
+        for line in data.split(";"):
+            if line.startswith(f"ECHO {ACK_MARKER}"):
+                client._process_event(b"ECHO", {"text": line[5:], "flags": 0})
+            elif line.startswith("HDG TEST2"):
+                client._process_event(b"ECHO", {"text": "TEST2 not found", "flags": 0})
+            elif line == "RESET":
+                # BlueSky clears its stack on reset, so the ack is not received
+                client._process_event(b"RESET", None)
+                return
+
+    return send_event
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+    client = AsyncBlueSkyClient()
+    client.stream(b"SIMINFO", [1.0, 0.05, 0.0, 0.0, 1, 0, "TEST"], b"")
+    client.start_timers()
+    deadline = time.perf_counter() + 1
+    while not client.loop.is_running():
+        assert time.perf_counter() < deadline, "Event loop did not start"
+        time.sleep(0.01)
+    yield client
+    client.stop()
+    client.timer.join(1)
+    assert not client.timer.is_alive()
+    assert not client.timer.exc_info
+
+
+def test_blocking_commands(client):
+    """Tests the blocking methods can be called from other threads"""
+
+    sent = []
+    with mock.patch.object(
+        Client, "send_event", side_effect=_fake_bluesky(client, sent)
+    ):
+        assert client.send_stack_cmd("HDG TEST1 123") is None
+        assert client.send_stack_cmd("HDG TEST2 123") == "Error(s): TEST2 not found"
+        assert client.send_stack_cmds(["HDG TEST1 123", "HDG TEST2 123"]) == [
+            None,
+            "Error(s): TEST2 not found",
+        ]
+        assert client.step() is None
+        start = time.perf_counter()
+        assert client.reset_sim() is None
+        assert time.perf_counter() - start < Settings.BS_CMD_TIMEOUT
+
+    # All events are sent from the I/O thread
+    assert {x[1] for x in sent} == {client.timer.ident}
+
+
+def test_concurrent_commands(client):
+    """Tests that multiple commands can be awaited at once"""
+
+    sent = []
+
+    async def run_all():
+        return await asyncio.gather(
+            client.send_stack_cmd_async("HDG TEST2 123"),
+            client.send_stack_cmd_async("HDG TEST1 123"),
+            client.send_stack_cmds_async(["HDG TEST1 123", "BAD;CMD"]),
+        )
+
+    with mock.patch.object(
+        Client, "send_event", side_effect=_fake_bluesky(client, sent)
+    ):
+        results = client.submit(run_all()).result(1)
+
+    assert results == [
+        "Error(s): TEST2 not found",
+        None,
+        [None, "Invalid command 'BAD;CMD'"],
+    ]
+    assert len(sent) == 3
+
+
+def test_lost_acks(client):
+    """
+    Tests that a batch whose ack is lost is completed (as failed) by the next batch's
+    ack
+    """
+
+    async def run_all():
+        return await asyncio.gather(
+            client.send_stack_cmd_async("HDG TEST1 123"),
+            client.send_stack_cmd_async("HDG TEST2 123"),
+        )
+
+    acks = []
+
+    def send_event(name, data=None, target=None):
+        acks.append(data.split(";")[1][5:])
+        # Only ack the 2nd command
+        if len(acks) == 2:
+            client._process_event(b"ECHO", {"text": acks[1], "flags": 0})
+
+    with mock.patch.object(Client, "send_event", side_effect=send_event):
+        start = time.perf_counter()
+        assert client.submit(run_all()).result(1) == [
+            "No acknowledgement received for HDG TEST1 123",
+            None,
+        ]
+        assert time.perf_counter() - start < Settings.BS_CMD_TIMEOUT
+
+
+def test_blocking_from_loop(client):
+    """Tests that the blocking methods can't be called from the event loop"""
+
+    async def call_blocking():
+        client.step()
+
+    with pytest.raises(RuntimeError, match="Blocking calls"):
+        client.submit(call_blocking()).result(1)
+
+
+def test_stop(client):
+    """
+    Tests that the loop is closed when the client is stopped, and that any blocking
+    calls then return an error
+    """
+
+    results = []
+
+    def send_cmd():
+        results.append(client.send_stack_cmd("HDG TEST1 123"))
+
+    # Don't respond, so that the command is still awaiting its ack when stopped
+    with mock.patch.object(Client, "send_event"):
+        with mock.patch.object(Settings, "BS_CMD_TIMEOUT", 5):
+            thread = threading.Thread(target=send_cmd)
+            thread.start()
+            deadline = time.perf_counter() + 1
+            while not client._pending_queue:
+                assert time.perf_counter() < deadline, "Command was not sent"
+                time.sleep(0.01)
+
+            start = time.perf_counter()
+            client.stop()
+            thread.join(1)
+            assert time.perf_counter() - start < 1
+
+    assert results == [LOOP_ERR]
+    assert client.loop.is_closed()
+    assert client.send_stack_cmd("HDG TEST1 123") == LOOP_ERR
+    assert client.step() == LOOP_ERR
+    assert client.quit() is False
@@ -1,3 +1,397 @@
 """
 Tests for BlueSkyClient
 """
+import threading
+import time
+from unittest import mock
+
+import msgpack
+import numpy as np
+import pytest
+
+from bluebird.settings import Settings
+from bluebird.sim_client.bluesky.bluesky_client import ACK_MARKER
+from bluebird.sim_client.bluesky.bluesky_client import BlueSkyClient
+from bluebird.sim_client.bluesky.bluesky_client import Client
+from bluebird.sim_client.bluesky.bluesky_client import IO_POLL_TIMEOUT
+from bluebird.sim_client.bluesky.bluesky_client import IO_THREAD_ERR
+
+
+def _fake_bluesky(client: BlueSkyClient, responses=(), ack=True):
+    """
+    Returns a function which can replace BlueSkyClient.send_event, and which responds
+    to each STACKCMD event in the same way as BlueSky. The responses are echoed for
+    each command which is sent
+    """
+
+    def send_event(name, data=None, target=None):
+        assert name == b"STACKCMD"
+        for line in data.split(";"):
+            if not line.startswith(f"ECHO {ACK_MARKER}"):
+                for text in responses:
+                    client._process_event(b"ECHO", {"text": text, "flags": 0})
+            elif ack:
+                client._process_event(b"ECHO", {"text": line[5:], "flags": 0})
+
+    return send_event
+
+
+def test_send_stack_cmd():
+    """Tests that send_stack_cmd returns as soon as the command is acknowledged"""
+
+    client = BlueSkyClient()
+
+    # Test no response
+
+    with mock.patch.object(client, "send_event", side_effect=_fake_bluesky(client)):
+        start = time.perf_counter()
+        assert client.send_stack_cmd("HDG TEST1 123") is None
+        assert time.perf_counter() - start < Settings.BS_CMD_TIMEOUT
+
+    # Test error response
+
+    send_event = _fake_bluesky(client, responses=["TEST2 not found"])
+    with mock.patch.object(client, "send_event", side_effect=send_event):
+        err = client.send_stack_cmd("HDG TEST2 123")
+        assert err == "Error(s): TEST2 not found"
+
+    # Test expected response
+
+    send_event = _fake_bluesky(client, responses=["DTMULT set to 5.0"])
+    with mock.patch.object(client, "send_event", side_effect=send_event):
+        resp = client.send_stack_cmd("DTMULT 5", response_expected=True)
+        assert resp == ["DTMULT set to 5.0"]
+
+    # Test latencies recorded
+
+    assert client.cmd_latencies.get("HDG").count == 2
+    assert client.cmd_latencies.get("DTMULT").count == 1
+
+
+def test_send_stack_cmd_timeout():
+    """
+    Tests that send_stack_cmd returns an error after the timeout if no ack is received
+    """
+
+    client = BlueSkyClient()
+    send_event = _fake_bluesky(client, responses=["TEST not found"], ack=False)
+
+    with mock.patch.object(client, "send_event", side_effect=send_event):
+        with mock.patch.object(Settings, "BS_CMD_TIMEOUT", 0.05):
+            start = time.perf_counter()
+            err = client.send_stack_cmd("HDG TEST 123")
+            assert time.perf_counter() - start >= 0.05
+            assert err == "No acknowledgement received for HDG TEST 123"
+
+            # Test only the commands which were not acknowledged are failed
+            def ack_first(name, data=None, target=None):
+                ack = data.split(";")[1][5:]
+                client._process_event(b"ECHO", {"text": ack, "flags": 0})
+
+            with mock.patch.object(client, "send_event", side_effect=ack_first):
+                results = client.send_stack_cmds(["HDG TEST1 123", "HDG TEST2 123"])
+            assert results == [None, "No acknowledgement received for HDG TEST2 123"]
+
+
+def test_send_stack_cmds():
+    """Tests that send_stack_cmds sends one event and demultiplexes the responses"""
+
+    client = BlueSkyClient()
+
+    assert client.send_stack_cmds([]) == []
+
+    def send_event(name, data=None, target=None):
+        # Respond with an error only for the 2nd command
+        for line in data.split(";"):
+            text = line[5:] if line.startswith("ECHO") else None
+            if line.startswith("HDG TEST2"):
+                text = "TEST2 not found"
+            if text:
+                client._process_event(b"ECHO", {"text": text, "flags": 0})
+
+    with mock.patch.object(client, "send_event", side_effect=send_event) as mock_send:
+        results = client.send_stack_cmds(
+            ["HDG TEST1 123", "HDG TEST2 123", "BAD;CMD", "ALT TEST1 FL100"]
+        )
+        mock_send.assert_called_once()
+
+    assert results == [
+        None,
+        "Error(s): TEST2 not found",
+        "Invalid command 'BAD;CMD'",
+        None,
+    ]
+    assert client.cmd_latencies.get("BATCH").count == 1
+
+
+def test_io_thread():
+    """
+    Tests that events are sent from the I/O thread once it is running, and that
+    waiters are signalled when events are received
+    """
+
+    client = BlueSkyClient()
+    sent = []
+
+    def send_event(name, data=None, target=None):
+        sent.append((name, threading.get_ident()))
+
+    with mock.patch.object(Client, "send_event", side_effect=send_event):
+
+        # Before the I/O thread is started, events are sent directly
+        client.send_event(b"TEST1")
+        assert sent == [(b"TEST1", threading.get_ident())]
+
+        client.start_timers()
+        try:
+            deadline = time.perf_counter() + 1
+            while client._io_thread_ident is None:
+                assert time.perf_counter() < deadline, "I/O thread did not start"
+                time.sleep(0.01)
+
+            start = time.perf_counter()
+            client.send_event(b"TEST2")
+            while len(sent) < 2:
+                assert time.perf_counter() - start < 1, "Event was not sent"
+                time.sleep(0.001)
+            # Check that the I/O thread was woken rather than timing-out its poll
+            assert time.perf_counter() - start < IO_POLL_TIMEOUT / 1000
+            assert sent[1] == (b"TEST2", client.timer.ident)
+
+            client._reset_event.clear()
+            client._process_event(b"RESET", None)
+            assert client._reset_event.is_set()
+        finally:
+            start = time.perf_counter()
+            client.stop()
+            client.timer.join(1)
+            # Check the I/O thread was woken rather than timing-out its poll
+            assert time.perf_counter() - start < IO_POLL_TIMEOUT / 1000
+
+        # Events sent after the I/O thread has stopped are dropped
+        assert client.send_event(b"TEST3") == IO_THREAD_ERR
+        assert len(sent) == 2
+
+    assert not client.timer.is_alive()
+    assert not client.timer.exc_info
+
+
+def test_io_thread_not_running():
+    """
+    Tests that events are queued if the I/O thread has been started but has not run
+    yet, and that commands fail immediately once it has exited
+    """
+
+    client = BlueSkyClient()
+    client.stream(b"SIMINFO", [1.0, 0.05, 0.0, 0.0, 1, 0, "TEST"], b"")
+    sent = []
+
+    def send_event(name, data=None, target=None):
+        sent.append((name, threading.get_ident()))
+
+    with mock.patch.object(Client, "send_event", side_effect=send_event):
+
+        with mock.patch.object(client.timer, "start"):
+            client.start_timers()
+        assert client.send_event(b"TEST1") is None
+        assert not sent
+        # The first iteration of the I/O thread sends the queued event
+        client.receive()
+        assert sent == [(b"TEST1", threading.get_ident())]
+
+        # Simulate the I/O thread exiting from an error
+        client.timer._exited = True
+        with mock.patch.object(Settings, "BS_CMD_TIMEOUT", 1):
+            start = time.perf_counter()
+            assert client.send_stack_cmd("HDG TEST 123") == IO_THREAD_ERR
+            assert client.send_stack_cmds(["HDG TEST 123", "BAD;CMD"]) == [
+                IO_THREAD_ERR,
+                "Invalid command 'BAD;CMD'",
+            ]
+            assert client.step() == IO_THREAD_ERR
+            assert client.upload_new_scenario("test", []) == IO_THREAD_ERR
+            assert time.perf_counter() - start < 0.5
+        assert not client._step_in_flight
+        assert len(sent) == 1
+
+    client.stop()
+
+
+def test_stream_frames():
+    """Tests that the stream data is published as read-only, versioned frames"""
+
+    client = BlueSkyClient()
+
+    assert client.aircraft_stream_frame.seq == 0
+    assert not client.aircraft_stream_data
+    assert not client.sim_info_stream_data
+
+    acdata = {"id": ["TEST1"], "alt": np.array([1000.0])}
+    client.stream(b"ACDATA", acdata, b"")
+    frame = client.aircraft_stream_frame
+    assert frame.seq == 1
+    assert client.aircraft_stream_data is frame.data
+    assert list(frame.data["id"]) == ["TEST1"]
+    with pytest.raises(TypeError):
+        frame.data["id"] = []
+    with pytest.raises(ValueError):
+        frame.data["alt"][0] = 0
+
+    client.stream(b"SIMINFO", [1.0, 0.05, 0.0, 0.0, 1, 0, "TEST"], b"")
+    assert client.sim_info_stream_frame.seq == 2
+    assert client.sim_info_stream_data[2] == 0.0
+
+    # Frames are replaced rather than modified
+    client.stream(b"ACDATA", {"id": []}, b"")
+    assert client.aircraft_stream_frame.seq == 3
+    assert list(frame.data["id"]) == ["TEST1"]
+
+
+def test_step():
+    """Tests that step returns as soon as the step is signalled as complete"""
+
+    client = BlueSkyClient()
+    siminfo = [1.0, 0.05, 0.0, 0.0, 1, 0, "TEST"]
+    client.stream(b"SIMINFO", siminfo, b"")
+
+    # Test completion by sim time advancing
+
+    def advance_sim_t(name, data=None, target=None):
+        assert name == b"STEP"
+        siminfo[2] += 1
+        client.stream(b"SIMINFO", siminfo, b"")
+
+    with mock.patch.object(Client, "send_event", side_effect=advance_sim_t):
+        assert client.step() is None
+
+    assert client.cmd_latencies.get("STEP").count == 1
+    assert client.cmd_latencies.get("STEP_FRAME").count == 1
+
+    # Test completion by STEP response
+
+    def step_resp(name, data=None, target=None):
+        client._process_event(b"STEP", None)
+
+    with mock.patch.object(Client, "send_event", side_effect=step_resp):
+        assert client.step() is None
+
+    assert client.cmd_latencies.get("STEP").count == 2
+    assert client.cmd_latencies.get("STEP_SEND").count == 2
+    assert client.cmd_latencies.get("STEP_COMPUTE").count == 2
+    assert client.cmd_latencies.get("STEP_FRAME").count == 1
+
+    # Test timeout
+
+    with mock.patch.object(Client, "send_event"):
+        with mock.patch.object(Settings, "BS_STEP_TIMEOUT", 0.05):
+            err = client.step()
+    assert err == "Error: Step command failed (timeout=0.05s init_t=1.0 new_t=1.0)"
+
+    # Test a late reply to the timed-out step doesn't complete the next step
+
+    def late_reply(name, data=None, target=None):
+        client._process_event(b"STEP", None)
+
+    with mock.patch.object(Client, "send_event", side_effect=late_reply):
+        with mock.patch.object(Settings, "BS_STEP_TIMEOUT", 0.05):
+            assert client.step().startswith("Error: Step command failed")
+
+    # Test STEP events are ignored when no step is in flight
+
+    client._process_event(b"STEP", None)
+    assert not client._step_event.is_set()
+    client.stream(b"SIMINFO", [1.0, 0.05, 5.0, 0.0, 1, 0, "TEST"], b"")
+    assert not client._step_event.is_set()
+
+
+def test_reset_sim():
+    """Tests that reset_sim returns as soon as the RESET event is received"""
+
+    client = BlueSkyClient()
+
+    # BlueSky clears its stack on reset, so the ack marker is not echoed
+
+    def reset(name, data=None, target=None):
+        assert data.startswith("RESET;")
+        client._process_event(b"RESET", None)
+
+    with mock.patch.object(client, "send_event", side_effect=reset):
+        start = time.perf_counter()
+        assert client.reset_sim() is None
+        assert time.perf_counter() - start < Settings.BS_CMD_TIMEOUT
+
+    assert client.cmd_latencies.get("RESET").count == 1
+
+    # Test error response
+
+    send_event = _fake_bluesky(client, responses=["Error: file not found"])
+    with mock.patch.object(client, "send_event", side_effect=send_event):
+        err = client.load_scenario("missing.scn")
+    assert err == "Error(s): Error: file not found"
+
+    # Test no RESET event
+
+    with mock.patch.object(client, "send_event", side_effect=_fake_bluesky(client)):
+        with mock.patch.object(Settings, "BS_RESET_TIMEOUT", 0.05):
+            err = client.reset_sim()
+    assert err == "Did not receive reset confirmation in time"
+
+
+def test_upload_new_scenario():
+    """Tests that upload_new_scenario returns as soon as the response is received"""
+
+    client = BlueSkyClient()
+
+    def scenario(name, data=None, target=None):
+        assert name == b"SCENARIO"
+        client._process_event(b"SCENARIO", "Ok")
+
+    with mock.patch.object(client, "send_event", side_effect=scenario):
+        start = time.perf_counter()
+        assert client.upload_new_scenario("test.scn", ["00:00:00.00>HOLD"]) is None
+        assert time.perf_counter() - start < Settings.BS_SCN_TIMEOUT
+
+    with mock.patch.object(client, "send_event", return_value=None):
+        with mock.patch.object(Settings, "BS_SCN_TIMEOUT", 0.05):
+            err = client.upload_new_scenario("test.scn", ["00:00:00.00>HOLD"])
+    assert err == "No response received"
+
+
+def test_stream_lazy_decoding():
+    """
+    Tests that only the latest frame of each stream is kept, and that frames are only
+    decoded when accessed
+    """
+
+    client = BlueSkyClient()
+
+    def pack(data):
+        return msgpack.packb(data, use_bin_type=True)
+
+    sender_id = b"\x00abcd"
+    msgs = [
+        [b"ACDATA" + sender_id, pack({"id": ["TEST1"]})],
+        [b"SIMINFO" + sender_id, pack([1.0, 0.05, 0.0, 0.0, 1, 0, "TEST"])],
+        [b"ACDATA" + sender_id, pack({"id": ["TEST2"]})],
+    ]
+    with mock.patch.object(client.poller, "poll", return_value=[(client.stream_in, 1)]):
+        with mock.patch.object(client, "_drain", return_value=msgs):
+            with mock.patch("msgpack.unpackb", wraps=msgpack.unpackb) as mock_unpack:
+                assert client.receive()
+                mock_unpack.assert_not_called()
+
+                frame = client.aircraft_stream_frame
+                assert frame.seq == 1
+                assert list(frame.data["id"]) == ["TEST2"]
+                assert client.aircraft_stream_data is frame.data
+                mock_unpack.assert_called_once()
+
+
+def test_route_stream_frame():
+    """Tests that ROUTEDATA frames can be read if the topic is subscribed to"""
+
+    client = BlueSkyClient()
+    assert client.route_stream_frame.seq == 0
+    client.stream(b"ROUTEDATA", {"acid": "TEST1"}, b"")
+    assert client.route_stream_frame.seq == 1
+    assert client.route_stream_frame.data["acid"] == "TEST1"
@@ -0,0 +1,265 @@
+"""
+Tests for the AircraftStore class
+"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.utils.aircraft_table import AircraftTable
+from bluebird.utils.properties import AircraftProperties
+
+
+def _props(callsign: str, **kwargs) -> AircraftProperties:
+    props = AircraftProperties(
+        aircraft_type="B747",
+        altitude=types.Altitude("FL250"),
+        callsign=types.Callsign(callsign),
+        cleared_flight_level=types.Altitude("FL300"),
+        ground_speed=None,
+        heading=None,
+        initial_flight_level=types.Altitude("FL250"),
+        position=types.LatLon(50, 1),
+        requested_flight_level=types.Altitude("FL350"),
+        route_name="ROUTE1",
+        vertical_speed=None,
+    )
+    return dataclasses.replace(props, **kwargs)
+
+
+def test_add_remove():
+    """Tests that aircraft can be added and removed, and that slots are re-used"""
+
+    store = AircraftStore()
+    assert not len(store)
+
+    callsigns = [types.Callsign(f"TEST{i}") for i in range(100)]
+    for callsign in callsigns:
+        store.add(callsign, _props(callsign.value))
+    assert len(store) == 100
+    assert list(store) == callsigns
+    assert store[callsigns[10]] == _props("TEST10")
+    assert store["test10"] is store[callsigns[10]]
+    assert types.Callsign("MISS") not in store
+    with pytest.raises(KeyError):
+        _ = store[types.Callsign("MISS")]
+
+    store.remove(callsigns[10])
+    assert callsigns[10] not in store
+    assert len(store) == 99
+
+    # The freed slot is re-used without growing
+    capacity = store._capacity
+    new_callsign = types.Callsign("NEW1")
+    store.add(new_callsign, None)
+    assert store._slots["NEW1"] == 10
+    assert store._capacity == capacity
+    assert store[new_callsign] is None
+
+    store.set_cleared_fl(callsigns[0], types.Altitude(12_345))
+    assert store[callsigns[0]].cleared_flight_level == types.Altitude(12_345)
+    store.set_heading(callsigns[0], types.Heading(0))
+    store.set_ground_speed(callsigns[0], types.GroundSpeed(12.5))
+    store.set_vertical_speed(callsigns[0], types.VerticalSpeed(-100))
+    assert store[callsigns[0]] == _props(
+        "TEST0",
+        cleared_flight_level=types.Altitude(12_345),
+        cleared_heading=types.Heading(0),
+        cleared_ground_speed=types.GroundSpeed(12.5),
+        cleared_vertical_speed=types.VerticalSpeed(-100),
+    )
+
+
+def test_update_from_sim():
+    """Tests the bulk update from an AircraftTable and the per-aircraft update"""
+
+    store = AircraftStore()
+    for callsign in ("TEST1", "TEST2", "TEST3"):
+        store.add(types.Callsign(callsign), _props(callsign))
+    store.add(types.Callsign("NEW1"), None)
+
+    table = AircraftTable(
+        {
+            "id": np.array(["TEST3", "NEW1", "TEST1"]),
+            "actype": np.array(["B747", "A320", "B747"]),
+            "alt": np.array([3048.0, 0.0, 0.0]),
+            "gs": np.array([100.0, 50.0, 0.0]),
+            "trk": np.array([90.0, 180.0, 0.0]),
+            "lat": np.array([51.0, 52.0, 53.0]),
+            "lon": np.array([-1.0, -2.0, -3.0]),
+            "vs": np.array([0.0, 0.0, 0.0]),
+        }
+    )
+    removed = store.update_from_sim(table)
+
+    assert removed == [types.Callsign("TEST2")]
+    assert list(store) == [
+        types.Callsign("TEST1"),
+        types.Callsign("TEST3"),
+        types.Callsign("NEW1"),
+    ]
+
+    # Sim data is updated, but the other properties are kept
+    props = store["TEST3"]
+    assert props.position == types.LatLon(51, -1)
+    assert props.altitude == types.Altitude(10_000)
+    assert props.heading == types.Heading(90)
+    assert props.ground_speed == types.GroundSpeed(100)
+    assert props.requested_flight_level == types.Altitude("FL350")
+    assert props.route_name == "ROUTE1"
+
+    # New aircraft are copied from the sim data
+    assert store["NEW1"] == table["NEW1"]
+
+    # Test the per-aircraft update
+    sim_props = {
+        types.Callsign("TEST1"): _props(
+            "TEST1", position=types.LatLon(1, 2), route_name=None
+        ),
+        types.Callsign("NEW1"): table["NEW1"],
+    }
+    removed = store.update_from_sim(sim_props)
+    assert removed == [types.Callsign("TEST3")]
+    assert store["TEST1"].position == types.LatLon(1, 2)
+    assert store["TEST1"].route_name == "ROUTE1"
+
+
+def test_copy():
+    """Tests that copies of the store are independent"""
+
+    store = AircraftStore()
+    callsign = types.Callsign("TEST1")
+    store.add(callsign, _props("TEST1"))
+
+    other = store.copy()
+    store.set_cleared_fl(callsign, types.Altitude(1234))
+    store.remove(callsign)
+
+    assert other[callsign] == _props("TEST1")
+    assert callsign not in store
+
+
+def test_snapshot():
+    """Tests that snapshots are versioned and read-only"""
+
+    store = AircraftStore()
+    callsign = types.Callsign("TEST1")
+    store.add(callsign, _props("TEST1"))
+    assert store.version is None
+
+    snapshot = store.snapshot(3)
+    assert snapshot.version == 3
+    assert snapshot[callsign] == _props("TEST1")
+
+    with pytest.raises(TypeError, match="can not be modified"):
+        snapshot.set_cleared_fl(callsign, types.Altitude(1234))
+    with pytest.raises(TypeError, match="can not be modified"):
+        snapshot.remove(callsign)
+
+    # Changes to the store are not visible in the snapshot
+    store.remove(callsign)
+    assert callsign in snapshot
+
+
+def test_changed_and_copy_rows():
+    """Tests the comparison of stores, and copying aircraft between them"""
+
+    reference = AircraftStore()
+    for callsign in ("TEST1", "TEST2"):
+        reference.add(types.Callsign(callsign), _props(callsign))
+    reference.add(types.Callsign("TEST3"), _props("TEST3", heading=types.Heading(0)))
+
+    store = AircraftStore()
+    store.add(types.Callsign("NEW1"), _props("NEW1"))
+    store.add(types.Callsign("TEST3"), _props("TEST3", heading=types.Heading(359)))
+    store.add(types.Callsign("TEST2"), _props("TEST2"))
+    store.add(types.Callsign("TEST1"), _props("TEST1", route_name=None))
+
+    assert store.changed(reference, {}) == [
+        types.Callsign("TEST3"),
+        types.Callsign("TEST1"),
+    ]
+    assert store.changed(reference, {"heading": 1}) == [types.Callsign("TEST1")]
+    assert not store.changed(AircraftStore(), {})
+
+    reference.copy_rows(store, [types.Callsign("NEW1"), types.Callsign("TEST1")])
+    assert reference["NEW1"] == store["NEW1"]
+    assert reference["TEST1"].route_name is None
+    assert store.changed(reference, {"heading": 1}) == []
+
+
+def test_columns():
+    """Tests that the named columns can be read for all or some of the aircraft"""
+
+    store = AircraftStore()
+    for callsign in ("TEST1", "TEST2", "TEST3"):
+        store.add(types.Callsign(callsign), _props(callsign))
+    store.set_heading(types.Callsign("TEST2"), types.Heading(90))
+    store.add(types.Callsign("TEST4"), None)
+
+    callsigns, columns = store.columns(["aircraft_type", "alt_ft", "cleared_heading"])
+    assert [str(x) for x in callsigns] == ["TEST1", "TEST2", "TEST3"]
+    assert list(columns) == ["aircraft_type", "alt_ft", "cleared_heading"]
+    assert columns["aircraft_type"] == ["B747"] * 3
+    assert np.array_equal(columns["alt_ft"], [25_000] * 3)
+    assert np.array_equal(
+        columns["cleared_heading"], [np.nan, 90, np.nan], equal_nan=True
+    )
+
+    callsigns, columns = store.columns(["lat", "route_name"], ["TEST2", "TEST4", "X"])
+    assert [str(x) for x in callsigns] == ["TEST2"]
+    assert np.array_equal(columns["lat"], [50])
+    assert columns["route_name"] == ["ROUTE1"]
+
+    # The columns are copies
+    columns["lat"][0] = 0
+    assert store[types.Callsign("TEST2")].position.lat_degrees == 50
+
+
+def test_select():
+    """Tests that the aircraft can be selected and paged through by callsign"""
+
+    store = AircraftStore()
+    for callsign in ("TEST3", "TEST1", "TEST4", "TEST2"):
+        store.add(types.Callsign(callsign), _props(callsign))
+    store.add(types.Callsign("TEST0"), None)
+
+    callsigns, after = store.select()
+    assert [str(x) for x in callsigns] == ["TEST1", "TEST2", "TEST3", "TEST4"]
+    assert after is None
+
+    callsigns, after = store.select(["TEST4", "test2", "TEST0", "TEST5"])
+    assert [str(x) for x in callsigns] == ["TEST2", "TEST4"]
+
+    callsigns, after = store.select(limit=3)
+    assert [str(x) for x in callsigns] == ["TEST1", "TEST2", "TEST3"]
+    assert after == "TEST3"
+    callsigns, after = store.select(limit=3, after=after)
+    assert [str(x) for x in callsigns] == ["TEST4"]
+    assert after is None
+
+    # The cursor is still valid if the aircraft has been removed
+    store.remove(types.Callsign("TEST2"))
+    callsigns, after = store.select(limit=1, after="TEST2")
+    assert [str(x) for x in callsigns] == ["TEST3"]
+    assert after == "TEST3"
+
+
+def test_snapshot_lookups_copied():
+    """Tests that the properties returned from a snapshot are copies"""
+
+    store = AircraftStore()
+    callsign = types.Callsign("TEST1")
+    store.add(callsign, _props("TEST1"))
+    snapshot = store.snapshot(1)
+
+    props = snapshot[callsign]
+    assert props == _props("TEST1")
+    assert props is not snapshot[callsign]
+    props.route_name = "Modified"
+    assert snapshot[callsign] == _props("TEST1")
+
+    # The working store returns its cached properties
+    assert store[callsign] is store[callsign]
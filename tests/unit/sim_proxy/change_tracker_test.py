@@ -0,0 +1,83 @@
+"""
+Tests for the ChangeTracker class
+"""
+import dataclasses
+
+import bluebird.utils.types as types
+from bluebird.sim_proxy.aircraft_store import AircraftStore
+from bluebird.sim_proxy.change_tracker import ChangeSet
+from bluebird.sim_proxy.change_tracker import ChangeTracker
+from tests.unit.sim_proxy.aircraft_store_test import _props
+
+
+_DEADBANDS = {"position": 0.1, "heading": 5}
+
+_TEST1 = types.Callsign("TEST1")
+_TEST2 = types.Callsign("TEST2")
+_TEST3 = types.Callsign("TEST3")
+
+
+def test_update():
+    """Tests that the changes in each snapshot are tracked with the deadbands"""
+
+    tracker = ChangeTracker(_DEADBANDS, 10)
+    store = AircraftStore()
+    store.add(_TEST1, _props("TEST1", heading=types.Heading(358)))
+    store.add(_TEST2, _props("TEST2"))
+
+    changes = tracker.update(store.snapshot(1))
+    assert changes == ChangeSet(1, added=(_TEST1, _TEST2))
+    assert tracker.version == 1
+
+    # Changes within the deadbands are not reported, including across 0 degrees
+    store.add(_TEST1, _props("TEST1", heading=types.Heading(2)))
+    store.add(_TEST2, _props("TEST2", position=types.LatLon(50.05, 1)))
+    assert tracker.update(store.snapshot(2)) == ChangeSet(2)
+
+    # Changes accumulate until they are reported
+    store.add(_TEST2, _props("TEST2", position=types.LatLon(50.15, 1)))
+    assert tracker.update(store.snapshot(3)) == ChangeSet(3, changed=(_TEST2,))
+    store.add(_TEST2, _props("TEST2", position=types.LatLon(50.2, 1)))
+    assert tracker.update(store.snapshot(4)) == ChangeSet(4)
+
+    # Properties without deadbands must match exactly
+    store.set_cleared_fl(_TEST1, types.Altitude("FL310"))
+    store.remove(_TEST2)
+    store.add(_TEST3, None)
+    changes = tracker.update(store.snapshot(5))
+    assert changes == ChangeSet(5, (_TEST3,), (_TEST2,), (_TEST1,))
+
+    store.add(_TEST3, _props("TEST3"))
+    assert tracker.update(store.snapshot(6)) == ChangeSet(6, changed=(_TEST3,))
+
+
+def test_since():
+    """Tests that the changes are combined across versions"""
+
+    tracker = ChangeTracker(_DEADBANDS, 3)
+    assert tracker.since(0) == ChangeSet(0)
+    assert tracker.since(1) is None
+
+    store = AircraftStore()
+    store.add(_TEST1, _props("TEST1"))
+    tracker.update(store.snapshot(1))
+    store.add(_TEST2, _props("TEST2"))
+    store.remove(_TEST1)
+    tracker.update(store.snapshot(2))
+
+    assert tracker.since(0) == ChangeSet(2, added=(_TEST2,))
+    assert tracker.since(1) == ChangeSet(2, (_TEST2,), (_TEST1,))
+    assert tracker.since(2) == ChangeSet(2)
+    assert tracker.since(3) is None
+
+    # Aircraft which are removed then added again are reported as changed
+    store.add(_TEST1, _props("TEST1", route_name="ROUTE2"))
+    store.add(_TEST2, _props("TEST2", heading=types.Heading(90)))
+    tracker.update(store.snapshot(3))
+    assert tracker.since(1) == ChangeSet(3, added=(_TEST2,), changed=(_TEST1,))
+
+    # Older versions are not available once the changes have been discarded
+    store.add(_TEST2, dataclasses.replace(store[_TEST2], route_name=None))
+    tracker.update(store.snapshot(4))
+    assert tracker.since(0) is None
+    assert tracker.since(1) == ChangeSet(4, added=(_TEST2,), changed=(_TEST1,))
@@ -0,0 +1,37 @@
+"""
+Tests for the CommandQueue class
+"""
+import bluebird.utils.types as types
+from bluebird.sim_proxy.command_queue import CommandQueue
+from bluebird.utils.properties import AircraftCommand
+
+
+def test_command_queue():
+    """Tests that the commands are coalesced per aircraft and field"""
+
+    queue = CommandQueue()
+    assert not len(queue)
+    assert queue.take() == ([], 0)
+
+    callsign1 = types.Callsign("TEST1")
+    callsign2 = types.Callsign("TEST2")
+    alt1 = AircraftCommand("set_cleared_fl", (callsign1, types.Altitude("FL200")))
+    alt2 = AircraftCommand("set_cleared_fl", (callsign1, types.Altitude("FL250")))
+    hdg = AircraftCommand("set_heading", (callsign1, types.Heading(90)))
+    direct = AircraftCommand("direct_to_waypoint", (callsign1, "FIYRE"))
+    gspd1 = AircraftCommand("set_ground_speed", (callsign1, types.GroundSpeed(100)))
+    gspd2 = AircraftCommand("set_ground_speed", (callsign2, types.GroundSpeed(120)))
+
+    for command in (alt1, hdg, gspd1, gspd2, alt2, direct):
+        queue.put(command)
+    assert len(queue) == 4
+
+    # The last command for each aircraft and field is kept, in the order they were
+    # last queued. Heading and direct-to replace each other
+    assert queue.take() == ([gspd1, gspd2, alt2, direct], 2)
+    assert not len(queue)
+    assert queue.take() == ([], 0)
+
+    queue.put(alt1)
+    queue.clear()
+    assert queue.take() == ([], 0)
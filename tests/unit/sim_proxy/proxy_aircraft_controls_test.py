@@ -1,7 +1,12 @@
 """
 Tests for the ProxyAircraftControls class
 """
+import concurrent.futures
 import copy
+import dataclasses
+import threading
+import time
+from collections import abc
 from unittest import mock
 
 import pytest
@@ -9,6 +14,7 @@ from aviary.sector.sector_element import SectorElement
 
 import bluebird.utils.properties as props
 import bluebird.utils.types as types
+from bluebird.settings import Settings
 from bluebird.sim_proxy.proxy_aircraft_controls import ProxyAircraftControls
 from bluebird.utils.sector_validation import validate_geojson_sector
 from tests.data import TEST_SCENARIO
@@ -251,6 +257,8 @@ def test_create(scenario_test_data):
 
     _, sim_data = scenario_test_data
     test_callsign = list(sim_data)[0]
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
 
     proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
 
@@ -266,31 +274,39 @@ def test_create(scenario_test_data):
     err = proxy_aircraft_controls.create(new_callsign, None, None, None, None, None)
     assert err == "Sim error (create)"
 
-    # Test error when checking for sim data for new aircraft
+    # Test the data is invalidated if the new aircraft can't be looked up, since it
+    # has still been created
 
-    all_properties_mock = mock.PropertyMock(return_value="Sim error (all_properties)")
-    type(mock_aircraft_controls).all_properties = all_properties_mock
     mock_create.return_value = None
+    mock_aircraft_controls.properties.return_value = "Sim error (properties)"
 
+    assert proxy_aircraft_controls.all_properties
     err = proxy_aircraft_controls.create(new_callsign, None, None, None, None, None)
-    assert err == "Sim error (all_properties)"
+    assert not err
+    mock_aircraft_controls.properties.assert_called_once_with(new_callsign)
+    assert not proxy_aircraft_controls._data_valid
 
-    # Test error when no sim data received for newly created aircraft
+    # Test the data is invalidated if the new aircraft is not in the sim data yet
 
-    new_callsign = types.Callsign("NEW2")
-    all_properties_mock.return_value = sim_data
+    assert proxy_aircraft_controls.all_properties
+    mock_aircraft_controls.properties.return_value = None
     err = proxy_aircraft_controls.create(new_callsign, None, None, None, None, None)
-    assert err == "New callsign missing from sim data"
+    assert not err
+    assert not proxy_aircraft_controls._data_valid
+    assert proxy_aircraft_controls.all_properties
 
-    # Test valid response
+    # Test valid response. The new aircraft is visible without a full refresh
 
-    all_properties_mock.return_value = {
-        **sim_data,
-        new_callsign: sim_data[test_callsign],
-    }
+    all_properties_mock.reset_mock()
+    version = proxy_aircraft_controls.version
+    new_props = dataclasses.replace(sim_data[test_callsign], callsign=new_callsign)
+    mock_aircraft_controls.properties.return_value = new_props
 
     err = proxy_aircraft_controls.create(new_callsign, None, None, None, None, None)
     assert not err
+    assert proxy_aircraft_controls.version == version + 1
+    assert proxy_aircraft_controls.all_properties[new_callsign] == new_props
+    all_properties_mock.assert_not_called()
 
 
 def test_properties(scenario_test_data):
@@ -403,14 +419,14 @@ def test_invalidate_data(scenario_test_data):
     type(mock_aircraft_controls).all_properties = all_properties_mock
 
     all_properties = proxy_aircraft_controls.all_properties
-    assert isinstance(all_properties, dict)
+    assert isinstance(all_properties, abc.Mapping)
 
     # Test data is invalidated
 
     all_properties_mock.reset_mock()
     proxy_aircraft_controls.invalidate_data()
     all_properties = proxy_aircraft_controls.all_properties
-    assert isinstance(all_properties, dict)
+    assert isinstance(all_properties, abc.Mapping)
     all_properties_mock.assert_called_once()
 
     # Test data is cleared
@@ -419,3 +435,371 @@ def test_invalidate_data(scenario_test_data):
     all_properties_mock.return_value = {}
     all_properties = proxy_aircraft_controls.all_properties
     assert all_properties == {}
+
+
+def test_history(scenario_test_data):
+    """Tests that the properties are stored in the step history"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    assert proxy_aircraft_controls.prev_ac_props() == {}
+    assert proxy_aircraft_controls.history() == []
+
+    _, sim_data = scenario_test_data
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+    current_props = proxy_aircraft_controls.all_properties
+
+    for i in range(3):
+        proxy_aircraft_controls.store_current_props(i)
+
+    # The read-only snapshots are stored directly
+    prev_props = proxy_aircraft_controls.prev_ac_props()
+    assert prev_props is current_props
+    callsign = next(iter(current_props))
+    with pytest.raises(TypeError):
+        prev_props[callsign] = None
+
+    # Changes to the current properties are not reflected in the history
+    mock_aircraft_controls.set_cleared_fl.return_value = None
+    proxy_aircraft_controls.set_cleared_fl(callsign, types.Altitude("FL123"))
+    assert prev_props[callsign].cleared_flight_level != types.Altitude("FL123")
+    assert proxy_aircraft_controls.all_properties.version > prev_props.version
+
+    history = proxy_aircraft_controls.history(2)
+    assert [x.scenario_time for x in history] == [1, 2]
+    assert [x.scenario_time for x in proxy_aircraft_controls.history(5)] == [0, 1, 2]
+
+    proxy_aircraft_controls.invalidate_data(clear=True)
+    assert proxy_aircraft_controls.history() == []
+
+    # Test the history length is limited
+
+    with mock.patch.object(Settings, "STEP_HISTORY_LEN", 2):
+        proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    for i in range(3):
+        proxy_aircraft_controls.store_current_props(i)
+    assert [x.scenario_time for x in proxy_aircraft_controls.history()] == [1, 2]
+
+
+def test_single_flight_refresh(scenario_test_data):
+    """Tests that only one thread refreshes the data, and the snapshot versioning"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+    version = proxy_aircraft_controls.version
+
+    _, sim_data = scenario_test_data
+    refreshing = threading.Event()
+
+    def _slow_all_properties():
+        refreshing.set()
+        time.sleep(0.1)
+        return sim_data
+
+    all_properties_mock = mock.PropertyMock(side_effect=_slow_all_properties)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        first = executor.submit(lambda: proxy_aircraft_controls.all_properties)
+        refreshing.wait()
+        others = [
+            executor.submit(lambda: proxy_aircraft_controls.all_properties)
+            for _ in range(3)
+        ]
+        snapshots = [first.result()] + [x.result() for x in others]
+
+    all_properties_mock.assert_called_once()
+    assert all(x is snapshots[0] for x in snapshots)
+    assert snapshots[0].version == version + 1
+    assert proxy_aircraft_controls.version == version + 1
+
+    # Snapshots can't be modified
+    with pytest.raises(TypeError, match="can not be modified"):
+        snapshots[0].remove(next(iter(snapshots[0])))
+
+    # Invalidating the data doesn't change the snapshot until it is refreshed
+    proxy_aircraft_controls.invalidate_data()
+    assert proxy_aircraft_controls.version == version + 1
+    assert proxy_aircraft_controls.all_properties is not snapshots[0]
+    assert proxy_aircraft_controls.version == version + 2
+
+
+def test_changes_since(scenario_test_data):
+    """Tests that the changed aircraft are tracked between snapshots"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+
+    _, sim_data = scenario_test_data
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+
+    snapshot, changes = proxy_aircraft_controls.changes_since(0)
+    assert changes.version == snapshot.version == proxy_aircraft_controls.version
+    assert set(changes.added) == set(sim_data)
+    assert not changes.removed and not changes.changed
+    version = snapshot.version
+
+    # Move one aircraft and remove another
+    moved, removed = list(sim_data)
+    sim_data = copy.deepcopy(sim_data)
+    sim_data[moved].position = types.LatLon(0, 0)
+    del sim_data[removed]
+    all_properties_mock.return_value = sim_data
+    proxy_aircraft_controls.invalidate_data()
+
+    snapshot, changes = proxy_aircraft_controls.changes_since(version)
+    assert snapshot.version == version + 1
+    assert changes.changed == (moved,)
+    assert changes.removed == (removed,)
+    assert not changes.added
+
+    err = proxy_aircraft_controls.changes_since(version + 2)
+    assert err == f"Changes since snapshot version {version + 2} are not available"
+
+
+def test_all_routes(scenario_test_data):
+    """Tests that the routes are returned for all aircraft"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+
+    all_properties_mock = mock.PropertyMock(return_value="Sim error")
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+
+    err = proxy_aircraft_controls.all_routes()
+    assert err == "Sim error"
+
+    # Aircraft without a route are not included
+
+    test_scenario = copy.deepcopy(TEST_SCENARIO)
+    test_scenario["aircraft"][1].pop("route")
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, test_scenario)
+
+    _, sim_data = scenario_test_data
+    all_properties_mock.return_value = sim_data
+
+    test_callsign = list(sim_data)[0]
+    route = [x["fixName"] for x in TEST_SCENARIO["aircraft"][0]["route"]]
+    assert proxy_aircraft_controls.all_routes() == {
+        test_callsign: (_TEST_SECTOR_ELEMENT.routes()[0].name, route[0], route)
+    }
+
+
+def test_write_through(scenario_test_data):
+    """Tests that the commanded targets are visible without refreshing the data"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+
+    _, sim_data = scenario_test_data
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+    test_callsign = list(sim_data)[0]
+    version = proxy_aircraft_controls.all_properties.version
+
+    mock_aircraft_controls.set_heading.return_value = None
+    mock_aircraft_controls.set_ground_speed.return_value = None
+    mock_aircraft_controls.set_vertical_speed.return_value = None
+
+    assert not proxy_aircraft_controls.set_heading(test_callsign, types.Heading(123))
+    assert not proxy_aircraft_controls.set_ground_speed(
+        test_callsign, types.GroundSpeed(150)
+    )
+    assert not proxy_aircraft_controls.set_vertical_speed(
+        test_callsign, types.VerticalSpeed(-500)
+    )
+
+    # The changes are only published (in a single snapshot) when the data is next read
+    assert proxy_aircraft_controls._snapshot.version == version
+    all_props = proxy_aircraft_controls.all_properties
+    assert all_props.version == version + 1
+    assert proxy_aircraft_controls._changes.version == version + 1
+    assert all_props[test_callsign].cleared_heading == types.Heading(123)
+    assert all_props[test_callsign].cleared_ground_speed == types.GroundSpeed(150)
+    assert all_props[test_callsign].cleared_vertical_speed == types.VerticalSpeed(-500)
+    all_properties_mock.assert_called_once()
+
+    # The targets are kept when the data is refreshed from the simulator
+    proxy_aircraft_controls.invalidate_data()
+    all_props = proxy_aircraft_controls.all_properties
+    assert all_props[test_callsign].cleared_heading == types.Heading(123)
+
+
+def test_batch(scenario_test_data):
+    """Tests that batch sends the commands together, and writes through the targets"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+
+    _, sim_data = scenario_test_data
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+    test_callsign = list(sim_data)[0]
+    new_callsign = types.Callsign("NEW")
+    new_props = dataclasses.replace(sim_data[test_callsign], callsign=new_callsign)
+    mock_aircraft_controls.properties.return_value = new_props
+    version = proxy_aircraft_controls.all_properties.version
+
+    commands = [
+        props.AircraftCommand("set_heading", (test_callsign, types.Heading(123))),
+        props.AircraftCommand("properties", (test_callsign,)),
+        props.AircraftCommand("direct_to_waypoint", (test_callsign, "TEST")),
+        props.AircraftCommand("direct_to_waypoint", (test_callsign, "FIYRE")),
+        props.AircraftCommand("create", (new_callsign, None, None, None, None, None)),
+        props.AircraftCommand("set_ground_speed", (new_callsign, types.GroundSpeed(5))),
+        props.AircraftCommand("set_vertical_speed", (test_callsign, None)),
+    ]
+
+    # Test the commands are sent with the simulator's batch method
+
+    mock_aircraft_controls.batch.return_value = [None, None, None, None, "Error"]
+    results = proxy_aircraft_controls.batch(commands)
+    assert results == [
+        None,
+        "Unsupported command properties",
+        'Waypoint "TEST" is not in the route '
+        "['FIYRE', 'EARTH', 'WATER', 'AIR', 'SPIRT']",
+        None,
+        None,
+        None,
+        "Error",
+    ]
+    sent = mock_aircraft_controls.batch.call_args[0][0]
+    assert sent == [commands[0]] + commands[3:]
+    mock_aircraft_controls.properties.assert_called_once_with(new_callsign)
+
+    # The targets are visible in a single new snapshot, without a full refresh
+
+    all_props = proxy_aircraft_controls.all_properties
+    assert all_props.version == version + 1
+    assert all_props[test_callsign].cleared_heading == types.Heading(123)
+    assert all_props[new_callsign].cleared_ground_speed == types.GroundSpeed(5)
+    all_properties_mock.assert_called_once()
+
+    # Test the commands are sent individually if the simulator has no batch method
+
+    del mock_aircraft_controls.batch
+    mock_aircraft_controls.set_heading.return_value = None
+    results = proxy_aircraft_controls.batch(commands[:1])
+    assert results == [None]
+    mock_aircraft_controls.set_heading.assert_called_once_with(
+        test_callsign, types.Heading(123)
+    )
+    assert proxy_aircraft_controls.all_properties.version == version + 2
+
+    # Test the snapshot can't be modified through the returned properties
+    all_props = proxy_aircraft_controls.all_properties
+    all_props[test_callsign].cleared_heading = types.Heading(1)
+    assert all_props[test_callsign].cleared_heading == types.Heading(123)
+
+
+def test_deferred_commands(scenario_test_data):
+    """Tests that commands are queued until the next step when deferred"""
+
+    mock_aircraft_controls = mock.Mock()
+    proxy_aircraft_controls = ProxyAircraftControls(mock_aircraft_controls)
+    proxy_aircraft_controls.set_initial_properties(_TEST_SECTOR_ELEMENT, TEST_SCENARIO)
+
+    _, sim_data = scenario_test_data
+    all_properties_mock = mock.PropertyMock(return_value=sim_data)
+    type(mock_aircraft_controls).all_properties = all_properties_mock
+    test_callsign = list(sim_data)[0]
+
+    # Test nothing is queued by default
+
+    mock_aircraft_controls.set_heading.return_value = None
+    assert not proxy_aircraft_controls.set_heading(test_callsign, types.Heading(90))
+    mock_aircraft_controls.set_heading.assert_called_once()
+    proxy_aircraft_controls.flush_commands()
+    mock_aircraft_controls.batch.assert_not_called()
+
+    Settings.DEFER_COMMANDS = True
+    Settings.SIM_MODE = props.SimMode.Agent
+    try:
+        # Test the commands are queued, and invalid ones rejected immediately
+
+        version = proxy_aircraft_controls.all_properties.version
+        mock_aircraft_controls.reset_mock()
+        assert not proxy_aircraft_controls.set_heading(
+            test_callsign, types.Heading(123)
+        )
+        assert not proxy_aircraft_controls.set_cleared_fl(
+            test_callsign, types.Altitude("FL200"), vspd=None
+        )
+        assert not proxy_aircraft_controls.set_cleared_fl(
+            test_callsign, types.Altitude("FL250")
+        )
+        err = proxy_aircraft_controls.direct_to_waypoint(test_callsign, "TEST")
+        assert err.startswith('Waypoint "TEST" is not in the route')
+        mock_aircraft_controls.set_heading.assert_not_called()
+        mock_aircraft_controls.set_cleared_fl.assert_not_called()
+        assert proxy_aircraft_controls.all_properties.version == version
+
+        # Test the coalesced commands are sent in one batch when flushed
+
+        mock_aircraft_controls.batch.return_value = [None, "Error"]
+        proxy_aircraft_controls.flush_commands()
+        mock_aircraft_controls.batch.assert_called_once_with(
+            [
+                props.AircraftCommand(
+                    "set_heading", (test_callsign, types.Heading(123))
+                ),
+                props.AircraftCommand(
+                    "set_cleared_fl", (test_callsign, types.Altitude("FL250"))
+                ),
+            ]
+        )
+        all_props = proxy_aircraft_controls.all_properties
+        assert all_props.version == version + 1
+        assert all_props[test_callsign].cleared_heading == types.Heading(123)
+
+        mock_aircraft_controls.batch.reset_mock()
+        proxy_aircraft_controls.flush_commands()
+        mock_aircraft_controls.batch.assert_not_called()
+
+        # Test the queue is cleared when the data is
+
+        assert not proxy_aircraft_controls.set_ground_speed(
+            test_callsign, types.GroundSpeed(100)
+        )
+        proxy_aircraft_controls.invalidate_data(clear=True)
+        proxy_aircraft_controls.flush_commands()
+        mock_aircraft_controls.batch.assert_not_called()
+
+        # Test batched commands are queued with the single commands, so the newest
+        # command for each aircraft and field is sent. Creates are still sent now
+
+        proxy_aircraft_controls.set_initial_properties(
+            _TEST_SECTOR_ELEMENT, TEST_SCENARIO
+        )
+        new_callsign = types.Callsign("NEW")
+        new_props = dataclasses.replace(sim_data[test_callsign], callsign=new_callsign)
+        mock_aircraft_controls.properties.return_value = new_props
+        mock_aircraft_controls.batch.return_value = [None]
+        create = props.AircraftCommand(
+            "create", (new_callsign, None, None, None, None, None)
+        )
+
+        assert not proxy_aircraft_controls.set_heading(test_callsign, types.Heading(90))
+        newer_heading = props.AircraftCommand(
+            "set_heading", (test_callsign, types.Heading(180))
+        )
+        results = proxy_aircraft_controls.batch([newer_heading, create])
+        assert results == [None, None]
+        mock_aircraft_controls.batch.assert_called_once_with([create])
+        mock_aircraft_controls.set_heading.assert_not_called()
+
+        mock_aircraft_controls.batch.reset_mock()
+        proxy_aircraft_controls.flush_commands()
+        mock_aircraft_controls.batch.assert_called_once_with([newer_heading])
+        all_props = proxy_aircraft_controls.all_properties
+        assert all_props[test_callsign].cleared_heading == types.Heading(180)
+    finally:
+        Settings.DEFER_COMMANDS = False
@@ -15,8 +15,6 @@ import bluebird.utils.properties as props
 from bluebird.settings import Settings
 from bluebird.sim_proxy.proxy_aircraft_controls import ProxyAircraftControls
 from bluebird.sim_proxy.proxy_simulator_controls import ProxySimulatorControls
-
-# TODO(RKM 2020-01-02) We should be able to remove this import
 from bluebird.utils.abstract_simulator_controls import (
     AbstractSimulatorControls,  # noreorder
 )
@@ -26,6 +24,8 @@ from bluebird.utils.properties import SimProperties
 from tests.data import TEST_SCENARIO
 from tests.data import TEST_SECTOR
 
+# TODO(RKM 2020-01-02) We should be able to remove this import
+
 
 _TEST_SIM_PROPERTIES = props.SimProperties(
     sector_name="test-sector",
@@ -317,7 +317,7 @@ def test_step():
 
     # Test error handling from step
 
-    proxy_simulator_controls._scenario = "test"
+    proxy_simulator_controls._scenario = Scenario("test", None)
     mock_sim_controls.step = mock.Mock(return_value="Error")
     res = proxy_simulator_controls.step()
     assert res == "Error"
@@ -332,6 +332,19 @@ def test_step():
     proxy_simulator_controls._logger = _mock_logger
     res = proxy_simulator_controls.step()
     assert not res
+    mock_aircraft_controls.store_current_props.assert_called_with(
+        _TEST_SIM_PROPERTIES.scenario_time
+    )
+
+    # Test the deferred commands are sent before the step
+
+    mock_aircraft_controls.reset_mock()
+    mock_sim_controls.step.reset_mock()
+    mock_sim_controls.step.side_effect = lambda: (
+        mock_aircraft_controls.flush_commands.assert_called_once()
+    )
+    assert not proxy_simulator_controls.step()
+    mock_sim_controls.step.assert_called_once()
 
 
 def test_set_speed():
@@ -0,0 +1,56 @@
+"""
+Tests for the RouteIndex class
+"""
+import numpy as np
+from aviary.sector.sector_element import SectorElement
+
+from bluebird.sim_proxy.route_index import RouteIndex
+from bluebird.utils.sector_validation import validate_geojson_sector
+from tests.data import TEST_SECTOR
+
+
+_TEST_SECTOR_ELEMENT = validate_geojson_sector(TEST_SECTOR)
+assert isinstance(_TEST_SECTOR_ELEMENT, SectorElement)
+
+# The fixes of the ASCENSION route, which runs north along the same longitude
+_ASCENSION = ["FIYRE", "EARTH", "WATER", "AIR", "SPIRT"]
+
+
+def test_route_index():
+    """Tests the route lookups"""
+
+    routes = RouteIndex(_TEST_SECTOR_ELEMENT.routes())
+    assert set(routes) == {"ASCENSION", "FALLEN"}
+    assert routes["ASCENSION"].name == "ASCENSION"
+
+    assert routes.match(_ASCENSION) == "ASCENSION"
+    assert routes.match(reversed(_ASCENSION)) == "FALLEN"
+    assert routes.match(_ASCENSION[1:]) is None
+
+    assert routes.waypoints("ASCENSION") == _ASCENSION
+    assert routes.has_waypoint("ASCENSION", "WATER")
+    assert not routes.has_waypoint("ASCENSION", "FIRE")
+
+    assert not RouteIndex()
+
+
+def test_next_waypoints():
+    """Tests that the next waypoints are found for many aircraft at once"""
+
+    routes = RouteIndex(_TEST_SECTOR_ELEMENT.routes())
+
+    # Before the start, between the fixes, after the end, and at an unknown position
+    lats = np.array([49.0, 51.0, 51.0, 52.0, 54.0, np.nan])
+    lons = np.array([-0.1275, -0.1, -0.1, -0.2, -0.1275, np.nan])
+    route_names = ["ASCENSION", "ASCENSION", "FALLEN", "FALLEN", "ASCENSION", "FALLEN"]
+
+    assert routes.next_waypoints(route_names, lats, lons) == [
+        "FIYRE",
+        "WATER",
+        "EARTH",
+        "WATER",
+        "SPIRT",
+        None,
+    ]
+    assert routes.next_waypoint("FALLEN", 53.5, 0) == "SPIRT"
+    assert routes.next_waypoints([], np.empty(0), np.empty(0)) == []
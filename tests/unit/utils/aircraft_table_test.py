@@ -0,0 +1,85 @@
+"""
+Tests for AircraftTable
+"""
+import numpy as np
+import pytest
+
+import bluebird.utils.types as types
+from bluebird.utils.aircraft_table import AircraftTable
+from bluebird.utils.properties import AircraftProperties
+
+
+_TEST_DATA = {
+    "id": np.array(["TEST1", "test2"]),
+    "actype": np.array(["B747", "A320"]),
+    "alt": np.array([3048.0, 0.0]),
+    "gs": np.array([100.5, 0.0]),
+    "trk": np.array([-90.0, 360.0]),
+    "lat": np.array([50.0, -10.0]),
+    "lon": np.array([0.0, 179.0]),
+    "vs": np.array([0.0, -5.08]),
+}
+
+
+def test_aircraft_table():
+    """Tests the conversion of the ACDATA columns"""
+
+    table = AircraftTable(_TEST_DATA)
+
+    assert len(table) == 2
+    assert list(table) == [types.Callsign("TEST1"), types.Callsign("TEST2")]
+    assert types.Callsign("TEST2") in table
+    assert "test1" in table
+    assert "TEST3" not in table
+    assert None not in table
+    assert table.row(types.Callsign("TEST2")) == 1
+    assert table.row("test1") == 0
+    assert table.row("TEST3") is None
+    with pytest.raises(KeyError):
+        _ = table["TEST3"]
+
+    # AircraftProperties are only created when accessed
+    assert not table._props
+    props = table[types.Callsign("TEST1")]
+    assert props == AircraftProperties(
+        aircraft_type="B747",
+        altitude=types.Altitude(10_000),
+        callsign=types.Callsign("TEST1"),
+        cleared_flight_level=None,
+        ground_speed=types.GroundSpeed(100),
+        heading=types.Heading(270),
+        initial_flight_level=None,
+        position=types.LatLon(50, 0),
+        requested_flight_level=None,
+        route_name=None,
+        vertical_speed=types.VerticalSpeed(0),
+    )
+    assert list(table._props) == [0]
+    assert table["TEST1"] is props
+
+    props = table["TEST2"]
+    assert props.heading == types.Heading(0)
+    assert props.vertical_speed == types.VerticalSpeed(-1000)
+    assert isinstance(props.position.lon_degrees, float)
+
+
+def test_aircraft_table_invalid():
+    """Tests that invalid data is rejected"""
+
+    with pytest.raises(KeyError):
+        AircraftTable({})
+
+    data = dict(_TEST_DATA, lat=np.array([50.0, 91.0]))
+    with pytest.raises(ValueError, match=r"Invalid data for aircraft \['TEST2'\]"):
+        AircraftTable(data)
+
+    data = dict(_TEST_DATA, id=np.array(["TEST1", "T-2"]))
+    with pytest.raises(ValueError, match="TEST2|T-2"):
+        AircraftTable(data)
+
+    data = dict(_TEST_DATA, gs=np.array([100.0]))
+    with pytest.raises(ValueError, match="different lengths"):
+        AircraftTable(data)
+
+    table = AircraftTable({k: [] for k in _TEST_DATA})
+    assert not len(table)
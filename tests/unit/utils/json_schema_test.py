@@ -0,0 +1,24 @@
+"""
+Tests for the JSON schema utils
+"""
+from bluebird.utils.json_schema import compile_validator
+from bluebird.utils.json_schema import validation_error
+
+
+_SCHEMA = {
+    "type": "object",
+    "properties": {"items": {"type": "array", "items": {"$ref": "#/definitions/item"}}},
+    "definitions": {"item": {"type": "integer"}},
+}
+
+
+def test_compile_validator():
+    """Tests that the references are inlined, and the errors are reported"""
+
+    validator = compile_validator(_SCHEMA)
+    assert validator.schema["properties"]["items"]["items"] == {"type": "integer"}
+    assert "definitions" not in validator.schema
+
+    assert not validation_error(validator, {"items": [1, 2]})
+    err = validation_error(validator, {"items": [1, "2"]})
+    assert err.startswith("'2' is not of type 'integer'")
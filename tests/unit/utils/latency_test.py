@@ -0,0 +1,46 @@
+"""
+Tests for the latency module
+"""
+from bluebird.utils.latency import LatencyHistogram
+from bluebird.utils.latency import LatencyRecorder
+
+
+def test_latency_histogram():
+    """Tests the LatencyHistogram class"""
+
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.mean_ms == 0
+    assert histogram.percentile_ms(50) == 0
+
+    for seconds in [0.0005, 0.003, 0.003, 0.015, 7]:
+        histogram.record(seconds)
+
+    assert histogram.count == 5
+    assert histogram.max_ms == 7000
+    assert histogram.percentile_ms(0) == 1
+    assert histogram.percentile_ms(50) == 5
+    assert histogram.percentile_ms(80) == 20
+    assert histogram.percentile_ms(100) == 7000
+
+    buckets = dict(histogram.buckets())
+    assert buckets["<=1ms"] == 1
+    assert buckets["<=5ms"] == 2
+    assert buckets[">5000ms"] == 1
+    assert sum(buckets.values()) == 5
+
+    assert histogram.summary().startswith("n=5 ")
+
+
+def test_latency_recorder():
+    """Tests the LatencyRecorder class"""
+
+    recorder = LatencyRecorder()
+    assert recorder.get("MISSING").count == 0
+
+    recorder.record("HDG", 0.01)
+    recorder.record("HDG", 0.02)
+    recorder.record("ALT", 0.01)
+
+    assert recorder.get("HDG").count == 2
+    assert [name for name, _ in recorder] == ["ALT", "HDG"]
@@ -1,9 +1,46 @@
 """
 Tests for the scenario validation
 """
+import copy
+
+from aviary.sector.sector_element import SectorElement
+
 from bluebird.utils.scenario_validation import validate_json_scenario
+from bluebird.utils.scenario_validation import validate_scenario_against_sector
+from bluebird.utils.sector_validation import validate_geojson_sector
 from tests.data import TEST_SCENARIO
+from tests.data import TEST_SECTOR
 
 
 def test_scenario_validation():
     assert not validate_json_scenario(TEST_SCENARIO)
+    err = validate_json_scenario({"aircraft": [], "startTime": "12:00"})
+    assert err.startswith("'12:00' does not match")
+
+
+def test_scenario_against_sector():
+    """Tests the check of the scenario fixes against the sector"""
+
+    sector_element = validate_geojson_sector(TEST_SECTOR)
+    assert isinstance(sector_element, SectorElement)
+
+    # The fixes in the test scenario are positioned differently from the sector
+    err, warnings = validate_scenario_against_sector(sector_element, TEST_SCENARIO)
+    assert not err
+    assert warnings
+    assert warnings[0].startswith("Fix FIYRE is at [-0.1275, 50.91735552314281]")
+
+    scenario = copy.deepcopy(TEST_SCENARIO)
+    for aircraft in scenario["aircraft"]:
+        for route_item in aircraft["route"]:
+            fix = sector_element.shape.fixes[route_item["fixName"]]
+            route_item["geometry"]["coordinates"] = [fix.x, fix.y]
+    assert validate_scenario_against_sector(sector_element, scenario) == (None, [])
+
+    scenario["aircraft"][0]["route"][0]["fixName"] = "MISSING"
+    err, _ = validate_scenario_against_sector(sector_element, scenario)
+    assert err.startswith("Fix MISSING not in")
+
+    # Aircraft without a route are allowed
+    scenario["aircraft"][0].pop("route")
+    assert validate_scenario_against_sector(sector_element, scenario) == (None, [])
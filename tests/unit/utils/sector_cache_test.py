@@ -0,0 +1,96 @@
+"""
+Tests for the SectorCache class
+"""
+import copy
+import json
+from pathlib import Path
+from unittest import mock
+
+import geojson
+from aviary.sector.sector_element import SectorElement
+
+from bluebird.utils.sector_cache import CachedSector
+from bluebird.utils.sector_cache import SectorCache
+from tests.data import TEST_SECTOR
+
+
+_VALIDATE_PATH = "bluebird.utils.sector_cache.validate_geojson_sector"
+
+
+def test_from_geojson():
+    """Tests that sectors with the same content are only validated once"""
+
+    cache = SectorCache()
+    cached = cache.from_geojson(TEST_SECTOR)
+    assert isinstance(cached, CachedSector)
+    assert isinstance(cached.element, SectorElement)
+
+    with mock.patch(_VALIDATE_PATH) as validate_mock:
+        assert cache.from_geojson(copy.deepcopy(TEST_SECTOR)) is cached
+        validate_mock.assert_not_called()
+
+    assert cache.geojson(cached.element) == geojson.dumps(cached.element)
+    assert cache.geojson(cached.element) is cached.geojson
+
+    err = cache.from_geojson({})
+    assert isinstance(err, str) and "is a required property" in err
+    assert len(cache) == 1
+
+
+def test_from_file(tmpdir):
+    """Tests that sector files are only re-read when they change"""
+
+    cache = SectorCache()
+    sector_file = Path(tmpdir) / "test.geojson"
+    with open(sector_file, "w") as f:
+        json.dump(TEST_SECTOR, f)
+
+    cached = cache.from_file(sector_file)
+    assert isinstance(cached, CachedSector)
+    assert cache.is_saved(sector_file, cached.element)
+
+    with mock.patch("bluebird.utils.sector_cache.open") as open_mock:
+        assert cache.from_file(sector_file) is cached
+        open_mock.assert_not_called()
+
+    # Changing the file content means it is parsed again
+    sector_json = copy.deepcopy(TEST_SECTOR)
+    sector_json["_source"] = "changed"
+    with open(sector_file, "w") as f:
+        json.dump(sector_json, f)
+
+    assert not cache.is_saved(sector_file, cached.element)
+    new_cached = cache.from_file(sector_file)
+    assert new_cached is not cached
+    assert len(cache) == 2
+
+    # Saved files are recorded
+    other_file = Path(tmpdir) / "other.geojson"
+    assert not cache.is_saved(other_file, cached.element)
+    cached.element.write_geojson(str(other_file))
+    cache.saved_file(other_file, cached.element)
+    assert cache.is_saved(other_file, cached.element)
+
+
+def test_eviction():
+    """Tests that the least-recently used sectors are evicted"""
+
+    sectors = []
+    for i in range(3):
+        sector_json = copy.deepcopy(TEST_SECTOR)
+        sector_json["_source"] = str(i)
+        sectors.append(sector_json)
+    size = len(json.dumps(sectors[0], sort_keys=True, separators=(",", ":")))
+
+    cache = SectorCache(max_size=2 * size)
+    first = cache.from_geojson(sectors[0])
+    cache.from_geojson(sectors[1])
+    assert cache.from_geojson(sectors[0]) is first
+    cache.from_geojson(sectors[2])
+    assert len(cache) == 2
+
+    # The second sector was the least recently used
+    assert cache.from_geojson(sectors[0]) is first
+    with mock.patch(_VALIDATE_PATH) as validate_mock:
+        cache.from_geojson(sectors[1])
+        validate_mock.assert_called_once()
@@ -9,3 +9,6 @@ from tests.data import TEST_SECTOR
 
 def test_sector_validation():
     assert isinstance(validate_geojson_sector(TEST_SECTOR), SectorElement)
+    assert validate_geojson_sector({"type": "test"}).startswith(
+        "'features' is a required property"
+    )
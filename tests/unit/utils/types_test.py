@@ -1,6 +1,8 @@
 """
 Tests for the types module
 """
+import copy
+
 import pytest
 
 import bluebird.utils.types as types
@@ -36,6 +38,58 @@ def test_altitude():
             types.Altitude(val)
 
 
+def test_trusted_constructors():
+    """Tests that the trusted constructors create equal (slotted) objects"""
+
+    pairs = [
+        (types.Altitude(123), types.Altitude.trusted(123)),
+        (types.Callsign("test1"), types.Callsign.trusted("TEST1")),
+        (types.GroundSpeed(12.5), types.GroundSpeed.trusted(12.5)),
+        (types.Heading(450), types.Heading.trusted(90)),
+        (types.LatLon(1.5, -2.5), types.LatLon.trusted(1.5, -2.5)),
+        (types.VerticalSpeed(-100), types.VerticalSpeed.trusted(-100)),
+    ]
+    for checked, trusted in pairs:
+        assert type(trusted) is type(checked)
+        assert trusted == checked
+        assert repr(trusted) == repr(checked)
+        assert not hasattr(trusted, "__dict__")
+        assert copy.deepcopy(trusted) == trusted
+
+    assert hash(types.Callsign.trusted("TEST1")) == hash(types.Callsign("TEST1"))
+
+    # No validation is performed
+    assert types.Altitude.trusted(-1).feet == -1
+
+
+def test_callsign_pool():
+    """Tests the interning of callsigns"""
+
+    types.Callsign.clear_pool()
+
+    callsign = types.Callsign.intern("test1")
+    assert types.Callsign.intern("TEST1") is callsign
+    assert types.Callsign.intern("test1") is callsign
+    assert types.Callsign.canonical("Test1") is callsign
+    assert types.Callsign("TEST1") == callsign
+
+    # Callsigns which are not in the pool are not added by canonical
+    other = types.Callsign.canonical("TEST2")
+    assert other == types.Callsign("TEST2")
+    assert types.Callsign.canonical("TEST2") is not other
+
+    with pytest.raises(AssertionError, match="Invalid callsign"):
+        types.Callsign.intern("T-1")
+
+    types.Callsign.release(["TEST1", "TEST3"])
+    assert types.Callsign.canonical("TEST1") is not callsign
+    assert types.Callsign.intern("TEST1") == callsign
+    assert types.Callsign.intern("TEST1") is not callsign
+
+    types.Callsign.clear_pool()
+    assert not types._CALLSIGN_POOL
+
+
 def test_is_valid_seed():
     """Tests for the is_valid_seed function"""
 